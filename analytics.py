@@ -0,0 +1,261 @@
+import hashlib
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+EVENT_DATE = '2025-04-02'
+MAX_CACHED_RESULTS = 8
+# Returns before the event date that event_study's default estimation window can reach.
+EVENT_LOOKBACK_DAYS = 260
+
+
+def price_matrix(long_df, value='adj_close'):
+    prices = long_df.pivot_table(index='date', columns='ticker', values=value, aggfunc='last')
+    prices.index = pd.to_datetime(prices.index)
+    return prices.sort_index()
+
+
+def log_returns(prices):
+    prices = np.asarray(prices, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.log(np.where(prices > 0, prices, np.nan))
+    returns = np.full_like(logs, np.nan)
+    returns[1:] = logs[1:] - logs[:-1]
+    return returns
+
+
+def _rolling_sum(values, window):
+    cumulative = np.cumsum(values, axis=0)
+    result = cumulative.copy()
+    result[window:] = cumulative[window:] - cumulative[:-window]
+    return result
+
+
+def rolling_volatility(returns, window=21, annualize=TRADING_DAYS, min_periods=None):
+    returns = np.asarray(returns, dtype=float)
+    min_periods = min_periods or window
+    present = ~np.isnan(returns)
+    filled = np.where(present, returns, 0.0)
+    count = _rolling_sum(present.astype(float), window)
+    total = _rolling_sum(filled, window)
+    squares = _rolling_sum(filled * filled, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (squares - total * total / count) / (count - 1)
+    variance = np.where(count >= max(min_periods, 2), np.maximum(variance, 0.0), np.nan)
+    return np.sqrt(variance * annualize)
+
+
+def max_drawdown(prices):
+    prices = np.asarray(prices, dtype=float)
+    running_peak = np.fmax.accumulate(prices, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = prices / running_peak - 1.0
+    return np.nanmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=0).clip(max=0.0)
+
+
+def correlation_matrix(returns, min_periods=20):
+    returns = np.asarray(returns, dtype=float)
+    present = ~np.isnan(returns)
+    if present.all():
+        centered = returns - returns.mean(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centered /= np.sqrt((centered * centered).sum(axis=0))
+        corr = centered.T @ centered
+        if len(returns) < min_periods:
+            corr[:] = np.nan
+        np.fill_diagonal(corr, 1.0)
+        return np.clip(corr, -1.0, 1.0)
+
+    present = present.astype(float)
+    filled = np.where(present > 0, returns, 0.0)
+
+    count = present.T @ present
+    sum_x = filled.T @ present
+    sum_xx = (filled * filled).T @ present
+    sum_xy = filled.T @ filled
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sum_xy - sum_x * sum_x.T / count
+        var_x = sum_xx - sum_x * sum_x / count
+        var_y = sum_xx.T - sum_x.T * sum_x.T / count
+        corr = covariance / np.sqrt(var_x * var_y)
+    corr[count < min_periods] = np.nan
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def event_study(returns, dates, event_date=EVENT_DATE, market=None, estimation=(-250, -11), window=(-5, 5)):
+    returns = np.asarray(returns, dtype=float)
+    dates = pd.DatetimeIndex(dates)
+    event_pos = int(dates.searchsorted(pd.Timestamp(event_date)))
+    if market is None:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            market = np.nanmean(returns, axis=1)
+
+    est_lo, est_hi = max(event_pos + estimation[0], 1), max(event_pos + estimation[1] + 1, 1)
+    r = returns[est_lo:est_hi]
+    m = np.broadcast_to(market[est_lo:est_hi, None], r.shape)
+    present = ~np.isnan(r) & ~np.isnan(m)
+    n = present.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_r = np.where(present, r, 0.0).sum(axis=0) / n
+        mean_m = np.where(present, m, 0.0).sum(axis=0) / n
+        dr = np.where(present, r - mean_r, 0.0)
+        dm = np.where(present, m - mean_m, 0.0)
+        beta = (dr * dm).sum(axis=0) / (dm * dm).sum(axis=0)
+    alpha = mean_r - beta * mean_m
+
+    win_lo, win_hi = max(event_pos + window[0], 0), min(event_pos + window[1] + 1, len(dates))
+    expected = alpha + beta * market[win_lo:win_hi, None]
+    abnormal = returns[win_lo:win_hi] - expected
+    cumulative = np.nancumsum(abnormal, axis=0)
+    offsets = np.arange(win_lo, win_hi) - event_pos
+    return {
+        'alpha': alpha,
+        'beta': beta,
+        'offsets': offsets,
+        'abnormal': abnormal,
+        'cumulative': cumulative,
+    }
+
+
+def data_version(prices):
+    digest = hashlib.sha256()
+    digest.update(np.asarray(prices.index.asi8).tobytes())
+    digest.update('\0'.join(map(str, prices.columns)).encode('utf-8'))
+    digest.update(np.ascontiguousarray(prices.to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def compute_analytics(prices, window=21, event_date=EVENT_DATE, ticker_countries=None):
+    values = prices.to_numpy(dtype=float)
+    returns = log_returns(values)
+    volatility = rolling_volatility(returns, window)
+    study = event_study(returns, prices.index, event_date)
+    columns = prices.columns
+    returns_df = pd.DataFrame(returns, index=prices.index, columns=columns)
+    grouped = country_returns(returns_df, ticker_countries) if ticker_countries is not None else returns_df
+    return {
+        'returns': returns_df,
+        'volatility': pd.DataFrame(volatility, index=prices.index, columns=columns),
+        'max_drawdown': pd.Series(max_drawdown(values), index=columns),
+        'correlation': pd.DataFrame(correlation_matrix(grouped.to_numpy()), index=grouped.columns, columns=grouped.columns),
+        'abnormal_returns': pd.DataFrame(study['abnormal'], index=study['offsets'], columns=columns),
+        'cumulative_abnormal_returns': pd.DataFrame(study['cumulative'], index=study['offsets'], columns=columns),
+        'beta': pd.Series(study['beta'], index=columns),
+    }
+
+
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def get_analytics(prices, version=None, window=21, event_date=EVENT_DATE, ticker_countries=None):
+    grouping = None if ticker_countries is None else tuple(sorted(dict(ticker_countries).items()))
+    key = (version or data_version(prices), window, event_date, grouping)
+    with _results_lock:
+        cached = _results.get(key)
+        if cached is not None:
+            _results.move_to_end(key)
+            return cached
+
+    result = compute_analytics(prices, window, event_date, ticker_countries)
+    with _results_lock:
+        _results[key] = result
+        while len(_results) > MAX_CACHED_RESULTS:
+            _results.popitem(last=False)
+    return result
+
+
+def country_returns(returns, ticker_countries):
+    countries = pd.Series(ticker_countries).reindex(returns.columns).to_numpy()
+    codes, names = pd.factorize(countries)
+    values = returns.to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    onehot = np.zeros((len(codes), len(names)))
+    valid = codes >= 0
+    onehot[np.flatnonzero(valid), codes[valid]] = 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = (np.where(present, values, 0.0) @ onehot) / (present @ onehot)
+    return pd.DataFrame(means, index=returns.index, columns=names)
+
+
+class WindowReturns:
+    def __init__(self, prices):
+        prices = prices.sort_index()
+        self.frame = prices
+        self.version = data_version(prices)
+        self.dates = prices.index.to_numpy(dtype='datetime64[ns]')
+        self.tickers = list(prices.columns)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_prices = np.log(prices.ffill().where(lambda frame: frame > 0).to_numpy(dtype=float))
+        first_valid = np.argmax(~np.isnan(log_prices), axis=0)
+        self.base = log_prices[first_valid, np.arange(log_prices.shape[1])]
+        self.cumulative = log_prices - self.base
+        self.studies = {}
+
+    def position(self, day):
+        return max(int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(day), 'ns'), side='right')) - 1, 0)
+
+    def trading_day(self, day):
+        return pd.Timestamp(self.dates[self.position(day)])
+
+    def prices(self, day):
+        return np.exp(self.cumulative[self.position(day)] + self.base)
+
+    def percent_change(self, start, end):
+        start_row, end_row = self.cumulative[self.position(start)], self.cumulative[self.position(end)]
+        return np.expm1(end_row - start_row) * 100
+
+    def apply(self, indices_df, start, end):
+        start_pos, end_pos = self.position(start), self.position(end)
+        if start_pos >= end_pos:
+            start_pos = max(min(start_pos, end_pos) - 1, 0)
+            end_pos = min(start_pos + 1, len(self.dates) - 1)
+        start_day, end_day = pd.Timestamp(self.dates[start_pos]), pd.Timestamp(self.dates[end_pos])
+        by_ticker = pd.DataFrame({
+            f"Price on {start_day:%Y-%m-%d}": self.prices(start_day),
+            f"Price on {end_day:%Y-%m-%d}": self.prices(end_day),
+            'Percent Change (%)': self.percent_change(start_day, end_day),
+        }, index=self.tickers).round(2)
+        base = indices_df.drop(columns=[c for c in indices_df.columns if c.startswith('Price on ') or c == 'Percent Change (%)'])
+        windowed = base.join(by_ticker, on='Ticker')
+
+        # Tickers without stored prices keep the CSV snapshot when it covers the same two days;
+        # otherwise they stay in the table with empty prices instead of disappearing.
+        missing = windowed['Percent Change (%)'].isna()
+        snapshot = [f"Price on {start_day:%Y-%m-%d}", f"Price on {end_day:%Y-%m-%d}", 'Percent Change (%)']
+        if missing.any() and all(column in indices_df for column in snapshot):
+            windowed.loc[missing, snapshot] = indices_df.loc[missing, snapshot]
+        return windowed.reset_index(drop=True)
+
+    def event_study(self, event_date=EVENT_DATE):
+        # Only the rows around the event are needed, and the result does not depend on the window.
+        study = self.studies.get(event_date)
+        if study is None:
+            event_pos = int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(event_date), 'ns')))
+            rows = slice(max(event_pos - EVENT_LOOKBACK_DAYS, 0), event_pos + 6)
+            study = self.studies[event_date] = event_study(
+                log_returns(self.frame.to_numpy(dtype=float)[rows]), self.frame.index[rows], event_date
+            )
+        return study
+
+    def metrics(self, start, end, window=21, event_date=EVENT_DATE):
+        # Per-ticker risk figures for the dashboard and the report prompt. Only the rows these read are
+        # computed, never the full engine with its ticker x ticker correlation matrix.
+        start_pos, end_pos = self.position(start), self.position(end)
+        values = self.frame.to_numpy(dtype=float)
+        volatility = rolling_volatility(log_returns(values[max(end_pos - window, 0):end_pos + 1]), window)[-1]
+        study = self.event_study(event_date)
+        event = pd.Timestamp(event_date)
+        return pd.DataFrame({
+            'Annualized Volatility (%)': volatility * 100,
+            'Window Max Drawdown (%)': max_drawdown(values[start_pos:end_pos + 1]) * 100,
+            f"Abnormal Return Around {event:%b} {event.day} (%)": np.expm1(study['cumulative'][-1]) * 100,
+            'Beta': study['beta'],
+        }, index=self.tickers).round(2)
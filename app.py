@@ -1,22 +1,49 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
 import warnings
 from datetime import datetime
-import google.generativeai as genai
 import io
-import base64
-from bs4 import BeautifulSoup
-import markdown
+import html
 import os
+import textwrap
+import threading
+import uuid
+import logging
+from report_cache import ReportCache
+import report_core
+from report_core import (
+    COUNTRY_ISO_CODES, DEFAULT_PERIOD, DEFAULT_WINDOW, apply_window, build_news_vectors, build_report_prompt,
+    build_section_prompts, fallback_note, load_indices, load_news, load_stories, load_window_returns,
+    make_report_backend, market_overview_html, report_cache_key, run_section_prompts, stream_report, with_iso3,
+)
+from news_index import NewsIndex
+from report_sections import REPORT_SECTIONS, assemble_report
+from report_backends import get_local_backend
+from report_jobs import ReportJobs
+from figures import get_market_map
+from report_export import export_report, report_key
+from sentiment import country_sentiment
+from perf import StageRecorder, recording, stage, timed
 
 warnings.filterwarnings('ignore')
+logging.basicConfig(format='%(asctime)s %(name)s %(levelname)s %(message)s')
+logging.getLogger('prompt_encoder').setLevel(logging.INFO)
+logging.getLogger('report_sections').setLevel(logging.INFO)
+logging.getLogger('report_backends').setLevel(logging.INFO)
+logging.getLogger('report_jobs').setLevel(logging.INFO)
+logging.getLogger('perf').setLevel(logging.INFO)
+
+NEWS_PAGE_SIZE = 20
+REPORT_POLL_SECONDS = 1
+REPORT_WAIT_SECONDS = 0.5
+PERF_ENV = 'ECHOES_PERF'
 
 def get_gemini_key():
     is_cloud = os.environ.get("STREAMLIT_SERVER_HEADLESS") == "1"
@@ -38,18 +65,22 @@ def get_gemini_key():
 st.set_page_config(page_title="Tariff Impact Analysis", page_icon="📊", layout="wide")
 
 st.title("Echoes of Liberation Day")
-st.markdown("""
+intro = st.empty()
+
+def render_intro(period):
+    intro.markdown(f"""
 This application analyzes the impact of tariffs on global markets by examining market indexes 
-between April 1st-7th, 2025. The analysis includes animated visualizations of market performance 
+over {period}. The analysis includes animated visualizations of market performance 
 and insights on affected countries and sectors.
 """)
 
-@st.cache_data
+render_intro(DEFAULT_PERIOD)
+
+@timed()
+@st.cache_resource
 def load_data():
     try:
-        df = pd.read_csv('global_indices.csv')
-        df['Percent Change (%)'] = pd.to_numeric(df['Percent Change (%)'])
-        return df
+        return load_indices()
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return pd.DataFrame()
@@ -93,577 +124,429 @@ def display_report(report_text):
         </style>
         """, unsafe_allow_html=True)
 
-def generate_gemini_report(news_df, indices_df, api_key):
-    genai.configure(api_key=api_key)
-    market_data = indices_df.to_dict('records')
-    news_headlines = news_df.head(5).to_dict('records')
-    
-    prompt = f"""
-    Analyze this financial market data and current trade news to generate a comprehensive, data-driven titled "Echoes of Liberation Day" report on tariff impacts:
-    
-    MARKET DATA (April 1st-7th, 2025):
-    {market_data}
-    
-    RECENT TRADE NEWS:
-    {news_headlines}
-    
-    Create a polished, professional report with the following EXACT sections:
-    
-    Executive Summary
-    • Provide a concise overview of key findings and tariff impact (150 words)
-    • Include 3 most significant market movements with precise percentages
-    • Highlight critical correlation between tariff news and market reaction
-    
-    Market Performance Analysis
-    • Analyze major indices performance with specific percentage changes
-    • Compare sector performance (identify top 3 performers and bottom 3 underperformers)
-    • Include volatility metrics and trading volume analysis where relevant
-    • Identify specific price movements correlated with tariff announcements
-    
-    Tariff Policy Evaluation
-    • Analyze specific tariff measures mentioned in the news
-    • Evaluate potential economic impact using concrete metrics (GDP effect, inflation implications)
-    • Compare with historical tariff impacts using relevant precedents
-    
-    Supply Chain Disruption Assessment
-    • Identify key industries facing supply chain challenges
-    • Quantify impact on input costs and pricing power (use percentages)
-    • Highlight companies/sectors with geographic exposure concerns
-    
-    Consumer Impact Analysis
-    • Project effects on consumer prices with specific percentage estimates
-    • Analyze potential shifts in consumer spending patterns
-    • Identify categories of goods most affected
-    
-    Investor Strategy Recommendations
-    • Provide tactical asset allocation suggestions with specific weighting changes
-    • Identify 3-5 defensive positioning strategies with clear rationales
-    • Suggest specific sectors for overweight/underweight positions
-    
-    International Trade Implications
-    • Analyze impact on major trading partners (focus on largest 3-4 relationships)
-    • Evaluate currency implications with specific exchange rate projections
-    • Assess potential retaliatory measures and their market impact
-    
-    Future Outlook & Timeline
-    • Project key milestones for tariff implementation
-    • Identify critical indicators to monitor over next 30/60/90 days
-    • Provide probability assessment of various scenarios with proper justification,
-           Strictly use realistic figures and numbers 
-    
-    Interesting Take
-    . Give your take on some "winners" are actually losing long-term market share, while certain "losers" are 
-        developing resilient trade alternatives that could position them better for the future.
-
-    FORMAT REQUIREMENTS:
-    • Use professional, concise language suitable for sophisticated investors
-    • Include specific data points, percentages, and numbers (e.g., -10.5%, not -10.5 percent)
-    • Bold key insights and important figures
-    • Create one brief bullet-point conclusion at the end of each section
-    • Ensure analytical depth while maintaining readability
-    """
+@st.cache_resource
+def get_report_cache():
+    return ReportCache()
+
+@st.cache_resource
+def get_report_jobs():
+    return ReportJobs()
+
+@st.cache_resource
+def get_report_backend(api_key):
+    return make_report_backend(api_key)
+
+@st.cache_resource
+def warm_local_backend():
+    backend = get_local_backend()
+    threading.Thread(target=backend.warm, name='warm-local-model', daemon=True).start()
+    return backend
+
+def submit_report_job(news_df, indices_df, api_key, period, parallel, retry=False, subscriber=None):
+    # Prompts, cache and backend are resolved here on the script thread; the job only runs them.
+    backend = get_report_backend(api_key)
+    cache = get_report_cache()
+    jobs = get_report_jobs()
     
-    try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        st.error(f"Failed to generate report: {str(e)}")
+    if parallel:
+        prompts = build_section_prompts(news_df, indices_df, period)
+        
+        def run(job):
+            def on_section(position, result):
+                job.update(position, result.text if result.ok else f"⚠️ **{result.title}** failed to generate: {result.error}")
+                note = fallback_note(result.backend)
+                if note:
+                    job.note(note)
+            
+            results = run_section_prompts(prompts, backend, cache, on_section)
+            if not any(result.ok for result in results):
+                raise results[0].error
+            return results
+        
+        key = report_cache_key('\n'.join(prompt.text for _, prompt in prompts))
+        return jobs.submit(f"sections:{key}", run, parts=len(prompts), retry=retry, subscriber=subscriber)
+    
+    prompt = build_report_prompt(news_df, indices_df, period)
+    
+    def run(job):
+        chunks = []
+        with stage('stream_report'):
+            for chunk in stream_report(prompt, backend, cache):
+                if not chunks:
+                    note = fallback_note(getattr(chunk, 'backend', None))
+                    if note:
+                        job.note(note)
+                chunks.append(chunk)
+                job.update(0, ''.join(chunks))
+        return ''.join(chunks)
+    
+    return jobs.submit(f"report:{report_cache_key(prompt.text)}", run, retry=retry, subscriber=subscriber)
+
+def request_report_retry():
+    st.session_state['report_retry'] = True
+
+def render_report_parts(job, pending):
+    parts, notes = job.snapshot()
+    st.markdown('<h2 class="report-title">Echoes of Liberation Day</h2>', 
+               unsafe_allow_html=True)
+    st.divider()
+    for note in notes:
+        st.info(note)
+    for position, part in enumerate(parts):
+        if part:
+            cursor = ' ▌' if pending and len(parts) == 1 else ''
+            st.markdown(part + cursor, unsafe_allow_html=True)
+        elif pending and len(parts) > 1:
+            st.caption(f"⏳ {REPORT_SECTIONS[position][0]}")
+
+@st.fragment(run_every=REPORT_POLL_SECONDS)
+def poll_report_job(key):
+    job = get_report_jobs().get(key)
+    if job is None or job.done:
+        st.rerun()
+    st.caption("🧠 Generating AI-powered analysis... the rest of the dashboard is ready to use.")
+    render_report_parts(job, pending=True)
+
+def render_report_job(job):
+    if not job.done:
+        poll_report_job(job.key)
+        return None
+    
+    if job.status == 'failed':
+        st.error(f"Failed to generate report: {str(job.error)}")
+        st.button("🔄 Retry report", on_click=request_report_retry)
         return None
     
-@st.cache_data
+    render_report_parts(job, pending=False)
+    if isinstance(job.result, str):
+        return job.result or None
+    failed = [result.title for result in job.result if not result.ok]
+    if failed:
+        st.button(f"🔄 Retry {len(failed)} failed section{'s' if len(failed) > 1 else ''}", on_click=request_report_retry)
+    return assemble_report(job.result) or None
+    
+@timed()
+@st.cache_resource
 def load_news_data():
     try:
-        news_df = pd.read_csv('global_finance_news.csv')
-        return news_df
+        return load_news()
     except Exception as e:
         st.error(f"Error loading news data: {str(e)}")
         return pd.DataFrame()
 
-def main():
+@st.cache_resource
+def load_news_stories():
+    # One canonical article per cluster of near-duplicate wire stories.
+    return load_stories(load_news_data())
+
+def change_color(change):
+    return '#ff4b4b' if change < 0 else '#21c354'
+
+def render_market_stats(df, df_sorted, period):
+    df_sorted = df_sorted.dropna(subset=['Percent Change (%)'])
+    st.markdown("<h4 style='text-align: center;'>Analysis Period</h4>", unsafe_allow_html=True)
+    st.markdown(f"<h6 style='text-align: center;'>{period}</h6>", unsafe_allow_html=True)
+    
+    st.markdown(f"<div style='text-align: center; border: 1px solid #f0f0f0; border-radius: 5px; padding: 5px 3px; margin-bottom: 5px;'>"
+              f"<div style='font-size: 0.7em; color: gray;'>Most Affected</div>"
+              f"<div style='font-weight: bold; font-size: 0.9em;'>{df_sorted.iloc[0]['Country']}</div>"
+              f"<div style='color: {change_color(df_sorted.iloc[0]['Percent Change (%)'])}; font-weight: bold; font-size: 0.9em;'>{df_sorted.iloc[0]['Percent Change (%)']:.2f}%</div>"
+              f"</div>", unsafe_allow_html=True)
+
+    st.markdown(f"<div style='text-align: center; border: 1px solid #f0f0f0; border-radius: 5px; padding: 5px 3px; margin-bottom: 5px;'>"
+              f"<div style='font-size: 0.7em; color: gray;'>Average Change</div>"
+              f"<div style='font-weight: bold; font-size: 0.9em;'>&nbsp;</div>"
+              f"<div style='color: {change_color(df['Percent Change (%)'].mean())}; font-weight: bold; font-size: 0.9em;'>{df['Percent Change (%)'].mean():.2f}%</div>"
+              f"</div>", unsafe_allow_html=True)
+    
+    st.markdown(f"<div style='text-align: center; border: 1px solid #f0f0f0; border-radius: 5px; padding: 5px 3px;'>"
+              f"<div style='font-size: 0.7em; color: gray;'>Least Affected</div>"
+              f"<div style='font-weight: bold; font-size: 0.9em;'>{df_sorted.iloc[-1]['Country']}</div>"
+              f"<div style='color: {change_color(df_sorted.iloc[-1]['Percent Change (%)'])}; font-weight: bold; font-size: 0.9em;'>{df_sorted.iloc[-1]['Percent Change (%)']:.2f}%</div>"
+              f"</div>", unsafe_allow_html=True)
+
+def render_market_map(df, min_change, max_change):
+    st.markdown("<h4 style='text-align: center;'>Global Market Impact</h4>", unsafe_allow_html=True)
+    
+    market_map = get_market_map(df, min_change, max_change)
+    st.plotly_chart(market_map.figure, use_container_width=True)
+
+def render_market_overview(df_sorted, min_change, max_change):
+    st.markdown("<h4 style='text-align: center;'>Market Impact Overview</h4>", unsafe_allow_html=True)
+    
+    height = min(60 + 34 * len(df_sorted), 720)
+    components.html(market_overview_html(df_sorted, min_change, max_change), height=height, scrolling=True)
+
+def request_report_export(key):
+    st.session_state['export_requested'] = key
+
+@st.fragment
+def render_report_export(report, indices_df, df, min_change, max_change, period):
+    market_map = get_market_map(df, min_change, max_change)
+    key = report_key(report, market_map.key)
+    
+    if st.session_state.get('export_requested') != key:
+        st.button("📄 Prepare HTML report", on_click=request_report_export, args=(key,))
+        return
+    
+    st.download_button(
+        "📥 Download Full Report",
+        data=export_report(report, indices_df, market_map, period),
+        file_name=f"tariff_report_{datetime.now().strftime('%Y%m%d')}.html",
+        mime="text/html",
+    )
+
+@st.cache_resource
+def get_news_vectors():
+    return build_news_vectors(load_news_stories())
+
+def select_report_news(indices_df):
+    return report_core.select_report_news(get_news_vectors(), indices_df)
+
+def render_ai_report(df, min_change, max_change, period):
+    st.markdown("<h4 style='text-align: center;'>AI-Powered Tariff Impact Analysis</h4>", unsafe_allow_html=True)
+    
+    indices_df = df.drop(columns=['ISO3'])
+    api_key = get_gemini_key()
+    if not api_key:
+        st.warning("🚫 Gemini API limit reached!! Reports come from the local fallback model until it is available again.")     
+    
+    parallel = st.toggle("⚡ Generate sections in parallel", value=True, help="Request each report section concurrently and cache sections independently")
+    
+    report_news = select_report_news(indices_df)
+    retry = st.session_state.pop('report_retry', False)
+    subscriber = st.session_state.setdefault('report_subscriber', uuid.uuid4().hex)
+    job = submit_report_job(report_news, indices_df, api_key, period, parallel, retry=retry, subscriber=subscriber)
+    st.session_state['report_job'] = job.key
+    job.wait(REPORT_WAIT_SECONDS)
+    report = render_report_job(job)
+    
+    if report:
+        cache_stats = get_report_cache().stats()
+        job_stats = get_report_jobs().stats()
+        st.caption(f"Report cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses · "
+                   f"jobs: {job_stats['submitted']} run / {job_stats['coalesced']} shared")
+        
+        render_report_export(report, indices_df, df, min_change, max_change, period)
+
+NEWS_STYLE = """
+<style>
+.news-container {
+    background-color: rgb(14, 17, 23);
+    border: 1px solid #f0f0f0;
+    border-radius: 5px;
+    padding: 15px;
+    margin-bottom: 30px;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+}
+.news-header {
+    display: flex;
+    justify-content: space-between;
+    margin-bottom: 10px;
+}
+.news-source {
+    font-weight: bold;
+    color: rgb(250, 250, 250);
+}
+.news-date {
+    color: #6b7280;
+    font-size: 0.9em;
+}
+.news-title {
+    font-size: 1.1em;
+    font-weight: bold;
+    margin-bottom: 10px;
+}
+.news-link {
+    display: inline-block;
+    margin-top: 10px;
+    color: #2563eb;
+    text-decoration: none;
+}
+.news-link:hover {
+    text-decoration: underline;
+}
+.country-tag {
+    display: inline-block;
+    background-color: #e5e7eb;
+    color: #4b5563;
+    padding: 3px 8px;
+    border-radius: 12px;
+    font-size: 0.8em;
+    margin-right: 5px;
+}
+</style>
+"""
+
+def news_card_html(country, date, source, title, url, cluster_size=1):
+    iso_code = COUNTRY_ISO_CODES.get(country, 'xx').lower()
+    similar = f' <span class="news-date">· +{cluster_size - 1} similar</span>' if cluster_size > 1 else ''
+    return textwrap.dedent(f"""
+    <div class="news-container">
+        <div class="news-header">
+            <div>
+                <span class="country-tag">
+                    <img src="https://flagcdn.com/16x12/{iso_code}.png" width="16" style="margin-right: 5px; vertical-align: middle;" loading="lazy">
+                    {html.escape(str(country))}
+                </span>
+            </div>
+            <div class="news-date">{html.escape(str(date))}</div>
+        </div>
+        <div class="news-title">{html.escape(str(title))}</div>
+        <div class="news-source">Source: {html.escape(str(source))}{similar}</div>
+        <a href="{html.escape(str(url), quote=True)}" target="_blank" class="news-link">Read full article →</a>
+    </div>
+    """)
+
+def set_news_page(page):
+    st.session_state['news_page'] = page
+
+@st.cache_resource
+def get_news_index():
+    return NewsIndex(load_news_stories())
+
+@st.fragment
+def render_news():
+    st.markdown("<h2 style='text-align: center;'>Global Finance News</h2>", unsafe_allow_html=True)
+    st.markdown("<p style='text-align: center;'>Latest news related to global markets and tariff impacts</p>", unsafe_allow_html=True)
+    
+    news_index = get_news_index()
+    
+    sentiment_by_country = country_sentiment(news_index.frame)
+    if not sentiment_by_country.empty:
+        with st.expander("News sentiment by country"):
+            st.bar_chart(sentiment_by_country['mean_score'], height=260)
+            st.caption("Mean of (positive - negative) probability per article, scored offline with `python sentiment.py`.")
+    
+    col_country, col_search, col_dates = st.columns([1, 2, 1])
+    
+    with col_country:
+        selected_country = st.selectbox("Filter news by country", ["All Countries"] + news_index.countries())
+    
+    with col_search:
+        query = st.text_input("Search headlines", placeholder="e.g. tariff retaliation")
+    
+    start, end = None, None
+    if news_index.min_time is not None:
+        with col_dates:
+            date_range = st.date_input(
+                "Published between",
+                value=(news_index.min_time.date(), news_index.max_time.date()),
+                min_value=news_index.min_time.date(),
+                max_value=news_index.max_time.date(),
+            )
+        if len(date_range) == 2:
+            start = pd.Timestamp(date_range[0], tz='UTC')
+            end = pd.Timestamp(date_range[1], tz='UTC') + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+    
+    country = None if selected_country == "All Countries" else selected_country
+    positions = news_index.search(query, country=country, start=start, end=end)
+    
+    filter_key = (selected_country, query, start, end)
+    if st.session_state.get('news_filter') != filter_key:
+        st.session_state['news_filter'] = filter_key
+        st.session_state['news_page'] = 0
+    
+    num_pages = max(1, -(-len(positions) // NEWS_PAGE_SIZE))
+    page = min(st.session_state.get('news_page', 0), num_pages - 1)
+    page_news = news_index.rows(positions[page * NEWS_PAGE_SIZE:(page + 1) * NEWS_PAGE_SIZE])
+    
+    cards = [
+        news_card_html(country, date, source, title, url, cluster_size)
+        for country, date, source, title, url, cluster_size in zip(
+            page_news['country'], page_news['date'], page_news['source'], page_news['title'], page_news['url'], page_news['cluster_size']
+        )
+    ]
+    st.markdown(NEWS_STYLE + ''.join(cards), unsafe_allow_html=True)
+    
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("← Newer", disabled=page == 0, on_click=set_news_page, args=(page - 1,), use_container_width=True)
+    with col_info:
+        st.markdown(f"<p style='text-align: center;'>Page {page + 1} of {num_pages} · {len(positions)} stories</p>", unsafe_allow_html=True)
+    with col_next:
+        st.button("Older →", disabled=page >= num_pages - 1, on_click=set_news_page, args=(page + 1,), use_container_width=True)
+
+@st.cache_resource
+def get_window_returns():
+    try:
+        return load_window_returns()
+    except Exception as e:
+        st.warning(f"Daily price history unavailable: {str(e)}")
+        return None
+
+def select_window(df):
+    window_returns = get_window_returns()
+    if window_returns is None:
+        return df, DEFAULT_PERIOD
+    
+    first_day = pd.Timestamp(window_returns.dates[0]).date()
+    last_day = pd.Timestamp(window_returns.dates[-1]).date()
+    default = tuple(min(max(day, first_day), last_day) for day in DEFAULT_WINDOW)
+    start, end = st.slider(
+        "Analysis window",
+        min_value=first_day,
+        max_value=last_day,
+        value=default,
+        format="YYYY-MM-DD",
+    )
+    return apply_window(df, window_returns, start, end)
+
+def perf_enabled():
+    return os.environ.get(PERF_ENV) == '1' or st.query_params.get('perf') == '1'
+
+def render_perf_panel(recorder, job=None):
+    with st.expander(f"⏱️ Page timings: {recorder.total() * 1000:.0f} ms (run {recorder.run})"):
+        st.dataframe(pd.DataFrame(recorder.rows()), hide_index=True, use_container_width=True)
+        if job is not None:
+            st.caption(f"Report job {job.recorder.run} ({job.status}, shared by {len(job.subscribers)} session(s)):")
+            st.dataframe(pd.DataFrame(job.recorder.rows()), hide_index=True, use_container_width=True)
+        st.caption("Stages are also logged as JSON lines on the `perf` logger.")
+
+def render_page():
+    warm_local_backend()
     df = load_data()
-    news_df = load_news_data()
     
     if df.empty:
         st.error("No data available for analysis.")
         return
+    
+    with stage('select_window'):
+        df, period = select_window(df)
+    render_intro(period)
+    
+    with stage('sort'):
+        df_sorted = df.sort_values(by='Percent Change (%)')
+        
+        min_change = df_sorted['Percent Change (%)'].min()
+        max_change = df_sorted['Percent Change (%)'].max()
         
-    df_sorted = df.sort_values(by='Percent Change (%)')
-    
-    country_iso_codes = {
-    'United States': 'us', 'Germany': 'de', 'United Kingdom': 'gb', 'France': 'fr',
-    'Japan': 'jp', 'Canada': 'ca', 'Australia': 'au', 'Brazil': 'br',
-    'India': 'in', 'South Korea': 'kr', 'China': 'cn', 'Hong Kong': 'hk',
-    'Taiwan': 'tw', 'Netherlands': 'nl', 'Switzerland': 'ch', 'Italy': 'it',
-    'Spain': 'es', 'Sweden': 'se', 'Belgium': 'be', 'Norway': 'no',
-    'Denmark': 'dk', 'Finland': 'fi', 'Portugal': 'pt', 'Greece': 'gr',
-    'Poland': 'pl', 'Turkey': 'tr',
-    'South Africa': 'za', 'Nigeria': 'ng', 'Egypt': 'eg', 'Kenya': 'ke',
-    'Russia': 'ru', 'Myanmar': 'mm'
-    }
-
-    country_iso3_codes = {
-        'United States': 'USA', 'Germany': 'DEU', 'United Kingdom': 'GBR', 'France': 'FRA',
-        'Japan': 'JPN', 'Canada': 'CAN', 'Australia': 'AUS', 'Brazil': 'BRA',
-        'India': 'IND', 'South Korea': 'KOR', 'China': 'CHN', 'Hong Kong': 'HKG',
-        'Taiwan': 'TWN', 'Netherlands': 'NLD', 'Switzerland': 'CHE', 'Italy': 'ITA',
-        'Spain': 'ESP', 'Sweden': 'SWE', 'Belgium': 'BEL', 'Norway': 'NOR',
-        'Denmark': 'DNK', 'Finland': 'FIN', 'Portugal': 'PRT', 'Greece': 'GRC',
-        'Poland': 'POL', 'Turkey': 'TUR',
-        'South Africa': 'ZAF', 'Nigeria': 'NGA', 'Egypt': 'EGY', 'Kenya': 'KEN',
-        'Russia': 'RUS', 'Myanmar': 'MMR'
-    }
-
-    min_change = df_sorted['Percent Change (%)'].min()
-    max_change = df_sorted['Percent Change (%)'].max()
-    
-    df['ISO3'] = df['Country'].map(country_iso3_codes)
+        df = with_iso3(df)
     
     tab1, tab2 = st.tabs(["Market Overview", "News"])
     
     with tab1:
         col_stats, col_map = st.columns([1, 3])
         
-        with col_stats:
-            st.markdown("<h4 style='text-align: center;'>Analysis Period</h4>", unsafe_allow_html=True)
-            st.markdown("<h6 style='text-align: center;'>1st - 7th April, 2025</h6>", unsafe_allow_html=True)
-            
-            st.markdown(f"<div style='text-align: center; border: 1px solid #f0f0f0; border-radius: 5px; padding: 5px 3px; margin-bottom: 5px;'>"
-                      f"<div style='font-size: 0.7em; color: gray;'>Most Affected</div>"
-                      f"<div style='font-weight: bold; font-size: 0.9em;'>{df_sorted.iloc[0]['Country']}</div>"
-                      f"<div style='color: #ff4b4b; font-weight: bold; font-size: 0.9em;'>{df_sorted.iloc[0]['Percent Change (%)']:.2f}%</div>"
-                      f"</div>", unsafe_allow_html=True)
-        
-            st.markdown(f"<div style='text-align: center; border: 1px solid #f0f0f0; border-radius: 5px; padding: 5px 3px; margin-bottom: 5px;'>"
-                      f"<div style='font-size: 0.7em; color: gray;'>Average Change</div>"
-                      f"<div style='font-weight: bold; font-size: 0.9em;'>&nbsp;</div>"
-                      f"<div style='color: #ff4b4b; font-weight: bold; font-size: 0.9em;'>{df['Percent Change (%)'].mean():.2f}%</div>"
-                      f"</div>", unsafe_allow_html=True)
-            
-            st.markdown(f"<div style='text-align: center; border: 1px solid #f0f0f0; border-radius: 5px; padding: 5px 3px;'>"
-                      f"<div style='font-size: 0.7em; color: gray;'>Least Affected</div>"
-                      f"<div style='font-weight: bold; font-size: 0.9em;'>{df_sorted.iloc[-1]['Country']}</div>"
-                      f"<div style='color: #ff4b4b; font-weight: bold; font-size: 0.9em;'>{df_sorted.iloc[-1]['Percent Change (%)']:.2f}%</div>"
-                      f"</div>", unsafe_allow_html=True)
-    
-        with col_map:
-            st.markdown("<h4 style='text-align: center;'>Global Market Impact</h4>", unsafe_allow_html=True)
-            
-            fig = px.choropleth(
-                df,
-                locations='ISO3',
-                color='Percent Change (%)',
-                hover_name='Country',
-                color_continuous_scale='Reds_r',
-                range_color=[min_change, 0],
-                labels={'Percent Change (%)': 'Market Change (%)'},
-                title='',
-                height=300,
-            )
-            
-            for i, row in df.iterrows():
-                fig.add_annotation(
-                    x=row['ISO3'],
-                    y=row['Country'],
-                    text=f"{row['Percent Change (%)']:.1f}%",
-                    showarrow=False,
-                    font=dict(size=8, color='black'),
-                    xref="x",
-                    yref="y"
-                )
-            
-            fig.update_layout(
-                margin=dict(l=0, r=0, t=0, b=0),
-                geo=dict(
-                    showframe=False,
-                    showcoastlines=True,
-                    projection_type='equirectangular'
-                )
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+        with col_stats, stage('market_stats'):
+            render_market_stats(df, df_sorted, period)
     
-    with tab1:
-        st.markdown("<h4 style='text-align: center;'>Market Impact Overview</h4>", unsafe_allow_html=True)
+        with col_map, stage('market_map'):
+            render_market_map(df, min_change, max_change)
         
-        with st.container():
-            num_cols = 1
-            rows = [st.columns(num_cols) for _ in range((len(df_sorted) + num_cols - 1) // num_cols)]
-            
-            cols = [col for row in rows for col in row]
-            
-            for i, (_, row) in enumerate(df_sorted.iterrows()):
-                if i < len(cols):
-                    with cols[i]:
-                        country = row['Country']
-                        index_name = row['Index']
-                        percent_change = row['Percent Change (%)']
-                        iso_code = country_iso_codes.get(country, 'xx').lower()
-                        
-                        normalized_value = (percent_change - min_change) / (max_change - min_change)
-                        color = f"rgba(255, {int(normalized_value * 255)}, {int(normalized_value * 255)}, 0.8)"
-                        
-                        st.markdown(
-                            f"""
-                            <div style='display: flex; width: 100%; margin-bottom: 10px;'>
-                                <div style='width: 20%;'>
-                                    <div style='display: flex; align-items: center;'>
-                                        <img src='https://flagcdn.com/16x12/{iso_code}.png' width='16' style='margin-right: 5px;'>
-                                        <span style='font-size: 0.8em; font-weight: bold;'>{country}</span>
-                                    </div>
-                                    <div style='font-size: 0.7em; color: gray;'>{index_name}</div>
-                                </div>
-                                <div style='width: 80%; padding-left: 10px;'>
-                                    <div style='background-color: {color}; width: 100%; height: 12px; border-radius: 2px; display: flex; align-items: center; justify-content: center;'>
-                                        <span style='color: white; font-weight: bold; font-size: 0.7em;'>{percent_change:.1f}%</span>
-                                    </div>
-                                </div>
-                            </div>
-                            """,
-                            unsafe_allow_html=True
-                        )
+        with stage('market_overview'):
+            render_market_overview(df_sorted, min_change, max_change)
+        with stage('ai_report'):
+            render_ai_report(df, min_change, max_change, period)
     
-    with tab1:
-        st.markdown("<h4 style='text-align: center;'>AI-Powered Tariff Impact Analysis</h4>", unsafe_allow_html=True)
-        
-        indices_df = pd.read_csv("global_indices.csv") 
-        api_key = get_gemini_key()
-        if not api_key:
-            st.error("🚫 Gemini API limit reached!! Please try again after some time.")     
-        
-        with st.spinner('🧠 Generating AI-powered analysis...'):          
-            report = generate_gemini_report(news_df, indices_df, api_key)
-            
-            if report:
-                st.markdown('<h2 class="report-title">Echoes of Liberation Day</h2>', 
-                           unsafe_allow_html=True)
-                st.divider()
-                
-                st.markdown(report, unsafe_allow_html=True)
-                
-                report_map_fig = px.choropleth(
-                    df,
-                    locations='ISO3',
-                    color='Percent Change (%)',
-                    hover_name='Country',
-                    color_continuous_scale='Reds_r',
-                    range_color=[min_change, 0],
-                    labels={'Percent Change (%)': 'Market Change (%)'},
-                    height=400
-                )
-                
-                report_map_fig.update_layout(
-                    margin=dict(l=0, r=0, t=0, b=0),
-                    geo=dict(
-                        showframe=False,
-                        showcoastlines=True,
-                        projection_type='equirectangular'
-                    ),
-                    coloraxis_colorbar=dict(
-                        title="Market Change (%)",
-                        thicknessmode="pixels", thickness=20,
-                        lenmode="pixels", len=300,
-                        yanchor="middle"
-                    )
-                )
-                
-                map_html = report_map_fig.to_html(include_plotlyjs='cdn', full_html=False)
-                
-                report_html = markdown.markdown(report)
-                soup = BeautifulSoup(report_html, 'html.parser')
-                
-                for h2 in soup.find_all('h2'):
-                    h2['class'] = h2.get('class', []) + ['section-header']
-                
-                for strong in soup.find_all('strong'):
-                    text = strong.get_text()
-                    if any(neg in text.lower() for neg in ['decline', 'drop', 'fall', 'decrease', '-', 'negative']):
-                        strong['class'] = strong.get('class', []) + ['negative']
-                    elif any(pos in text.lower() for pos in ['increase', 'rise', 'grow', 'positive', '+']):
-                        strong['class'] = strong.get('class', []) + ['positive']
-                
-                table_html = "<h2 class='section-header'>Global Market Indices Data</h2>"
-                table_html += "<p>The table below provides detailed market data for global indices during the analysis period (April 1-8, 2025).</p>"
-                table_html += "<table class='data-table'>"
-                table_html += "<thead><tr>"
-                table_html += "<th>Country</th><th>Index</th><th>Ticker</th><th>Price on Apr 1</th><th>Price on Apr 8</th><th>Change (%)</th>"
-                table_html += "</tr></thead><tbody>"
-                
-                indices_df_sorted = indices_df.sort_values(by='Percent Change (%)')
-                
-                for _, row in indices_df_sorted.iterrows():
-                    percent_change = row['Percent Change (%)']
-                    change_class = 'negative' if percent_change < 0 else 'positive'
-                    table_html += f"<tr>"
-                    table_html += f"<td>{row['Country']}</td>"
-                    table_html += f"<td>{row['Index']}</td>"
-                    table_html += f"<td>{row['Ticker']}</td>"
-                    table_html += f"<td>{row['Price on 2025-04-01']}</td>"
-                    table_html += f"<td>{row['Price on 2025-04-08']}</td>"
-                    table_html += f"<td class='{change_class}'>{percent_change:.2f}%</td>"
-                    table_html += f"</tr>"
-                
-                table_html += "</tbody></table>"
-                
-                report_html = f'<div class="report-content">{str(soup)}</div>'
-                report_html += f'<div class="data-table-container">{table_html}</div>'
-                
-                html_content = f"""
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <title>Echoes of Liberation Day</title>
-                    <style>
-                        body {{ 
-                            font-family: 'Segoe UI', Arial, sans-serif; 
-                            margin: 0; 
-                            padding: 0; 
-                            color: #333; 
-                            line-height: 1.6;
-                            background-color: #f9f9f9;
-                        }}
-                        .container {{ 
-                            max-width: 1200px; 
-                            margin: 0 auto; 
-                            padding: 40px 20px; 
-                            background-color: white;
-                            box-shadow: 0 0 20px rgba(0,0,0,0.05);
-                        }}
-                        header {{ 
-                            text-align: center; 
-                            margin-bottom: 40px; 
-                            padding-bottom: 20px;
-                            border-bottom: 1px solid #eaeaea;
-                        }}
-                        h1 {{ 
-                            color: #1e3a8a; 
-                            font-size: 32px; 
-                            margin-bottom: 10px;
-                        }}
-                        h2 {{ 
-                            color: #1e3a8a; 
-                            font-size: 24px;
-                            border-bottom: 2px solid #1e3a8a; 
-                            padding-bottom: 8px; 
-                            margin-top: 40px;
-                        }}
-                        h3 {{ 
-                            color: #2563eb; 
-                            font-size: 20px; 
-                            margin-top: 30px;
-                        }}
-                        p {{ 
-                            margin-bottom: 16px; 
-                            text-align: justify;
-                        }}
-                        ul, ol {{ 
-                            margin-bottom: 20px; 
-                            padding-left: 25px;
-                        }}
-                        li {{ 
-                            margin-bottom: 8px; 
-                        }}
-                        .highlight {{ 
-                            background-color: #f0f9ff; 
-                            padding: 20px; 
-                            border-radius: 10px; 
-                            margin: 25px 0; 
-                            border-left: 4px solid #3b82f6;
-                        }}
-                        .negative {{ 
-                            color: #ef4444; 
-                            font-weight: bold; 
-                        }}
-                        .positive {{ 
-                            color: #10b981; 
-                            font-weight: bold; 
-                        }}
-                        .map-container {{ 
-                            margin: 40px 0; 
-                            padding: 20px; 
-                            background-color: white; 
-                            border-radius: 10px; 
-                            box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-                        }}
-                        .map-title {{ 
-                            text-align: center; 
-                            margin-bottom: 20px; 
-                            color: #1e3a8a;
-                            font-size: 24px;
-                        }}
-                        table {{ 
-                            width: 100%; 
-                            border-collapse: collapse; 
-                            margin: 25px 0; 
-                            font-size: 14px; 
-                        }}
-                        th {{ 
-                            background-color: #1e3a8a; 
-                            color: white; 
-                            font-weight: bold; 
-                            padding: 12px; 
-                            text-align: left; 
-                        }}
-                        td {{ 
-                            padding: 10px 12px; 
-                            border-bottom: 1px solid #eaeaea; 
-                        }}
-                        tr:nth-child(even) {{
-                            background-color: #f8fafc; 
-                        }}
-                        .data-table-container {{
-                            margin: 40px 0;
-                            overflow-x: auto;
-                            box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-                            border-radius: 10px;
-                            background-color: white;
-                            padding: 20px;
-                        }}
-                        .data-table {{
-                            width: 100%;
-                            min-width: 800px;
-                        }}
-                        .data-table th {{
-                            position: sticky;
-                            top: 0;
-                            z-index: 10;
-                        }}
-                        .footer {{
-                            text-align: center; 
-                            margin-top: 60px; 
-                            padding-top: 20px; 
-                            border-top: 1px solid #eaeaea; 
-                            color: #6b7280; 
-                            font-size: 14px; 
-                        }}
-                        strong, b {{ 
-                            font-weight: 600; 
-                            color: #1f2937; 
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <header>
-                            <h1>Echoes of Liberation Day</h1>
-                            <h4>Analysis Period: April 1st - 7th, 2025</h>
-                        </header>
-                        
-                        <div class="content">
-                            {report_html}
-                            
-                            <div class="map-container">
-                                <h2 class="map-title">Global Market Impact Map</h2>
-                                <p>The map below illustrates the percentage change in major market indices across different countries during the analysis period.</p>
-                                {map_html}
-                            </div>
-                        </div>
-                        
-                        <div class="footer">
-                            <p>Generated on {datetime.now().strftime("%B %d, %Y")} | Echoes of Liberation Day Analysis</p>
-                        </div>
-                    </div>
-                </body>
-                </html>
-                """           
-                
-                b64 = base64.b64encode(html_content.encode()).decode()
-                href = f'data:text/html;base64,{b64}'
-                
-                st.markdown(
-                    f'<a href="{href}" download="tariff_report_{datetime.now().strftime("%Y%m%d")}.html">📥 Download Full Report</a>',
-                    unsafe_allow_html=True
-                )
-    
-    with tab2:
-        st.markdown("<h2 style='text-align: center;'>Global Finance News</h2>", unsafe_allow_html=True)
-        st.markdown("<p style='text-align: center;'>Latest news related to global markets and tariff impacts</p>", unsafe_allow_html=True)
-        
-        countries = sorted(news_df['country'].unique().tolist())
-        selected_country = st.selectbox("Filter news by country", ["All Countries"] + countries)
-        
-        if selected_country != "All Countries":
-            filtered_news = news_df[news_df['country'] == selected_country]
-        else:
-            filtered_news = news_df
-        
-        filtered_news = filtered_news.sort_values(by='date', ascending=False)
-        
-        st.markdown("""
-        <style>
-        .news-container {
-            background-color: rgb(14, 17, 23);
-            border: 1px solid #f0f0f0;
-            border-radius: 5px;
-            padding: 15px;
-            margin-bottom: 30px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }
-        .news-header {
-            display: flex;
-            justify-content: space-between;
-            margin-bottom: 10px;
-        }
-        .news-source {
-            font-weight: bold;
-            color: rgb(250, 250, 250);
-        }
-        .news-date {
-            color: #6b7280;
-            font-size: 0.9em;
-        }
-        .news-title {
-            font-size: 1.1em;
-            font-weight: bold;
-            margin-bottom: 10px;
-        }
-        .news-link {
-            display: inline-block;
-            margin-top: 10px;
-            color: #2563eb;
-            text-decoration: none;
-        }
-        .news-link:hover {
-            text-decoration: underline;
-        }
-        .country-tag {
-            display: inline-block;
-            background-color: #e5e7eb;
-            color: #4b5563;
-            padding: 3px 8px;
-            border-radius: 12px;
-            font-size: 0.8em;
-            margin-right: 5px;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
-        for _, news in filtered_news.iterrows():
-            country = news['country']
-            date = news['date']
-            source = news['source']
-            title = news['title']
-            url = news['url']
-            
-            iso_code = country_iso_codes.get(country, 'xx').lower()
-            
-            st.markdown(f"""
-            <div class="news-container">
-                <div class="news-header">
-                    <div>
-                        <span class="country-tag">
-                            <img src="https://flagcdn.com/16x12/{iso_code}.png" width="16" style="margin-right: 5px; vertical-align: middle;">
-                            {country}
-                        </span>
-                    </div>
-                    <div class="news-date">{date}</div>
-                </div>
-                <div class="news-title">{title}</div>
-                <div class="news-source">Source: {source}</div>
-                <a href="{url}" target="_blank" class="news-link">Read full article →</a>
-            </div>
-            """, unsafe_allow_html=True)
-                  
+    with tab2, stage('news'):
+        render_news()
+
+def main():
+    with recording(StageRecorder()) as recorder:
+        render_page()
+    if perf_enabled():
+        render_perf_panel(recorder, get_report_jobs().get(st.session_state.get('report_job')))
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
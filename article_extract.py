@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
+
+CONTENT_NOT_AVAILABLE = 'Content not available'
+MAX_HTML_BYTES = 2 * 1024 * 1024
+FEED_CHUNK_BYTES = 64 * 1024
+SKIPPED_TAGS = ('script', 'style', 'noscript')
+
+
+def element_text(element):
+    etree.strip_elements(element, *SKIPPED_TAGS, etree.Comment, with_tail=False)
+    lines = (text.strip() for text in element.itertext())
+    return '\n'.join(line for line in lines if line)
+
+
+def _content_block(root):
+    blocks = root.xpath(
+        "//*[self::div or self::section][contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'content')]"
+    )
+    best, best_length = None, -1
+    for block in blocks:
+        length = sum(len(text.strip()) for text in block.itertext())
+        if length > best_length:
+            best, best_length = block, length
+    if best is not None:
+        return best
+    bodies = root.xpath('//body')
+    return bodies[0] if bodies else root
+
+
+def extract_text(page, max_bytes=MAX_HTML_BYTES):
+    # Feed the page to libxml2 incrementally and stop as soon as the first outermost <article>
+    # closes (nested ones are usually related-story teasers); only pages without one are parsed
+    # to the end and searched for a "content" block.
+    if not page:
+        return CONTENT_NOT_AVAILABLE
+    if isinstance(page, str):
+        page = page.encode('utf-8')
+    page = page[:max_bytes]
+    parser = etree.HTMLPullParser(events=('start', 'end'), tag='article', remove_comments=True, no_network=True)
+    depth = 0
+    try:
+        for offset in range(0, len(page), FEED_CHUNK_BYTES):
+            parser.feed(page[offset:offset + FEED_CHUNK_BYTES])
+            for event, element in parser.read_events():
+                depth += 1 if event == 'start' else -1
+                if event == 'end' and depth == 0:
+                    text = element_text(element)
+                    if text:
+                        return text
+        root = parser.close()
+    except etree.LxmlError:
+        return CONTENT_NOT_AVAILABLE
+    if root is None:
+        return CONTENT_NOT_AVAILABLE
+    return element_text(_content_block(root)) or CONTENT_NOT_AVAILABLE
+
+
+def parser_pool(workers=None):
+    # Parsing is CPU bound, so it runs in processes; ``workers=0`` keeps it on the calling thread.
+    # By default one core is left to the fetch threads, so single-core machines parse inline.
+    workers = (os.cpu_count() or 1) - 1 if workers is None else workers
+    return ProcessPoolExecutor(max_workers=workers) if workers else None
+
+
+def extract_many(pages, pool=None, chunksize=16):
+    if pool is None:
+        return [extract_text(page) for page in pages]
+    return list(pool.map(extract_text, pages, chunksize=chunksize))
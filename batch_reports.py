@@ -0,0 +1,198 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from figures import get_market_map
+from perf import StageRecorder, recording, stage
+from report_cache import CACHE_DIR, ReportCache
+from report_core import (
+    DEFAULT_PERIOD, DEFAULT_WINDOW, apply_window, build_news_vectors, generate_report_sections, load_indices, load_news,
+    load_stories, load_window_returns, make_report_backend, select_report_news, with_iso3,
+)
+from report_export import render_report_html
+from report_sections import assemble_report
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = 'reports'
+FIGURE_CACHE_DIR = os.path.join(CACHE_DIR, 'figures')
+
+# Loaded once per worker process by load_worker and reused by every task it runs.
+_worker = {}
+
+
+def gemini_key():
+    try:
+        from config import GEMINI_API_KEY
+        if GEMINI_API_KEY:
+            return GEMINI_API_KEY
+    except ImportError:
+        pass
+    return os.environ.get("GEMINI_API_KEY")
+
+
+def parse_countries(value):
+    if value.strip().lower() == 'all':
+        return None
+    return [country.strip() for country in value.split(',') if country.strip()]
+
+
+def parse_window(value):
+    start, _, end = value.partition(':')
+    return date.fromisoformat(start), date.fromisoformat(end)
+
+
+def task_name(countries, window):
+    if countries is None:
+        label = 'all'
+    elif len(countries) <= 3:
+        label = '+'.join(country.lower().replace(' ', '-') for country in countries)
+    else:
+        label = f"{len(countries)}-countries-{hashlib.sha1(','.join(countries).encode('utf-8')).hexdigest()[:8]}"
+    return f"{label}_{window[0]:%Y%m%d}-{window[1]:%Y%m%d}"
+
+
+def load_worker(api_key, local_fallback):
+    logging.basicConfig(format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    recorder = StageRecorder(run=f"worker-{os.getpid()}")
+    with recording(recorder):
+        _worker['indices'] = load_indices()
+        _worker['news_vectors'] = build_news_vectors(load_stories(load_news()))
+        try:
+            _worker['window_returns'] = load_window_returns()
+        except Exception as e:
+            logger.warning("daily price history unavailable: %s", e)
+            _worker['window_returns'] = None
+    _worker['backend'] = make_report_backend(api_key, fallback=local_fallback)
+    _worker['cache'] = ReportCache()
+    _worker['startup'] = recorder.rows()
+
+
+def figure_html(market_map, cache_dir=FIGURE_CACHE_DIR):
+    # The export's map markup is by far its slowest part, so it is kept on disk by map key.
+    path = os.path.join(cache_dir, f"{hashlib.sha256(market_map.key.encode('utf-8')).hexdigest()[:24]}.html")
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    content = market_map.report_html()
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return content
+
+
+def write_text(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def run_task(countries, window, output_dir):
+    name = task_name(countries, window)
+    meta = {'task': name, 'countries': countries or 'all', 'window': [window[0].isoformat(), window[1].isoformat()], 'pid': os.getpid()}
+    df, window_returns = _worker['indices'], _worker['window_returns']
+
+    if window_returns is None and window != DEFAULT_WINDOW:
+        return {**meta, 'status': 'skipped', 'reason': "no daily price history; run `python ohlcv.py` to report on other windows"}
+    if countries is not None:
+        unknown = sorted(set(countries) - set(df['Country'].astype(str)))
+        if unknown:
+            return {**meta, 'status': 'skipped', 'reason': f"unknown countries: {', '.join(unknown)}"}
+
+    recorder = StageRecorder(run=name)
+    started = time.perf_counter()
+    with recording(recorder):
+        with stage('select_window'):
+            df, period = apply_window(df, window_returns, *window)
+            if countries is not None:
+                df = df[df['Country'].astype(str).isin(countries)].reset_index(drop=True)
+        if df.empty:
+            return {**meta, 'status': 'skipped', 'reason': "no index prices in this window"}
+
+        with stage('market_map'):
+            market_map = get_market_map(with_iso3(df), df['Percent Change (%)'].min(), df['Percent Change (%)'].max())
+            map_html = figure_html(market_map)
+        with stage('select_news'):
+            report_news = select_report_news(_worker['news_vectors'], df)
+        results = generate_report_sections(report_news, df, _worker['backend'], _worker['cache'], period)
+        report = assemble_report(results)
+
+        with stage('write_outputs'):
+            task_dir = os.path.join(output_dir, name)
+            os.makedirs(task_dir, exist_ok=True)
+            write_text(os.path.join(task_dir, 'report.md'), report)
+            write_text(os.path.join(task_dir, 'report.html'), render_report_html(report, df, map_html, period))
+            df.to_csv(os.path.join(task_dir, 'indices.csv'), index=False)
+            report_news.to_csv(os.path.join(task_dir, 'news.csv'), index=False)
+
+    failed = [result.title for result in results if not result.ok]
+    meta.update(
+        status='failed' if len(failed) == len(results) else 'ok',
+        period=period,
+        output=task_dir,
+        sections={'generated': sum(result.ok and not result.cached for result in results),
+                  'cached': sum(result.cached for result in results), 'failed': failed},
+        backends=sorted({result.backend for result in results if result.backend}),
+        seconds=round(time.perf_counter() - started, 3),
+        stages=recorder.rows(),
+        worker_startup=_worker['startup'],
+    )
+    write_text(os.path.join(task_dir, 'meta.json'), json.dumps(meta, indent=2, default=str))
+    return meta
+
+
+def run_batch(tasks, output_dir, workers, api_key, local_fallback):
+    # workers=0 runs every task in this process, which is easier to debug.
+    if workers == 0:
+        load_worker(api_key, local_fallback)
+        return [run_task(countries, window, output_dir) for countries, window in tasks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_worker, initargs=(api_key, local_fallback)) as pool:
+        futures = [pool.submit(run_task, countries, window, output_dir) for countries, window in tasks]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate tariff impact reports for every combination of country subsets and analysis windows.")
+    parser.add_argument('--countries', nargs='+', default=['all'], help="'all' or comma-separated country names, one subset per argument")
+    parser.add_argument('--windows', nargs='+', default=[f"{DEFAULT_WINDOW[0]}:{DEFAULT_WINDOW[1]}"],
+                        help="start:end dates (YYYY-MM-DD); windows other than the default need `python ohlcv.py`")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per task up to the CPU count, 0 runs inline)")
+    parser.add_argument('--local-fallback', action='store_true', help="write sections with the local model when Gemini is unavailable")
+    args = parser.parse_args(argv)
+
+    tasks = [(parse_countries(countries), parse_window(window)) for countries in args.countries for window in args.windows]
+    workers = min(len(tasks), os.cpu_count() or 1) if args.workers is None else args.workers
+    api_key = gemini_key()
+    if not api_key and not args.local_fallback:
+        print("No Gemini API key configured; pass --local-fallback to use the local model instead")
+
+    started = time.perf_counter()
+    results = run_batch(tasks, args.output, workers, api_key, args.local_fallback)
+    seconds = time.perf_counter() - started
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'default_period': DEFAULT_PERIOD,
+        'workers': workers,
+        'seconds': round(seconds, 3),
+        'tasks': [{key: value for key, value in result.items() if key not in ('stages', 'worker_startup')} for result in results],
+    }
+    with open(os.path.join(args.output, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+    for result in results:
+        detail = result.get('reason') or f"{result['seconds']:.2f}s, sections {result['sections']}"
+        print(f"{result['status']:<8} {result['task']:<40} {detail}")
+    print(f"{len(results)} reports in {seconds:.2f}s with {workers or 'no'} worker processes; manifest in {os.path.join(args.output, 'manifest.json')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+
+
+def synthetic_prices(tickers, years, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-06-30', periods=years * analytics.TRADING_DAYS)
+    shocks = rng.normal(0.0002, 0.012, size=(len(dates), tickers))
+    prices = 100 * np.exp(np.cumsum(shocks, axis=0))
+    gaps = rng.random(prices.shape) < 0.01
+    prices[gaps] = np.nan
+    return pd.DataFrame(prices, index=dates, columns=[f"T{i:05d}" for i in range(tickers)])
+
+
+def timed(label, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {elapsed * 1e3:>10.1f} ms")
+    return result, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized market analytics on synthetic prices.")
+    parser.add_argument('--tickers', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    prices = synthetic_prices(args.tickers, args.years)
+    values = prices.to_numpy()
+    cells = values.size
+    print(f"{args.tickers} tickers x {len(prices)} days ({cells / 1e6:.1f}M prices)")
+
+    returns, _ = timed("log returns", analytics.log_returns, values)
+    timed("rolling volatility", analytics.rolling_volatility, returns)
+    timed("max drawdown", analytics.max_drawdown, values)
+    timed("correlation matrix", analytics.correlation_matrix, returns)
+    timed("event study", analytics.event_study, returns, prices.index)
+    countries = {ticker: f"Country {i % 32}" for i, ticker in enumerate(prices.columns)}
+    timed("country correlation", lambda: analytics.correlation_matrix(
+        analytics.country_returns(pd.DataFrame(returns, columns=prices.columns), countries).to_numpy()))
+    version, _ = timed("data version", analytics.data_version, prices)
+    _, cold = timed("get_analytics (cold)", analytics.get_analytics, prices, version, 21, analytics.EVENT_DATE, countries)
+    timed("get_analytics (cached)", analytics.get_analytics, prices, version, 21, analytics.EVENT_DATE, countries)
+    print(f"throughput: {cells / cold / 1e6:.1f}M prices/s cold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_dedup import cluster_news
+
+SOURCES = ['Reuters', 'The New York Times', 'Yahoo Finance', 'Bloomberg', 'CNBC', 'Financial Times', 'AP News']
+
+
+def synthetic_news(n, seed=0, vocabulary=20000):
+    # Stories of 6-14 words; about a third are republished 1-5 more times under another source
+    # with at most one word changed, as wire copies are.
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(vocabulary)])
+    titles, sources, story = [], [], []
+    next_story = 0
+    while len(titles) < n:
+        base = list(words[rng.integers(0, vocabulary, rng.integers(6, 15))])
+        copies = 1 + (rng.integers(1, 6) if rng.random() < 1 / 3 else 0)
+        for copy in range(copies):
+            tokens = list(base)
+            if copy and rng.random() < 0.5:
+                tokens[rng.integers(0, len(tokens))] = words[rng.integers(0, vocabulary)]
+            source = SOURCES[rng.integers(0, len(SOURCES))]
+            titles.append(f"{' '.join(tokens)} - {source}")
+            sources.append(source)
+            story.append(next_story)
+        next_story += 1
+    return pd.DataFrame({'country': 'Germany', 'title': titles[:n], 'source': sources[:n], 'description': '', 'story': story[:n]})
+
+
+def score(clustered):
+    # Recall: copies that landed in the same cluster as their story's first article.
+    # Merges: clusters that mix more than one story.
+    first_cluster = clustered.groupby('story')['cluster'].transform('first')
+    copies = clustered['story'].duplicated()
+    recall = (clustered['cluster'][copies] == first_cluster[copies]).mean() if copies.any() else 1.0
+    merged = (clustered.groupby('cluster')['story'].nunique() > 1).mean()
+    return recall, merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time MinHash/LSH near-duplicate clustering on synthetic corpora.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000], help="e.g. --sizes 1000000 for a million articles")
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    for n in args.sizes:
+        news = synthetic_news(n)
+        started = time.perf_counter()
+        clustered = cluster_news(news, threshold=args.threshold)
+        seconds = time.perf_counter() - started
+        recall, merged = score(clustered)
+        print(
+            f"{n:>9} articles  {seconds:>7.2f}s  {n / seconds:>9.0f} articles/s  "
+            f"{clustered['cluster'].nunique():>9} clusters ({news['story'].nunique()} stories)  "
+            f"recall {recall:.1%}  mixed clusters {merged:.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
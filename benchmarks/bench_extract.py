@@ -0,0 +1,138 @@
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from article_extract import CONTENT_NOT_AVAILABLE, extract_many, parser_pool
+from news_ingest import NEWS_STORE_PATH, NewsFetcher
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'html')
+WORDS = "market tariff index shares fell rose investors central bank inflation trade exports yields oil gold currency".split()
+
+
+# The extractor news_ingest used before article_extract: BeautifulSoup over Python's html.parser.
+def bs4_extract(page):
+    try:
+        soup = BeautifulSoup(page, 'html.parser')
+        for tag in soup(["script", "style", "noscript"]):
+            tag.decompose()
+        article = soup.find('article')
+        if not article:
+            possible_blocks = soup.find_all(['div', 'section'], class_=lambda c: c and 'content' in c.lower())
+            article = max(possible_blocks, key=lambda tag: len(tag.get_text(strip=True)), default=soup.body)
+        return article.get_text(separator='\n', strip=True)
+    except Exception:
+        return CONTENT_NOT_AVAILABLE
+
+
+def paragraphs(rng, count):
+    return ''.join(f"<p>{' '.join(rng.choices(WORDS, k=rng.randint(20, 60)))}.</p>" for _ in range(count))
+
+
+def boilerplate(rng, links):
+    nav = ''.join(f"<li><a href='/section/{i}'>{rng.choice(WORDS).title()}</a></li>" for i in range(links))
+    script = f"<script>window.__STATE__ = {{\"items\": [{','.join(str(rng.random()) for _ in range(links * 40))}]}};</script>"
+    return f"<header><nav><ul>{nav}</ul></nav></header>{script}<style>.a{{color:red}}</style>"
+
+
+def synthetic_page(rng, kind):
+    # News pages are mostly scripts, navigation and related-story rails around a short body.
+    head = f"<head><meta charset='utf-8'><title>{rng.choice(WORDS)}</title>{boilerplate(rng, 200)}</head>"
+    rail = f"<aside class='related'>{paragraphs(rng, 40)}</aside><footer>{boilerplate(rng, 150)}</footer>"
+    if kind == 'article':
+        body = f"<article><h1>Headline</h1>{paragraphs(rng, 12)}<noscript>enable js</noscript></article>"
+    elif kind == 'nested':
+        teaser = f"<article class='teaser'><h2>Related</h2>{paragraphs(rng, 1)}</article>"
+        body = f"<article><h1>Headline</h1>{paragraphs(rng, 4)}{teaser}{paragraphs(rng, 8)}</article>"
+    elif kind == 'content':
+        body = f"<div class='story-content'>{paragraphs(rng, 12)}</div><div class='content-teaser'>{paragraphs(rng, 1)}</div>"
+    elif kind == 'broken':
+        body = f"<div class='Content'><p>{paragraphs(rng, 10)}<table><tr><td>unclosed"
+    elif kind == 'huge':
+        body = f"<article>{paragraphs(rng, 12)}</article>" + rail * 40
+    else:
+        body = f"<div id='consent'>{paragraphs(rng, 2)}</div>"
+    return f"<!DOCTYPE html><html>{head}<body>{boilerplate(rng, 100)}{body}{rail}</body></html>".encode('utf-8')
+
+
+def synthetic_pages(count, seed=7):
+    rng = random.Random(seed)
+    kinds = ['article'] * 5 + ['nested', 'content', 'content', 'broken', 'huge', 'consent']
+    return [synthetic_page(rng, kinds[i % len(kinds)]) for i in range(count)]
+
+
+def save_from_store(directory, store_path, limit):
+    # Captures real article pages once so later runs measure parsing only, not the network.
+    os.makedirs(directory, exist_ok=True)
+    urls = pd.read_csv(store_path, usecols=['url'])['url'].dropna().drop_duplicates().head(limit)
+    fetcher = NewsFetcher()
+    saved = 0
+    for i, url in enumerate(urls):
+        page = fetcher.fetch_article(url)
+        if page:
+            with open(os.path.join(directory, f"page-{i:04d}.html"), 'wb') as f:
+                f.write(page)
+            saved += 1
+    return saved
+
+
+def load_fixtures(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    return pages
+
+
+def succeeded(text):
+    return bool(text) and text != CONTENT_NOT_AVAILABLE
+
+
+def report(name, pages, seconds, texts):
+    rate = sum(map(succeeded, texts)) / len(texts)
+    print(f"{name:<28} {len(pages) / seconds:>9.1f} pages/s  {seconds:>7.2f}s  success {rate:>6.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare article-body extractors over a corpus of saved HTML pages.")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="directory of *.html pages")
+    parser.add_argument('--save-from', nargs='?', const=NEWS_STORE_PATH, default=None, help="first download the article pages listed in a news CSV")
+    parser.add_argument('--limit', type=int, default=200, help="pages to download with --save-from")
+    parser.add_argument('--synthetic', type=int, default=110, help="generated pages to use when there are no saved fixtures")
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, os.cpu_count()])
+    args = parser.parse_args(argv)
+
+    if args.save_from:
+        print(f"saved {save_from_store(args.fixtures, args.save_from, args.limit)} pages to {args.fixtures}")
+    pages = load_fixtures(args.fixtures)
+    if not pages:
+        pages = synthetic_pages(args.synthetic)
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f} MB")
+
+    started = time.perf_counter()
+    baseline = [bs4_extract(page) for page in pages]
+    report('bs4 html.parser', pages, time.perf_counter() - started, baseline)
+
+    started = time.perf_counter()
+    texts = extract_many(pages)
+    report('lxml', pages, time.perf_counter() - started, texts)
+    same = sum(a == b for a, b in zip(baseline, texts))
+    print(f"{'':<28} identical to bs4 on {same}/{len(pages)} pages")
+
+    for workers in dict.fromkeys(workers for workers in args.workers if workers):
+        with parser_pool(workers) as pool:
+            extract_many(pages[:workers], pool)
+            started = time.perf_counter()
+            texts = extract_many(pages, pool)
+            report(f"lxml, {workers} processes", pages, time.perf_counter() - started, texts)
+
+
+if __name__ == "__main__":
+    main()
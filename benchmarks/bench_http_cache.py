@@ -0,0 +1,139 @@
+import argparse
+import base64
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_cache import HttpCache, decode_google_news_id
+from news_ingest import HostRateLimiter, NewsFetcher, ingest
+
+WORDS = "market tariff index shares fell rose investors central bank inflation trade exports yields".split()
+LAST_MODIFIED = formatdate(time.time() - 86400, usegmt=True)
+
+
+def encoded_article_id(url):
+    # Mimics the older Google News ids: a protobuf message with the publisher URL as field 4.
+    raw = url.encode('ascii')
+    return base64.urlsafe_b64encode(b'\x08\x13\x22' + bytes([len(raw)]) + raw + b'\xd2\x01\x00').decode('ascii').rstrip('=')
+
+
+# A stand-in for Google News and the publishers. Feeds link to /rss/articles/<id>, which answers
+# with a 302; half of the ids also embed the page URL so they resolve offline. Pages alternate between ETag, Last-Modified and no
+# validators. Every body byte sent is counted.
+class NewsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, articles=10, page_paragraphs=200):
+        super().__init__(('127.0.0.1', 0), NewsHandler)
+        self.articles = articles
+        self.page_paragraphs = page_paragraphs
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page(self, path):
+        rng = random.Random(path)
+        body = ''.join(f"<p>{' '.join(rng.choices(WORDS, k=40))}.</p>" for _ in range(self.page_paragraphs))
+        return f"<html><body><nav>menu</nav><article><h1>{path}</h1>{body}</article></body></html>".encode('utf-8')
+
+    def feed(self, query):
+        items = []
+        for i in range(self.articles):
+            page_url = f"{self.base_url}/story/{hashlib.sha1(query.encode()).hexdigest()[:8]}-{i}"
+            article_id = encoded_article_id(page_url) if i % 2 else f"CBMi{i:04d}{hashlib.sha1(page_url.encode()).hexdigest()[:12]}"
+            items.append(
+                f"<item><title>Story {i} - Wire</title><link>{self.base_url}/rss/articles/{article_id}?oc=5</link>"
+                f"<pubDate>Thu, 03 Apr 2025 0{i % 10}:00:00 GMT</pubDate><source>Wire</source></item>"
+            )
+        return f"<?xml version='1.0'?><rss><channel>{''.join(items)}</channel></rss>".encode('utf-8')
+
+
+class NewsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body=b'', headers=()):
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.not_modified += status == 304
+            self.server.bytes_sent += len(body)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path.startswith('/rss/articles/'):
+            article_id = path.rsplit('/', 1)[-1]
+            self.reply(302, headers=[('Location', decode_google_news_id(article_id) or f"/story/opaque-{article_id}")])
+            return
+        body = self.server.feed(query) if path.startswith('/rss') else self.server.page(path)
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        kind = int(hashlib.sha1(path.encode()).hexdigest(), 16) % 3
+        validators = [('ETag', etag)] if kind == 0 else [('Last-Modified', LAST_MODIFIED)] if kind == 1 else []
+        if (kind == 0 and self.headers.get('If-None-Match') == etag) or (kind == 1 and self.headers.get('If-Modified-Since') == LAST_MODIFIED):
+            self.reply(304, headers=validators)
+            return
+        self.reply(200, body, [('Content-Type', 'text/html; charset=utf-8')] + validators)
+
+
+def run(server, cache, countries, label):
+    requests_before, bytes_before, not_modified_before = server.requests, server.bytes_sent, server.not_modified
+    fetcher = NewsFetcher(rss_url=f"{server.base_url}/rss/search", limiter=HostRateLimiter(rate=1000, burst=1000), cache=cache)
+    started = time.perf_counter()
+    df = ingest(countries, '2025-04-01', '2025-04-07', fetcher=fetcher, max_workers=8, parse_workers=0)
+    seconds = time.perf_counter() - started
+    ok = (~df['description'].str.startswith('Content not available')).sum()
+    print(
+        f"{label:<30} {seconds:>6.2f}s  {server.requests - requests_before:>4} requests "
+        f"({server.not_modified - not_modified_before} x 304)  {(server.bytes_sent - bytes_before) / 1e6:>7.2f} MB  "
+        f"{ok}/{len(df)} articles"
+    )
+    return server.bytes_sent - bytes_before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure bytes moved by repeat ingestion runs through the on-disk HTTP cache.")
+    parser.add_argument('--countries', type=int, default=8)
+    parser.add_argument('--articles', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    server = NewsServer(articles=args.articles)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    countries = [f"Country {i}" for i in range(args.countries)]
+    host = server.base_url.split('//', 1)[1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'http.sqlite3')
+        run(server, None, countries, 'no cache')
+        cold = run(server, HttpCache(path, redirect_hosts=[host]), countries, 'cold cache')
+        fresh = run(server, HttpCache(path, redirect_hosts=[host]), countries, 'warm, within max-age')
+        stale = run(server, HttpCache(path, max_age=0, redirect_hosts=[host]), countries, 'warm, revalidating (max-age 0)')
+        stats = HttpCache(path, redirect_hosts=[host]).stats()
+        print(f"repeat runs moved {fresh / cold:.1%} / {stale / cold:.1%} of the cold-run bytes; cache holds "
+              f"{stats['entries']} responses in {stats['bytes'] / 1e6:.2f} MB ({stats['raw_bytes'] / 1e6:.2f} MB raw), "
+              f"{stats['redirects']} resolved article links")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_news_server import start
+from news_ingest import COUNTRIES, HostRateLimiter, NewsFetcher, RefreshCheckpoint, ingest, refresh
+
+START, END = '2025-04-01', '2025-04-07'
+
+
+def counted(server, run):
+    feeds, pages = server.feeds, server.pages
+    started = time.perf_counter()
+    articles = run()
+    return {'seconds': round(time.perf_counter() - started, 3), 'articles': articles,
+            'feeds': server.feeds - feeds, 'pages': server.pages - pages}
+
+
+def run_ingest(server, countries, workers, parse_workers, rate):
+    fetcher = NewsFetcher(limiter=HostRateLimiter(rate=rate, burst=workers), rss_url=server.rss_url, pool_size=workers)
+    return counted(server, lambda: len(ingest(countries, START, END, fetcher=fetcher, max_workers=workers, parse_workers=parse_workers)))
+
+
+def run_refresh(server, countries, workers, parse_workers, rate, tmp):
+    # The second pass over the same window only asks for the days since the newest stored article.
+    fetcher = NewsFetcher(limiter=HostRateLimiter(rate=rate, burst=workers), rss_url=server.rss_url, pool_size=workers)
+    checkpoint = RefreshCheckpoint(os.path.join(tmp, 'checkpoint.sqlite3'))
+    store = os.path.join(tmp, 'news.csv')
+    try:
+        return [
+            counted(server, lambda: refresh(countries, START, END, store_path=store, checkpoint=checkpoint, fetcher=fetcher,
+                                            max_workers=workers, parse_workers=parse_workers))
+            for _ in range(2)
+        ]
+    finally:
+        checkpoint.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time news ingestion against a local mock of Google News and its publishers.")
+    parser.add_argument('--countries', type=int, default=len(COUNTRIES), help="how many of the 32 countries to fetch")
+    parser.add_argument('--articles', type=int, default=10, help="items per feed")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds the mock waits before every response")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16], help="fetch thread counts to compare (1 is the notebook's one-at-a-time order)")
+    parser.add_argument('--parse-workers', type=int, default=None, help="article parser processes (default: CPU count - 1, 0 parses in the fetch threads)")
+    parser.add_argument('--rate', type=float, default=1000.0, help="requests per second allowed per host")
+    parser.add_argument('--fail-every', type=int, default=0, help="have the mock fail every nth article page")
+    args = parser.parse_args(argv)
+
+    countries = COUNTRIES[:args.countries]
+    server = start(articles=args.articles, latency=args.latency, fail_every=args.fail_every)
+    print(f"{len(countries)} countries x {args.articles} articles, {args.latency * 1000:.0f} ms per request, mock at {server.base_url}")
+
+    rows = {}
+    for workers in args.workers:
+        rows[f"ingest, {workers} workers"] = run_ingest(server, countries, workers, args.parse_workers, args.rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        first, repeat = run_refresh(server, countries, max(args.workers), args.parse_workers, args.rate, tmp)
+    rows[f"refresh, {max(args.workers)} workers"] = first
+    rows[f"refresh again, {max(args.workers)} workers"] = repeat
+    server.shutdown()
+
+    table = pd.DataFrame(rows).T
+    table['articles/s'] = (table['articles'] / table['seconds']).round(1)
+    print(table.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_llm_server import start
+
+REPORT_DONE = "📄 Prepare HTML report"
+
+
+# Collects the JSON stage lines perf logs while the app runs in this process.
+class StageLog(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.entries = []
+
+    def emit(self, record):
+        self.entries.append(json.loads(record.getMessage()))
+
+    def take(self, name):
+        seconds = sum(entry['seconds'] for entry in self.entries if entry['stage'] == name)
+        self.entries = []
+        return seconds
+
+
+def widget(elements, label):
+    return next(element for element in elements if element.label == label)
+
+
+def interactions(at, repeats):
+    # Each interaction is a widget change inside the News tab, which the app runs as a fragment.
+    countries = widget(at.selectbox, "Filter news by country").options[1:]
+    queries = ['tariff', 'oil prices', '']
+    for i in range(repeats):
+        yield 'rerun, nothing changed', lambda: at.run()
+        yield 'news: country filter', lambda: widget(at.selectbox, "Filter news by country").set_value(countries[i % len(countries)]).run()
+        yield 'news: search headlines', lambda: widget(at.text_input, "Search headlines").set_value(queries[i % len(queries)]).run()
+        label = "Older →" if not widget(at.button, "Older →").disabled else "← Newer"
+        yield 'news: next page', lambda: widget(at.button, label).click().run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time app interactions headlessly: a full script rerun against the news fragment alone.")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seconds-per-section', type=float, default=0.05, help="mock LLM latency per report section")
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args(argv)
+
+    server = start(seconds_per_section=args.seconds_per_section)
+    cache_dir = tempfile.mkdtemp(prefix='bench-interactions-')
+    os.environ.update(GEMINI_API_KEY='mock-key', GEMINI_API_BASE=server.base_url, ECHOES_CACHE_DIR=cache_dir)
+    os.chdir(ROOT)
+    stages = StageLog()
+    perf = logging.getLogger('perf')
+    perf.addHandler(stages)
+    perf.setLevel(logging.INFO)
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=args.timeout)
+    started = time.perf_counter()
+    at.run()
+    print(f"first run (cold caches): {(time.perf_counter() - started) * 1000:,.0f} ms")
+    deadline = time.monotonic() + args.timeout
+    while REPORT_DONE not in [button.label for button in at.button] and time.monotonic() < deadline:
+        time.sleep(0.5)
+        at.run()
+    if at.exception:
+        raise SystemExit(f"app raised: {at.exception[0].value}")
+    stages.take('news')
+
+    timings = {}
+    for name, interact in interactions(at, args.repeats):
+        started = time.perf_counter()
+        interact()
+        script = time.perf_counter() - started
+        timings.setdefault(name, []).append((script, stages.take('news')))
+    server.shutdown()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    rows = {
+        name: {
+            'full rerun (ms)': statistics.median(script for script, _ in runs) * 1000,
+            'news fragment (ms)': statistics.median(news for _, news in runs) * 1000,
+        }
+        for name, runs in timings.items()
+    }
+    table = pd.DataFrame(rows).T
+    table['speed-up'] = (table['full rerun (ms)'] / table['news fragment (ms)']).round(1)
+    print(f"\nmedians over {args.repeats} runs; before the news feed became a fragment every interaction cost a full rerun")
+    print(table.round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import time
+
+import markdown
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_export import report_body_html
+
+SECTIONS = [
+    "Executive Summary", "Market Performance Analysis", "Tariff Policy Evaluation",
+    "Supply Chain Disruption Assessment", "Consumer Impact Analysis", "Investor Strategy Recommendations",
+    "International Trade Implications", "Future Outlook & Timeline", "Interesting Take",
+]
+
+
+def two_pass_html(report):
+    soup = BeautifulSoup(markdown.markdown(report), 'html.parser')
+
+    for h2 in soup.find_all('h2'):
+        h2['class'] = h2.get('class', []) + ['section-header']
+
+    for strong in soup.find_all('strong'):
+        text = strong.get_text()
+        if any(neg in text.lower() for neg in ['decline', 'drop', 'fall', 'decrease', '-', 'negative']):
+            strong['class'] = strong.get('class', []) + ['negative']
+        elif any(pos in text.lower() for pos in ['increase', 'rise', 'grow', 'positive', '+']):
+            strong['class'] = strong.get('class', []) + ['positive']
+
+    return str(soup)
+
+
+def synthetic_report(paragraphs_per_section):
+    parts = []
+    for section in SECTIONS:
+        parts.append(f"## {section}\n")
+        for i in range(paragraphs_per_section):
+            parts.append(
+                f"* The **DAX fell -12.20%** while **gold saw an increase of +{i % 7}.5%**; "
+                f"analysts expect **a {i % 5} point decline** in margins and **steady demand**.\n"
+            )
+        parts.append("\n")
+    return ''.join(parts)
+
+
+def timed(fn, report, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(report)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the two-pass and single-pass report HTML renderers.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'paragraphs':>10} {'chars':>10} {'two-pass ms':>12} {'single-pass ms':>15} {'speedup':>8}")
+    for size in args.sizes:
+        report = synthetic_report(size)
+        baseline = timed(two_pass_html, report, args.repeat)
+        single = timed(report_body_html, report, args.repeat)
+        print(f"{size * len(SECTIONS):>10} {len(report):>10} {baseline * 1e3:>12.1f} {single * 1e3:>15.1f} {baseline / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_llm_server import start
+from report_backends import GeminiBackend
+from report_cache import ReportCache, make_cache_key
+from report_sections import REPORT_SECTIONS, assemble_report, report_instructions, run_sections, section_instructions
+
+PREAMBLE = "MARKET DATA (synthetic):\nCountry|Percent Change (%)\nGermany|-12.2\nJapan|-12.6\n\n"
+
+
+def section_prompts():
+    return [(title, PREAMBLE + section_instructions(title, bullets)) for title, bullets in REPORT_SECTIONS]
+
+
+def timed_sections(client, cache, **options):
+    started = time.perf_counter()
+    results = run_sections(section_prompts(), client, cache=cache, cache_key=lambda prompt: make_cache_key(prompt, 'mock', {}), **options)
+    return time.perf_counter() - started, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare one long report completion with concurrent per-section requests against a mock LLM.")
+    parser.add_argument('--seconds-per-section', type=float, default=0.5)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 3, 9])
+    args = parser.parse_args(argv)
+
+    server = start(seconds_per_section=args.seconds_per_section, fail_once=['Consumer Impact Analysis'])
+    client = GeminiBackend('mock-key', 'mock', base_url=server.base_url, pool_size=max(args.concurrency))
+
+    started = time.perf_counter()
+    client.generate(PREAMBLE + report_instructions())
+    print(f"{'single completion':<28} {time.perf_counter() - started:>7.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caches = []
+        for concurrency in args.concurrency:
+            caches.append(ReportCache(os.path.join(tmp, f"sections-{concurrency}.db")))
+            seconds, results = timed_sections(client, caches[-1], max_concurrency=concurrency)
+            failed = [result.title for result in results if not result.ok]
+            print(f"{f'sections, concurrency {concurrency}':<28} {seconds:>7.2f}s  failed: {failed or 'none'}")
+
+        seconds, results = timed_sections(client, caches[0], max_concurrency=max(args.concurrency))
+        regenerated = [result.title for result in results if not result.cached]
+        print(f"{'rerun after failure':<28} {seconds:>7.2f}s  regenerated: {regenerated}")
+
+        titles = [line for line in assemble_report(results).splitlines() if line.startswith('## ')]
+        assert titles == [f"## {title}" for title, _ in REPORT_SECTIONS], titles
+        print(f"assembled {len(titles)} sections in order; mock served {server.requests} requests")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import storage
+from bench_dedup import synthetic_news
+from figures import get_market_map
+from mock_llm_server import start
+from news_index import NewsIndex
+from perf import StageRecorder, recording, stage
+from report_backends import GeminiBackend
+from report_cache import ReportCache
+from report_core import (
+    REPORT_NEWS_PER_COUNTRY, build_news_vectors, generate_report, load_indices, load_news,
+    load_stories, market_overview_html, select_report_news, with_iso3,
+)
+from report_export import render_report_html
+
+SCALES = {
+    'small': (31, 320),
+    'medium': (1_000, 10_000),
+    'large': (10_000, 100_000),
+    'xlarge': (10_000, 1_000_000),
+}
+PERIOD = "1 Apr - 8 Apr 2025"
+# Peak memory per article while hashing the TF-IDF vectors, measured at 1M synthetic articles;
+# the finished sparse vectors keep about 240 bytes of it.
+VECTOR_BUILD_BYTES_PER_ARTICLE = 2048
+
+
+def synthetic_indices(countries, seed=0):
+    # The real 31 indices first, then made-up countries, which have no ISO3 code and so no map shape.
+    rng = np.random.default_rng(seed)
+    real = pd.read_csv(storage.INDICES_CSV)
+    extra = max(0, countries - len(real))
+    start = rng.uniform(1_000, 40_000, extra)
+    change = rng.uniform(-15, 2, extra)
+    made_up = pd.DataFrame({
+        'Country': [f"Country {i}" for i in range(extra)],
+        'Index': [f"Index {i}" for i in range(extra)],
+        'Ticker': [f"INDEX:X{i}" for i in range(extra)],
+        'Price on 2025-04-01': start.round(2),
+        'Price on 2025-04-08': (start * (1 + change / 100)).round(2),
+        'Percent Change (%)': change.round(2),
+    })
+    return pd.concat([real, made_up], ignore_index=True).head(countries)
+
+
+def synthetic_articles(countries, articles, seed=0):
+    rng = np.random.default_rng(seed)
+    news = synthetic_news(articles, seed)
+    hours = rng.integers(0, 8 * 24, articles)
+    published = pd.Timestamp('2025-04-01', tz='UTC') + pd.to_timedelta(hours, unit='h')
+    return news.assign(
+        country=countries[rng.integers(0, len(countries), articles)],
+        date=published.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+        description=np.where(rng.random(articles) < 0.7, news['title'] + ' Markets reacted to the tariff announcement.', ''),
+        url=[f"https://example.com/{i}" for i in range(articles)],
+    )[['country', 'date', 'source', 'title', 'description', 'url']]
+
+
+def run_scale(countries, articles, tmp, backend, memory_budget):
+    indices_csv, news_csv = os.path.join(tmp, 'indices.csv'), os.path.join(tmp, 'news.csv')
+    indices_arrow, news_arrow = os.path.join(tmp, 'indices.feather'), os.path.join(tmp, 'news.feather')
+    indices = synthetic_indices(countries)
+    indices.to_csv(indices_csv, index=False)
+    synthetic_articles(indices['Country'].to_numpy(), articles).to_csv(news_csv, index=False)
+
+    recorder = StageRecorder(run=f"{countries}x{articles}")
+    with recording(recorder):
+        with stage('convert_csv'):
+            storage.convert(indices_csv, news_csv, indices_arrow, news_arrow)
+        df = load_indices(indices_csv, indices_arrow)
+        news = load_news(news_csv, news_arrow)
+        stories = load_stories(news)
+        with stage('news_index', articles=len(stories)):
+            NewsIndex(stories)
+
+        df_sorted = df.sort_values(by='Percent Change (%)')
+        min_change, max_change = df_sorted['Percent Change (%)'].min(), df_sorted['Percent Change (%)'].max()
+        with stage('market_map'):
+            market_map = get_market_map(with_iso3(df), min_change, max_change)
+            # What st.plotly_chart does with the figure on every render.
+            pio.to_json(market_map.figure, validate=False)
+        with stage('overview_html'):
+            market_overview_html(df_sorted, min_change, max_change)
+
+        needed_mb = len(stories) * VECTOR_BUILD_BYTES_PER_ARTICLE / 2 ** 20
+        if needed_mb <= memory_budget:
+            news_vectors = build_news_vectors(stories)
+            with stage('select_news'):
+                report_news = select_report_news(news_vectors, df)
+        else:
+            print(f"  news_vectors skipped: needs ~{needed_mb:,.0f} MB, budget {memory_budget:,} MB (--memory-budget)")
+            report_news = stories.groupby('country', observed=True).head(REPORT_NEWS_PER_COUNTRY)
+
+        report = generate_report(report_news, df, backend, ReportCache(os.path.join(tmp, 'reports.sqlite3')), PERIOD)
+        with stage('export_html'):
+            render_report_html(report, df, market_map.report_html(), PERIOD)
+    return recorder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every dashboard stage headlessly on synthetic data against a mock LLM.")
+    parser.add_argument('--scales', nargs='+', default=['small', 'medium'], choices=sorted(SCALES),
+                        help="countries x articles: " + ', '.join(f"{name} {c}x{a}" for name, (c, a) in SCALES.items()))
+    parser.add_argument('--seconds-per-section', type=float, default=0.05, help="mock LLM latency per report section")
+    parser.add_argument('--memory-budget', type=int, default=2048, help="MB; larger vector indexes are skipped")
+    args = parser.parse_args(argv)
+
+    server = start(seconds_per_section=args.seconds_per_section)
+    backend = GeminiBackend('mock-key', 'mock', base_url=server.base_url)
+    timings = {}
+    for name in args.scales:
+        countries, articles = SCALES[name]
+        print(f"{name}: {countries:,} countries x {articles:,} articles")
+        with tempfile.TemporaryDirectory() as tmp:
+            recorder = run_scale(countries, articles, tmp, backend, args.memory_budget)
+        for row in recorder.rows():
+            print(f"  {row['stage']:<24} {row['ms']:>10,.1f} ms")
+        timings[name] = {row['stage'].lstrip('· '): row['ms'] for row in recorder.rows()}
+        timings[name]['total'] = round(recorder.total() * 1000, 1)
+    server.shutdown()
+
+    print()
+    print(pd.DataFrame(timings).fillna('-').to_string())
+
+
+if __name__ == "__main__":
+    main()
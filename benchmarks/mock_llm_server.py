@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_sections import REPORT_SECTIONS
+
+SECTION_RE = re.compile(r'Write ONLY the "(.+?)" section')
+PATH_RE = re.compile(r"^/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)(\?.*)?$")
+
+
+def section_text(title):
+    return (
+        f"## {title}\n\n"
+        f"Mock analysis for {title.lower()}: the **DAX fell -12.20%** while **gold saw an increase of +2.5%**.\n\n"
+        "* **Conclusion:** markets priced in a prolonged tariff regime.\n"
+    )
+
+
+# Speaks the Gemini generateContent / streamGenerateContent (SSE) REST shapes. Latency grows with
+# the number of sections requested, so one full-report completion costs as much as all of its
+# sections back to back. ``status`` forces every request to fail, e.g. 429 for quota exhaustion.
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, seconds_per_section=0.5, fail_once=(), status=None):
+        super().__init__(address, MockLLMHandler)
+        self.seconds_per_section = seconds_per_section
+        self.fail_once = set(fail_once)
+        self.status = status
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self, payloads):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for payload in payloads:
+            time.sleep(self.server.seconds_per_section)
+            self.wfile.write(f"data: {json.dumps(payload)}\r\n\r\n".encode('utf-8'))
+            self.wfile.flush()
+
+    def do_POST(self):
+        match = PATH_RE.match(self.path)
+        if not match:
+            self.send_json(404, {'error': {'code': 404, 'message': f"Unknown path {self.path}"}})
+            return
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        prompt = ''.join(part.get('text', '') for content in payload.get('contents', []) for part in content.get('parts', []))
+        requested = SECTION_RE.search(prompt)
+        titles = [requested.group(1)] if requested else [title for title, _ in REPORT_SECTIONS]
+
+        with self.server.lock:
+            self.server.requests += 1
+            failing = requested is not None and titles[0] in self.server.fail_once
+            self.server.fail_once.discard(titles[0])
+
+        if self.server.status is not None:
+            self.send_json(self.server.status, {'error': {'code': self.server.status, 'message': "Injected status"}})
+            return
+        if failing:
+            time.sleep(self.server.seconds_per_section)
+            self.send_json(500, {'error': {'code': 500, 'message': f"Injected failure for {titles[0]}"}})
+            return
+        payloads = [
+            {'candidates': [{'content': {'role': 'model', 'parts': [{'text': section_text(title) + '\n'}]}}]}
+            for title in titles
+        ]
+        if match.group(2) == 'streamGenerateContent':
+            self.send_events(payloads)
+            return
+        time.sleep(self.server.seconds_per_section * len(titles))
+        text = ''.join(payload['candidates'][0]['content']['parts'][0]['text'] for payload in payloads)
+        self.send_json(200, {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}]})
+
+
+def start(host='127.0.0.1', port=0, seconds_per_section=0.5, fail_once=(), status=None):
+    server = MockLLMServer((host, port), seconds_per_section, fail_once, status)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local mock of the Gemini generateContent endpoint.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seconds-per-section', type=float, default=0.5)
+    parser.add_argument('--fail-once', nargs='*', default=[], help="section titles that fail on their first request")
+    parser.add_argument('--status', type=int, default=None, help="answer every request with this HTTP error, e.g. 429")
+    args = parser.parse_args(argv)
+
+    server = MockLLMServer((args.host, args.port), args.seconds_per_section, args.fail_once, args.status)
+    print(f"Mock LLM listening on {server.base_url} (set GEMINI_API_BASE to use it)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+WORDS = "market tariff index shares fell rose investors central bank inflation trade exports yields".split()
+SOURCES = ['Reuters', 'Bloomberg', 'Financial Times', 'CNBC', 'Nikkei Asia']
+
+
+# Speaks the Google News RSS search shape (``/rss/search?q=<country>+after:<start>+before:<end>``)
+# and serves the linked publisher pages from the same host. Every request waits ``latency`` seconds
+# first, like a remote publisher, and ``fail_every`` answers every nth article page with a 503.
+class MockNewsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, articles=10, latency=0.05, page_paragraphs=40, fail_every=0):
+        super().__init__(address, MockNewsHandler)
+        self.articles = articles
+        self.latency = latency
+        self.page_paragraphs = page_paragraphs
+        self.fail_every = fail_every
+        self.lock = threading.Lock()
+        self.feeds = 0
+        self.pages = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def rss_url(self):
+        return f"{self.base_url}/rss/search"
+
+    def feed(self, query):
+        # Each country has the same ``articles`` stories spread over 1-5 April; a feed lists those inside its window.
+        terms = query.split()
+        country = ' '.join(term for term in terms if not term.startswith(('after:', 'before:')))
+        after = next((term[len('after:'):] for term in terms if term.startswith('after:')), '0000-00-00')
+        before = next((term[len('before:'):] for term in terms if term.startswith('before:')), '9999-99-99')
+        digest = hashlib.sha1(country.encode('utf-8')).hexdigest()[:8]
+        items = []
+        for i in range(self.articles):
+            day = 1 + i % 5
+            if not after <= f"2025-04-{day:02d}" <= before:
+                continue
+            items.append(
+                f"<item><title>{country} markets story {i} - {SOURCES[i % len(SOURCES)]}</title>"
+                f"<link>{self.base_url}/story/{digest}-{i}</link>"
+                f"<pubDate>{day:02d} Apr 2025 {i % 24:02d}:00:00 GMT</pubDate>"
+                f"<source>{SOURCES[i % len(SOURCES)]}</source></item>"
+            )
+        return f"<?xml version='1.0'?><rss><channel>{''.join(items)}</channel></rss>".encode('utf-8')
+
+    def page(self, path):
+        rng = random.Random(path)
+        body = ''.join(f"<p>{' '.join(rng.choices(WORDS, k=40))}.</p>" for _ in range(self.page_paragraphs))
+        return (f"<html><head><script>var tracking = 1;</script></head><body><nav>menu</nav>"
+                f"<article><h1>{path}</h1>{body}</article><footer>footer</footer></body></html>").encode('utf-8')
+
+
+class MockNewsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        url = urlsplit(self.path)
+        if url.path == '/rss/search':
+            with self.server.lock:
+                self.server.feeds += 1
+            query = parse_qs(url.query).get('q', [''])[0]
+            self.reply(200, self.server.feed(query), 'application/rss+xml; charset=utf-8')
+            return
+        if url.path.startswith('/story/'):
+            with self.server.lock:
+                self.server.pages += 1
+                failing = self.server.fail_every and self.server.pages % self.server.fail_every == 0
+            if failing:
+                self.reply(503, b'Service Unavailable', 'text/plain')
+                return
+            self.reply(200, self.server.page(url.path), 'text/html; charset=utf-8')
+            return
+        self.reply(404, b'Not Found', 'text/plain')
+
+
+def start(host='127.0.0.1', port=0, articles=10, latency=0.05, page_paragraphs=40, fail_every=0):
+    server = MockNewsServer((host, port), articles, latency, page_paragraphs, fail_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local mock of the Google News RSS search and the publisher pages it links to.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--articles', type=int, default=10, help="items per feed")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds every request waits before answering")
+    parser.add_argument('--page-paragraphs', type=int, default=40)
+    parser.add_argument('--fail-every', type=int, default=0, help="answer every nth article page with a 503")
+    args = parser.parse_args(argv)
+
+    server = MockNewsServer((args.host, args.port), args.articles, args.latency, args.page_paragraphs, args.fail_every)
+    print(f"Mock news listening on {server.base_url} (python news_ingest.py --rss-url {server.rss_url} --no-http-cache)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+MAP_COLUMNS = ['ISO3', 'Country', 'Percent Change (%)']
+MAX_CACHED_MAPS = 16
+MAP_LOSS_COLOR = '#d73027'
+MAP_FLAT_COLOR = '#f7f7f7'
+MAP_GAIN_COLOR = '#1a9850'
+
+
+def data_hash(df, columns=MAP_COLUMNS):
+    hashed = pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+    return hashlib.sha256(hashed.to_numpy().tobytes()).hexdigest()[:16]
+
+
+def change_scale(min_change, max_change):
+    # Diverging scale with the neutral colour pinned at 0%, wherever 0 falls inside the range.
+    low, high = min(min_change, 0), max(max_change, 0)
+    if high == low:
+        high = 1
+    scale = [[-low / (high - low), MAP_FLAT_COLOR]]
+    if low < 0:
+        scale.insert(0, [0, MAP_LOSS_COLOR])
+    if high > 0:
+        scale.append([1, MAP_GAIN_COLOR])
+    return [low, high], scale
+
+
+def build_market_map(df, min_change, max_change):
+    range_color, scale = change_scale(min_change, max_change)
+    fig = px.choropleth(
+        df,
+        locations='ISO3',
+        color='Percent Change (%)',
+        hover_name='Country',
+        color_continuous_scale=scale,
+        range_color=range_color,
+        labels={'Percent Change (%)': 'Market Change (%)'},
+        title='',
+        height=300,
+    )
+    fig.update_traces(hovertemplate="<b>%{hovertext}</b><br>Market Change: %{z:.1f}%<extra></extra>")
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=0, b=0),
+        geo=dict(
+            showframe=False,
+            showcoastlines=True,
+            projection_type='equirectangular'
+        )
+    )
+    return fig
+
+
+class MarketMap:
+    def __init__(self, key, figure):
+        self.key = key
+        self.figure = figure
+        self.lock = threading.Lock()
+        self._report_html = None
+
+    def report_html(self):
+        with self.lock:
+            if self._report_html is None:
+                report_fig = go.Figure(self.figure)
+                report_fig.update_layout(
+                    height=400,
+                    coloraxis_colorbar=dict(
+                        title="Market Change (%)",
+                        thicknessmode="pixels", thickness=20,
+                        lenmode="pixels", len=300,
+                        yanchor="middle"
+                    )
+                )
+                self._report_html = report_fig.to_html(include_plotlyjs='cdn', full_html=False)
+            return self._report_html
+
+
+_maps = OrderedDict()
+_maps_lock = threading.Lock()
+
+
+def get_market_map(df, min_change, max_change):
+    key = f"{data_hash(df)}:{min_change}:{max_change}"
+    with _maps_lock:
+        cached = _maps.get(key)
+        if cached is not None:
+            _maps.move_to_end(key)
+            return cached
+
+    market_map = MarketMap(key, build_market_map(df, min_change, max_change))
+    with _maps_lock:
+        market_map = _maps.setdefault(key, market_map)
+        _maps.move_to_end(key)
+        while len(_maps) > MAX_CACHED_MAPS:
+            _maps.popitem(last=False)
+    return market_map
@@ -0,0 +1,239 @@
+import base64
+import binascii
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+CACHE_DIR = os.environ.get("ECHOES_CACHE_DIR", ".cache")
+HTTP_CACHE_PATH = os.path.join(CACHE_DIR, "http.sqlite3")
+DEFAULT_MAX_AGE_SECONDS = 3600
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+GOOGLE_NEWS_HOST = 'news.google.com'
+GOOGLE_NEWS_ARTICLE_RE = re.compile(r'^/rss/articles/([A-Za-z0-9_-]+)')
+GOOGLE_NEWS_TARGET_RE = re.compile(rb'data-n-au="(https?://[^"]+)"')
+
+
+def read_body(response, max_bytes=None):
+    # Streams at most ``max_bytes`` of the body, so oversized pages are cut off on the wire.
+    if max_bytes is None:
+        return response.content
+    chunks, size = [], 0
+    for chunk in response.iter_content(chunk_size=READ_CHUNK_BYTES):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            break
+    return b''.join(chunks)[:max_bytes]
+
+
+def make_response(url, status, headers, body, from_cache):
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = body
+    response._content_consumed = True
+    response.from_cache = from_cache
+    return response
+
+
+def fetch(session, url, timeout, max_bytes=None, headers=None):
+    with session.get(url, timeout=timeout, headers=headers, stream=True) as response:
+        if response.status_code == 304:
+            return make_response(response.url, 304, response.headers, b'', False)
+        response.raise_for_status()
+        body = read_body(response, max_bytes)
+        fetched = make_response(response.url, response.status_code, response.headers, body, False)
+        fetched.history = response.history
+        return fetched
+
+
+def decode_google_news_id(article_id):
+    # Older Google News article ids are base64 protobuf messages that embed the publisher URL
+    # as a length-prefixed string; newer ones are opaque and need a round trip.
+    try:
+        data = base64.urlsafe_b64decode(article_id + '=' * (-len(article_id) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    start = data.find(b'http')
+    if start < 1:
+        return None
+    length = data[start - 1]
+    if start >= 2 and data[start - 2] & 0x80:
+        length = (data[start - 2] & 0x7f) | (data[start - 1] << 7)
+    try:
+        url = data[start:start + length].decode('ascii')
+    except UnicodeDecodeError:
+        return None
+    return url if urlsplit(url).netloc and ' ' not in url else None
+
+
+# Transport-level cache for ingestion GETs. Bodies are zlib-compressed into SQLite next to the
+# report cache; entries younger than ``max_age`` are served without touching the network, older
+# ones are revalidated with If-None-Match / If-Modified-Since so unchanged pages cost a 304.
+# Entries are dropped ``ttl`` seconds after they were fetched and least-recently-used first once
+# the compressed bodies exceed ``max_bytes``.
+class HttpCache:
+    def __init__(self, path=HTTP_CACHE_PATH, max_age=DEFAULT_MAX_AGE_SECONDS, ttl=DEFAULT_TTL_SECONDS,
+                 max_bytes=DEFAULT_MAX_BYTES, level=6, redirect_hosts=(GOOGLE_NEWS_HOST,)):
+        self.path = path
+        self.max_age = max_age
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.level = level
+        self.redirect_hosts = set(redirect_hosts)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, status INTEGER NOT NULL, headers TEXT NOT NULL, "
+                "body BLOB NOT NULL, size INTEGER NOT NULL, raw_size INTEGER NOT NULL, "
+                "fetched REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS redirects (url TEXT PRIMARY KEY, target TEXT NOT NULL, created REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "INSERT OR IGNORE INTO counters VALUES "
+                "('hits', 0), ('revalidated', 0), ('misses', 0), ('bytes_downloaded', 0), ('bytes_served', 0)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _count(self, conn, **amounts):
+        conn.executemany("UPDATE counters SET value = value + ? WHERE name = ?", [(value, name) for name, value in amounts.items()])
+
+    def _entry(self, conn, url, now):
+        row = conn.execute("SELECT status, headers, body, fetched FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        if now - row[3] > self.ttl:
+            conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            return None
+        return row
+
+    def get(self, session, url, timeout=10, max_bytes=None, before_request=None):
+        # Responses are stored under their final URL, and redirects seen before are followed
+        # from the cache so revalidation goes straight to the target.
+        now = time.time()
+        with self._connect() as conn:
+            url = self._redirect(conn, url) or url
+            entry = self._entry(conn, url, now)
+        headers = {}
+        if entry is not None:
+            status, stored_headers, body, fetched = entry
+            stored_headers = json.loads(stored_headers)
+            if now - fetched <= self.max_age:
+                return self._serve(url, status, stored_headers, body, now, 'hits')
+            if 'ETag' in stored_headers:
+                headers['If-None-Match'] = stored_headers['ETag']
+            if 'Last-Modified' in stored_headers:
+                headers['If-Modified-Since'] = stored_headers['Last-Modified']
+
+        if before_request is not None:
+            before_request(url)
+        response = fetch(session, url, timeout, max_bytes, headers)
+        if response.status_code == 304 and entry is not None:
+            with self._connect() as conn:
+                conn.execute("UPDATE responses SET fetched = ? WHERE url = ?", (now, url))
+            return self._serve(url, status, stored_headers, body, now, 'revalidated')
+        self.store(url, response)
+        return response
+
+    def _serve(self, url, status, headers, body, now, counter):
+        content = zlib.decompress(body)
+        with self._connect() as conn:
+            conn.execute("UPDATE responses SET accessed = ? WHERE url = ?", (now, url))
+            self._count(conn, **{counter: 1, 'bytes_served': len(content)})
+        return make_response(url, status, headers, content, True)
+
+    def store(self, url, response):
+        now = time.time()
+        content = response.content
+        body = zlib.compress(content, self.level)
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        with self._connect() as conn:
+            self._count(conn, misses=1, bytes_downloaded=len(content))
+            if response.url != url:
+                conn.execute("INSERT OR REPLACE INTO redirects VALUES (?, ?, ?)", (url, response.url, now))
+            if len(body) > self.max_bytes:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (url, status, headers, body, size, raw_size, fetched, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (response.url, response.status_code, json.dumps(headers), body, len(body), len(content), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE fetched < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in conn.execute("SELECT url, size FROM responses ORDER BY accessed ASC").fetchall():
+            conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _redirect(self, conn, url):
+        row = conn.execute("SELECT target FROM redirects WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def remember_redirect(self, url, target):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO redirects VALUES (?, ?, ?)", (url, target, time.time()))
+
+    def resolve(self, session, url, timeout=10, before_request=None):
+        # Maps news.google.com/rss/articles/... links to the publisher URL, decoding the id when
+        # possible and otherwise following the redirect once; the answer is memoized.
+        parts = urlsplit(url)
+        match = GOOGLE_NEWS_ARTICLE_RE.match(parts.path)
+        if parts.netloc not in self.redirect_hosts or not match:
+            return url
+        with self._connect() as conn:
+            target = self._redirect(conn, url)
+        if target is not None:
+            return target
+        target = decode_google_news_id(match.group(1))
+        if target is None:
+            try:
+                response = self.get(session, url, timeout=timeout, before_request=before_request)
+            except requests.RequestException:
+                return url
+            if response.url != url:
+                return response.url
+            # Without an HTTP redirect the publisher URL only appears in the interstitial page.
+            found = GOOGLE_NEWS_TARGET_RE.search(response.content)
+            if found is None:
+                return url
+            target = urljoin(url, found.group(1).decode('ascii', 'replace'))
+        self.remember_redirect(url, target)
+        return target
+
+    def stats(self):
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, total, raw = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0) FROM responses"
+            ).fetchone()
+            redirects = conn.execute("SELECT COUNT(*) FROM redirects").fetchone()[0]
+        return {**counters, 'entries': entries, 'bytes': total, 'raw_bytes': raw, 'redirects': redirects}
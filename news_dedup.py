@@ -0,0 +1,181 @@
+import argparse
+import re
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from news_index import tokenize
+from sentiment import MISSING_DESCRIPTIONS
+from storage import NEWS_CSV
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.5
+SHINGLE_SIZE = 2
+BLOCK_SHINGLES = 1 << 18
+MAX_SUFFIX_WORDS = 6
+SUFFIX_RE = re.compile(r"\s+-\s+([^-]+)$")
+
+
+def strip_source(title, source=None):
+    # Google News titles end in " - <publisher>"; drop it so copies of a wire story line up.
+    if not isinstance(title, str):
+        return ''
+    if isinstance(source, str) and source and title.endswith(f" - {source}"):
+        return title[:-len(source) - 3]
+    match = SUFFIX_RE.search(title)
+    if match is not None and len(match.group(1).split()) <= MAX_SUFFIX_WORDS:
+        return title[:match.start()]
+    return title
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        grams = tokens
+    else:
+        grams = (' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+    return {zlib.crc32(gram.encode('utf-8')) for gram in grams}
+
+
+# MinHash with multiply-shift hashing: h(x) = (a * x + b) mod 2**64 >> 32 for odd 64-bit ``a``.
+# Shingles of all documents are laid out flat with per-document offsets, so each block of
+# documents is hashed by every permutation in one vectorized pass and reduced with reduceat.
+class MinHasher:
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets):
+        lengths = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+        flat = np.fromiter((h for s in shingle_sets for h in s), dtype=np.uint64, count=int(lengths.sum()))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        signatures = np.full((len(shingle_sets), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+
+        docs = np.flatnonzero(lengths)
+        ends = offsets[docs + 1]
+        start = 0
+        while start < len(docs):
+            stop = max(start + 1, int(np.searchsorted(ends, offsets[docs[start]] + BLOCK_SHINGLES, side='right')))
+            block = docs[start:stop]
+            lo, hi = offsets[block[0]], offsets[block[-1] + 1]
+            hashed = (flat[None, lo:hi] * self.a[:, None] + self.b[:, None]) >> np.uint64(32)
+            signatures[block] = np.minimum.reduceat(hashed, offsets[block] - lo, axis=1).T.astype(np.uint32)
+            start = stop
+        return signatures
+
+
+def candidate_pairs(signatures, bands=DEFAULT_BANDS, seed=2, groups=None):
+    # LSH banding: documents whose rows agree in any band share a bucket. Each bucket is emitted
+    # as a star around its first member, so work stays linear in the number of documents.
+    # With ``groups`` (one integer per document) buckets never span two groups.
+    if not len(signatures):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    rows = signatures.shape[1] // bands
+    mix = np.random.default_rng(seed).integers(1, 2 ** 63, size=rows + 1, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    group_keys = np.zeros(len(signatures), dtype=np.uint64) if groups is None else np.asarray(groups).astype(np.uint64) * mix[-1]
+    left, right = [], []
+    for band in range(bands):
+        keys = (signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) * mix[:-1]).sum(axis=1, dtype=np.uint64) + group_keys
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        new_bucket = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        first = order[new_bucket][np.cumsum(new_bucket) - 1]
+        members = order != first
+        left.append(first[members])
+        right.append(order[members])
+    pairs = np.unique(np.stack([np.concatenate(left), np.concatenate(right)], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def connected_components(n, left, right):
+    labels = np.arange(n)
+    while len(left):
+        low = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, low)
+        np.minimum.at(updated, right, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    return labels
+
+
+def _canonical_order(news_df):
+    # Prefer copies with an article body, then the earliest published, then feed order.
+    descriptions = news_df['description'] if 'description' in news_df else pd.Series('', index=news_df.index)
+    has_body = ~descriptions.astype(object).fillna('').astype(str).str.strip().isin(MISSING_DESCRIPTIONS)
+    keys = [np.arange(len(news_df))]
+    if 'published' in news_df:
+        published = pd.to_datetime(news_df['published'], utc=True, errors='coerce')
+        keys.append(published.to_numpy(dtype='datetime64[ns]').astype(np.int64))
+    keys.append(~has_body.to_numpy())
+    return np.lexsort(keys)
+
+
+def cluster_news(news_df, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS, seed=1):
+    # Returns news_df with a cluster id, the cluster size and one canonical row per cluster.
+    # Candidate pairs from LSH are confirmed by their estimated Jaccard similarity. Clusters stay
+    # within one country, so every country keeps its own copy of a story covered in several.
+    frame = news_df.reset_index(drop=True)
+    countries = pd.factorize(frame['country'])[0] if 'country' in frame else np.zeros(len(frame), dtype=np.int64)
+    sources = frame['source'] if 'source' in frame else pd.Series(None, index=frame.index)
+    titles = [strip_source(title, source) for title, source in zip(frame['title'], sources)]
+    shingle_sets = [shingles(title) for title in titles]
+    signatures = MinHasher(num_perm, seed).signatures(shingle_sets)
+
+    present = np.flatnonzero([bool(s) for s in shingle_sets])
+    left, right = candidate_pairs(signatures[present], bands, seed + 1, groups=countries[present])
+    left, right = present[left], present[right]
+    similar = ((signatures[left] == signatures[right]).mean(axis=1) >= threshold) & (countries[left] == countries[right])
+    labels = connected_components(len(frame), left[similar], right[similar])
+
+    order = _canonical_order(frame)
+    ranked_labels = labels[order]
+    canonical = np.zeros(len(frame), dtype=bool)
+    _, first = np.unique(ranked_labels, return_index=True)
+    canonical[order[first]] = True
+    _, cluster, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    return frame.assign(cluster=cluster, cluster_size=sizes[cluster], canonical=canonical)
+
+
+def canonical_news(news_df, **options):
+    if news_df.empty or 'title' not in news_df:
+        return news_df.assign(cluster=pd.Series(dtype='int64'), cluster_size=pd.Series(dtype='int64'), canonical=pd.Series(dtype=bool))
+    clustered = cluster_news(news_df, **options)
+    return clustered[clustered['canonical']].reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Group near-duplicate news articles into clusters with MinHash/LSH.")
+    parser.add_argument('--input', default=NEWS_CSV)
+    parser.add_argument('--output', default=None, help="write the articles with cluster columns to this CSV")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--num-perm', type=int, default=DEFAULT_NUM_PERM)
+    parser.add_argument('--bands', type=int, default=DEFAULT_BANDS)
+    parser.add_argument('--show', type=int, default=5, help="print this many of the largest clusters")
+    args = parser.parse_args(argv)
+
+    news_df = pd.read_csv(args.input)
+    started = time.perf_counter()
+    clustered = cluster_news(news_df, threshold=args.threshold, num_perm=args.num_perm, bands=args.bands)
+    seconds = time.perf_counter() - started
+    clusters = clustered['cluster'].nunique()
+    print(f"{len(clustered)} articles -> {clusters} clusters ({len(clustered) - clusters} near-duplicates) in {seconds:.2f}s")
+
+    largest = clustered[clustered['cluster_size'] > 1].sort_values(['cluster_size', 'cluster'], ascending=[False, True])
+    for cluster in largest['cluster'].unique()[:args.show]:
+        rows = largest[largest['cluster'] == cluster]
+        print(f"\n[{len(rows)}] " + "\n    ".join(f"{'*' if row.canonical else ' '} {row.country}: {row.title}" for row in rows.itertuples()))
+    if args.output:
+        clustered.to_csv(args.output, index=False)
+        print(f"\nSaved clusters to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
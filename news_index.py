@@ -0,0 +1,112 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from storage import parse_published
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the to was were will with
+""".split())
+NAT = np.iinfo(np.int64).min
+
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _to_ns(value):
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return ts.value
+
+
+class NewsIndex:
+    def __init__(self, news_df):
+        self.frame = news_df.reset_index(drop=True)
+        if 'published' in self.frame:
+            published = pd.to_datetime(self.frame['published'], utc=True)
+        else:
+            published = pd.to_datetime(self.frame['date'].map(parse_published), utc=True)
+        times = published.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        self.times = times
+
+        order = np.argsort(times, kind='stable')
+        self.sorted_rows = order
+        self.sorted_times = times[order]
+
+        countries = self.frame['country'].astype('category')
+        self.country_names = list(countries.cat.categories)
+        self.country_codes = countries.cat.codes.to_numpy()
+        self.partitions = {}
+        sorted_codes = self.country_codes[order]
+        for code, name in enumerate(self.country_names):
+            rows = order[sorted_codes == code]
+            self.partitions[name] = (rows, times[rows])
+
+        postings = {}
+        texts = self.frame['title'].fillna('').astype(str)
+        if 'description' in self.frame:
+            texts = texts + ' ' + self.frame['description'].fillna('').astype(str)
+        for row, text in enumerate(texts):
+            for token in set(tokenize(text)):
+                postings.setdefault(token, []).append(row)
+        self.postings = {token: np.asarray(rows, dtype=np.int64) for token, rows in postings.items()}
+
+        valid = times[times != NAT]
+        self.min_time = pd.Timestamp(valid.min(), tz='UTC') if len(valid) else None
+        self.max_time = pd.Timestamp(valid.max(), tz='UTC') if len(valid) else None
+
+    def countries(self):
+        return [name for name in self.country_names if len(self.partitions[name][0])]
+
+    def _match(self, query):
+        tokens = set(tokenize(query))
+        if not tokens:
+            return None
+        lists = sorted((self.postings.get(token) for token in tokens), key=lambda rows: -1 if rows is None else len(rows))
+        if lists[0] is None:
+            return np.empty(0, dtype=np.int64)
+        rows = lists[0]
+        for other in lists[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+            if not len(rows):
+                break
+        return rows
+
+    def search(self, query='', country=None, start=None, end=None):
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        matched = self._match(query)
+
+        if matched is not None:
+            mask = np.ones(len(matched), dtype=bool)
+            if country is not None:
+                if country not in self.partitions:
+                    return np.empty(0, dtype=np.int64)
+                mask &= self.country_codes[matched] == self.country_names.index(country)
+            times = self.times[matched]
+            if start_ns is not None:
+                mask &= times >= start_ns
+            if end_ns is not None:
+                mask &= times <= end_ns
+            matched = matched[mask]
+            return matched[np.argsort(self.times[matched], kind='stable')[::-1]]
+
+        if country is None:
+            rows, times = self.sorted_rows, self.sorted_times
+        elif country in self.partitions:
+            rows, times = self.partitions[country]
+        else:
+            return np.empty(0, dtype=np.int64)
+        lo = 0 if start_ns is None else np.searchsorted(times, start_ns, side='left')
+        hi = len(times) if end_ns is None else np.searchsorted(times, end_ns, side='right')
+        return rows[lo:hi][::-1]
+
+    def rows(self, positions):
+        return self.frame.iloc[positions]
@@ -0,0 +1,439 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from contextlib import nullcontext
+from datetime import datetime
+from urllib.parse import quote_plus, urlsplit
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from article_extract import CONTENT_NOT_AVAILABLE, MAX_HTML_BYTES, extract_text, parser_pool
+from http_cache import DEFAULT_MAX_AGE_SECONDS, HTTP_CACHE_PATH, HttpCache, fetch
+from storage import parse_published
+
+COUNTRIES = [
+    'United States', 'Germany', 'United Kingdom', 'France', 'Japan',
+    'Canada', 'Australia', 'Brazil', 'India', 'South Korea', 'China',
+    'Hong Kong', 'Taiwan', 'Netherlands', 'Switzerland', 'Italy',
+    'Spain', 'Sweden', 'Belgium', 'Norway', 'Denmark', 'Finland',
+    'Portugal', 'Greece', 'Poland', 'Turkey','South Africa', 'Nigeria',
+    'Egypt', 'Kenya', 'Russia', 'Myanmar'
+]
+
+GOOGLE_NEWS_RSS = "https://news.google.com/rss/search"
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+MAX_ARTICLES_PER_COUNTRY = 10
+NEWS_COLUMNS = ['country', 'date', 'source', 'title', 'description', 'url']
+NEWS_STORE_PATH = 'global_finance_news.csv'
+CHECKPOINT_PATH = os.path.join(os.environ.get("ECHOES_CACHE_DIR", ".cache"), "news_checkpoint.sqlite3")
+STORE_TAIL_BYTES = 4096
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    def __init__(self, rate=10.0, burst=10):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+def make_session(pool_size=16):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+class NewsFetcher:
+    def __init__(self, session=None, limiter=None, rss_url=GOOGLE_NEWS_RSS, timeout=10, pool_size=16, max_page_bytes=MAX_HTML_BYTES, cache=None):
+        self.session = session or make_session(pool_size)
+        self.limiter = limiter or HostRateLimiter()
+        self.rss_url = rss_url
+        self.timeout = timeout
+        self.max_page_bytes = max_page_bytes
+        self.cache = cache
+
+    def get(self, url, max_bytes=None):
+        # With an HttpCache the limiter only applies to requests that actually reach the network.
+        if self.cache is not None:
+            return self.cache.get(self.session, url, timeout=self.timeout, max_bytes=max_bytes, before_request=self.limiter.wait)
+        self.limiter.wait(url)
+        return fetch(self.session, url, self.timeout, max_bytes)
+
+    def resolve(self, url):
+        if self.cache is None:
+            return url
+        return self.cache.resolve(self.session, url, timeout=self.timeout, before_request=self.limiter.wait)
+
+    def feed_url(self, country, start_date, end_date):
+        query = f"q={quote_plus(country)}+after:{start_date}+before:{end_date}"
+        return f"{self.rss_url}?{query}&hl=en-US&gl=US&ceid=US:en"
+
+    def fetch_google_news(self, country, start_date, end_date):
+        try:
+            return self.get(self.feed_url(country, start_date, end_date)).text
+        except Exception as e:
+            print(f"Error fetching Google News for {country}: {e}")
+            return None
+
+    def fetch_article(self, url):
+        # Only the first ``max_page_bytes`` are downloaded; the article body sits near the top.
+        try:
+            return self.get(self.resolve(url), max_bytes=self.max_page_bytes).content
+        except Exception:
+            return None
+
+    def extract_article_text(self, url):
+        page = self.fetch_article(url)
+        return extract_text(page) if page else CONTENT_NOT_AVAILABLE
+
+
+def extract_page(parsers, page):
+    # Returns a future for the article text; the HTML is parsed in the process pool when there is one.
+    if parsers is None or not page:
+        future = Future()
+        future.set_result(extract_text(page) if page else CONTENT_NOT_AVAILABLE)
+        return future
+    return parsers.submit(extract_text, page)
+
+
+def parse_news_feed(feed_xml, country, limit=MAX_ARTICLES_PER_COUNTRY):
+    articles = []
+    try:
+        soup = BeautifulSoup(feed_xml, 'xml')
+        for item in soup.find_all('item')[:limit]:
+            try:
+                article_url = item.link.text.split('&url=')[-1] if '&url=' in item.link.text else item.link.text
+                articles.append({
+                    'country': country,
+                    'date': item.pubDate.text if item.pubDate else '',
+                    'source': item.source.text if item.source else '',
+                    'title': item.title.text,
+                    'description': '',
+                    'url': article_url
+                })
+            except Exception as e:
+                print(f"Error processing article for {country}: {e}")
+                continue
+    except Exception as e:
+        print(f"Error parsing feed for {country}: {e}")
+    return articles
+
+
+def ingest(countries, start_date, end_date, fetcher=None, max_workers=16, parse_workers=None):
+    fetcher = fetcher or NewsFetcher(pool_size=max_workers)
+    results = {}
+    parsers = parser_pool(parse_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, parsers or nullcontext():
+        feed_futures = {
+            pool.submit(fetcher.fetch_google_news, country, start_date, end_date): country
+            for country in countries
+        }
+        article_futures = {}
+        for future in as_completed(feed_futures):
+            country = feed_futures[future]
+            feed = future.result()
+            articles = parse_news_feed(feed, country) if feed else []
+            results[country] = articles
+            for article in articles:
+                article_futures[pool.submit(fetcher.fetch_article, article['url'])] = article
+
+        text_futures = {}
+        for future in as_completed(article_futures):
+            text_futures[extract_page(parsers, future.result())] = article_futures[future]
+
+        for future in as_completed(text_futures):
+            text_futures[future]['description'] = future.result()
+
+    all_articles = [article for country in countries for article in results.get(country, [])]
+    return pd.DataFrame(all_articles, columns=NEWS_COLUMNS)
+
+
+class RefreshCheckpoint:
+    def __init__(self, path=CHECKPOINT_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        with self.conn:
+            # Articles are seen per country: the same story stored under two countries keeps both rows, as in a full ingest.
+            if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'seen_urls'").fetchone():
+                self.conn.execute("DROP TABLE seen_urls")
+                self.conn.execute("DROP TABLE IF EXISTS meta")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_articles (country TEXT NOT NULL, url TEXT NOT NULL, PRIMARY KEY (country, url))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS windows (country TEXT NOT NULL, period TEXT NOT NULL, newest TEXT NOT NULL, "
+                "PRIMARY KEY (country, period))"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS run_progress (run TEXT NOT NULL, country TEXT NOT NULL, PRIMARY KEY (run, country))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def prepare_store(self, store_path):
+        # The committed prefix is only trusted (and anything after it cut off) while its tail still
+        # matches; a store rewritten by a full ingest is re-seeded instead.
+        committed = self._meta('store_size')
+        if committed is not None and store_tail(store_path, int(committed)) == self._meta('store_tail'):
+            committed = int(committed)
+            if os.path.exists(store_path) and os.path.getsize(store_path) > committed:
+                with open(store_path, 'r+b') as f:
+                    f.truncate(committed)
+            return committed
+
+        size = 0
+        seen = []
+        if os.path.exists(store_path) and os.path.getsize(store_path) > 0:
+            stored = pd.read_csv(store_path, usecols=['country', 'url'], dtype=str).dropna()
+            seen = list(zip(stored['country'], stored['url']))
+            with open(store_path, 'r+b') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+            size = os.path.getsize(store_path)
+        with self.conn:
+            if committed is not None:
+                for table in ('seen_articles', 'windows', 'run_progress'):
+                    self.conn.execute(f"DELETE FROM {table}")
+            self.conn.executemany("INSERT OR IGNORE INTO seen_articles VALUES (?, ?)", seen)
+            self._commit_store(size, store_tail(store_path, size))
+        return size
+
+    def _commit_store(self, size, tail):
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('store_size', ?)", (str(size),))
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('store_tail', ?)", (tail,))
+
+    def unseen(self, country, urls):
+        if not urls:
+            return set()
+        placeholders = ','.join('?' * len(urls))
+        seen = self.conn.execute(
+            f"SELECT url FROM seen_articles WHERE country = ? AND url IN ({placeholders})", [country, *urls]
+        ).fetchall()
+        return set(urls) - {row[0] for row in seen}
+
+    def newest_published(self, country, period):
+        row = self.conn.execute("SELECT newest FROM windows WHERE country = ? AND period = ?", (country, period)).fetchone()
+        return row[0] if row else None
+
+    def completed(self, run):
+        return {row[0] for row in self.conn.execute("SELECT country FROM run_progress WHERE run = ?", (run,))}
+
+    def commit_country(self, run, country, urls, newest, store_size, tail):
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO seen_articles VALUES (?, ?)", ((country, url) for url in urls))
+            if newest is not None:
+                self.conn.execute(
+                    "INSERT INTO windows VALUES (?, ?, ?) ON CONFLICT (country, period) DO UPDATE SET newest = MAX(newest, excluded.newest)",
+                    (country, run, newest),
+                )
+            self.conn.execute("INSERT OR IGNORE INTO run_progress VALUES (?, ?)", (run, country))
+            self._commit_store(store_size, tail)
+
+    def finish_run(self, run):
+        with self.conn:
+            self.conn.execute("DELETE FROM run_progress WHERE run = ?", (run,))
+
+    def close(self):
+        self.conn.close()
+
+
+def store_tail(store_path, size, block=STORE_TAIL_BYTES):
+    # Fingerprint of the store's first ``size`` bytes: their length and a hash of the last block.
+    if size == 0:
+        return '0'
+    if not os.path.exists(store_path) or os.path.getsize(store_path) < size:
+        return None
+    with open(store_path, 'rb') as f:
+        f.seek(max(0, size - block))
+        return f"{size}:{hashlib.sha1(f.read(min(size, block))).hexdigest()}"
+
+
+def append_articles(store_path, articles, committed_size):
+    frame = pd.DataFrame(articles, columns=NEWS_COLUMNS)
+    data = frame.to_csv(index=False, header=committed_size == 0, lineterminator='\n').encode('utf-8')
+    with open(store_path, 'ab') as f:
+        f.truncate(committed_size)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return committed_size + len(data)
+
+
+def newest_date(articles):
+    published = [parse_published(article['date']) for article in articles]
+    published = [value for value in published if not pd.isna(value)]
+    return max(published).strftime('%Y-%m-%d') if published else None
+
+
+def refresh(countries, start_date, end_date, store_path=NEWS_STORE_PATH, checkpoint=None, fetcher=None, max_workers=16, parse_workers=None):
+    checkpoint = checkpoint or RefreshCheckpoint()
+    fetcher = fetcher or NewsFetcher(pool_size=max_workers)
+    parsers = parser_pool(parse_workers)
+    run = f"{start_date}:{end_date}"
+    store_size = checkpoint.prepare_store(store_path)
+    done = checkpoint.completed(run)
+    claimed = set()
+    added = 0
+
+    def commit(country, articles):
+        nonlocal store_size, added
+        if articles:
+            store_size = append_articles(store_path, articles, store_size)
+            added += len(articles)
+        checkpoint.commit_country(run, country, [a['url'] for a in articles], newest_date(articles), store_size,
+                                  store_tail(store_path, store_size))
+        done.add(country)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, parsers or nullcontext():
+        pending = {}
+        for country in countries:
+            if country in done:
+                continue
+            # Repeat runs of a window only ask for the days since its newest stored article (inclusive,
+            # as feeds are day-granular); other windows are fetched in full and deduplicated by country and URL.
+            newest = checkpoint.newest_published(country, run)
+            window_start = min(max(start_date, newest), end_date) if newest else start_date
+            pending[pool.submit(fetcher.fetch_google_news, country, window_start, end_date)] = ('feed', country)
+
+        new_articles = {}
+        remaining = {}
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                kind, payload = pending.pop(future)
+                if kind == 'feed':
+                    country = payload
+                    feed = future.result()
+                    if feed is None:
+                        continue
+                    articles = parse_news_feed(feed, country)
+                    unseen = checkpoint.unseen(country, [a['url'] for a in articles])
+                    fresh = []
+                    for article in articles:
+                        if article['url'] in unseen and (country, article['url']) not in claimed:
+                            claimed.add((country, article['url']))
+                            fresh.append(article)
+                    articles = new_articles[country] = fresh
+                    remaining[country] = len(articles)
+                    for article in articles:
+                        pending[pool.submit(fetcher.fetch_article, article['url'])] = ('page', article)
+                elif kind == 'page':
+                    pending[extract_page(parsers, future.result())] = ('article', payload)
+                    continue
+                else:
+                    country = payload['country']
+                    payload['description'] = future.result()
+                    remaining[country] -= 1
+                if remaining.get(country) == 0:
+                    del remaining[country]
+                    commit(country, new_articles.pop(country))
+
+    if all(country in done for country in countries):
+        checkpoint.finish_run(run)
+    return added
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch Google News articles for each country into a CSV.")
+    parser.add_argument('--start', default=datetime(2025, 4, 1).strftime('%Y-%m-%d'))
+    parser.add_argument('--end', default=datetime(2025, 4, 7).strftime('%Y-%m-%d'))
+    parser.add_argument('--countries', nargs='+', default=COUNTRIES)
+    parser.add_argument('--output', default=NEWS_STORE_PATH)
+    parser.add_argument('--incremental', action='store_true', help="append only unseen articles and resume interrupted runs")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=10.0, help="requests per second allowed per host")
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--parse-workers', type=int, default=None, help="processes parsing article HTML (default: CPU count - 1, 0 parses in the fetch threads)")
+    parser.add_argument('--max-page-bytes', type=int, default=MAX_HTML_BYTES, help="download at most this many bytes per article page")
+    parser.add_argument('--rss-url', default=GOOGLE_NEWS_RSS)
+    parser.add_argument('--http-cache', default=HTTP_CACHE_PATH, help="on-disk cache of feeds and article pages")
+    parser.add_argument('--no-http-cache', action='store_true', help="always download feeds and pages")
+    parser.add_argument('--max-age', type=int, default=DEFAULT_MAX_AGE_SECONDS, help="seconds before a cached response is revalidated")
+    return parser.parse_args(argv)
+
+
+def print_cache_stats(cache, before):
+    if cache is not None:
+        stats = {name: value - before.get(name, 0) for name, value in cache.stats().items()}
+        print(f"HTTP cache: {stats['hits']} fresh, {stats['revalidated']} revalidated, {stats['misses']} downloaded "
+              f"({stats['bytes_downloaded'] / 1e6:.1f} MB down, {stats['bytes_served'] / 1e6:.1f} MB from cache)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    fetcher = NewsFetcher(
+        limiter=HostRateLimiter(rate=args.rate, burst=args.burst),
+        rss_url=args.rss_url,
+        pool_size=args.workers,
+        max_page_bytes=args.max_page_bytes,
+        cache=None if args.no_http_cache else HttpCache(args.http_cache, max_age=args.max_age),
+    )
+    cache_before = fetcher.cache.stats() if fetcher.cache is not None else {}
+    started = time.perf_counter()
+    if args.incremental:
+        checkpoint = RefreshCheckpoint(args.checkpoint)
+        try:
+            added = refresh(args.countries, args.start, args.end, store_path=args.output,
+                            checkpoint=checkpoint, fetcher=fetcher, max_workers=args.workers,
+                            parse_workers=args.parse_workers)
+        finally:
+            checkpoint.close()
+        print(f"Appended {added} new articles to {args.output} in {time.perf_counter() - started:.1f}s")
+        print_cache_stats(fetcher.cache, cache_before)
+        return
+
+    df = ingest(args.countries, args.start, args.end, fetcher=fetcher, max_workers=args.workers, parse_workers=args.parse_workers)
+    df.to_csv(args.output, index=False)
+    print(f"Saved {len(df)} articles to {args.output} in {time.perf_counter() - started:.1f}s")
+    print_cache_stats(fetcher.cache, cache_before)
+
+
+if __name__ == "__main__":
+    main()
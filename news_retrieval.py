@@ -0,0 +1,191 @@
+import zlib
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from news_index import tokenize
+from prompt_encoder import count_tokens
+from sentiment import article_text
+
+DEFAULT_QUERY = "tariff tariffs trade war deal market markets stocks shares exports imports economy economic recession"
+DEFAULT_DIM = 4096
+DEFAULT_EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+# Row-compressed (CSR) vectors: an article keeps only its few dozen hashed features instead of a
+# dense DEFAULT_DIM row. Indexing and ``@`` behave like the dense matrix NewsVectors otherwise uses.
+class SparseRows:
+    def __init__(self, indptr, indices, data, dim):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.dim = dim
+
+    @classmethod
+    def from_counts(cls, rows, columns, num_rows, dim):
+        # Each (row, column) entry counts once; cells are sorted in place and counted by run length.
+        cells = rows * dim + columns
+        cells.sort()
+        starts = np.flatnonzero(np.concatenate(([True], cells[1:] != cells[:-1]))) if len(cells) else np.empty(0, dtype=np.int64)
+        data = np.diff(np.append(starts, len(cells))).astype(np.float32)
+        cells = cells[starts]
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(cells // dim, minlength=num_rows)))).astype(np.int64)
+        return cls(indptr, (cells % dim).astype(np.int32), data, dim)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def shape(self):
+        return len(self), self.dim
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    def row_ids(self):
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+    def __getitem__(self, rows):
+        if isinstance(rows, (int, np.integer)):
+            lo, hi = self.indptr[rows], self.indptr[rows + 1]
+            row = np.zeros(self.dim, dtype=np.float32)
+            row[self.indices[lo:hi]] = self.data[lo:hi]
+            return row
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, lengths = self.indptr[rows], self.indptr[rows + 1] - self.indptr[rows]
+        indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        take = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SparseRows(indptr, self.indices[take], self.data[take], self.dim)
+
+    def __matmul__(self, vector):
+        products = self.data * vector[self.indices]
+        return np.bincount(self.row_ids(), weights=products, minlength=len(self)).astype(np.float32)
+
+    def normalized(self):
+        norms = np.sqrt(np.bincount(self.row_ids(), weights=self.data.astype(np.float64) ** 2, minlength=len(self)))
+        scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        return SparseRows(self.indptr, self.indices, (self.data * scale[self.row_ids()]).astype(np.float32), self.dim)
+
+
+# TF-IDF over hashed unigrams and bigrams, so retrieval works without a model download.
+class HashingEmbedder:
+    def __init__(self, dim=DEFAULT_DIM):
+        self.name = f"hashing-{dim}"
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def _counts(self, texts):
+        columns, lengths = array('q'), array('q')
+        for text in texts:
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            columns.extend(zlib.crc32(feature.encode('utf-8')) % self.dim for feature in features)
+            lengths.append(len(features))
+        columns, lengths = np.frombuffer(columns, dtype=np.int64), np.frombuffer(lengths, dtype=np.int64)
+        counts = SparseRows.from_counts(np.repeat(np.arange(len(lengths)), lengths), columns, len(lengths), self.dim)
+        counts.data = np.log1p(counts.data)
+        return counts
+
+    def fit(self, texts):
+        present = np.bincount(self._counts(texts).indices, minlength=self.dim)
+        self.idf = (np.log((1 + len(texts)) / (1 + present)) + 1.0).astype(np.float32)
+        return self
+
+    def encode(self, texts):
+        counts = self._counts(texts)
+        counts.data *= self.idf[counts.indices]
+        return counts.normalized()
+
+
+class TransformerEmbedder:
+    def __init__(self, model_name=DEFAULT_EMBEDDING_MODEL, max_length=128, batch_size=64):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self.torch = torch
+        self.name = model_name
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+
+    def fit(self, texts):
+        return self
+
+    def encode(self, texts):
+        texts = list(texts)
+        vectors = np.zeros((len(texts), self.model.config.hidden_size), dtype=np.float32)
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        with self.torch.inference_mode():
+            for lo in range(0, len(order), self.batch_size):
+                batch = order[lo:lo + self.batch_size]
+                inputs = self.tokenizer([texts[i] for i in batch], padding='longest', truncation=True,
+                                        max_length=self.max_length, return_tensors='pt')
+                hidden = self.model(**inputs).last_hidden_state
+                mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                vectors[batch] = ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).numpy()
+        return _normalize(vectors)
+
+
+class NewsVectors:
+    def __init__(self, news_df, embedder=None):
+        self.frame = news_df.reset_index(drop=True)
+        self.embedder = embedder or HashingEmbedder()
+        texts = [article_text(title, description) for title, description in zip(self.frame['title'], self.frame['description'])]
+        self.vectors = self.embedder.fit(texts).encode(texts)
+        self.tokens = np.fromiter((count_tokens(text) for text in texts), dtype=np.int64, count=len(texts))
+
+        first_seen = ~self.frame['url'].duplicated().to_numpy() if 'url' in self.frame else np.ones(len(self.frame), dtype=bool)
+        countries = self.frame['country'].astype(str).to_numpy()
+        self.partitions = {
+            name: np.flatnonzero((countries == name) & first_seen)
+            for name in pd.unique(countries)
+        }
+
+    def search(self, query, country=None, k=10):
+        rows = self.partitions.get(country, np.empty(0, dtype=np.int64)) if country is not None else np.arange(len(self.frame))
+        scores = self.vectors[rows] @ self.embedder.encode([query])[0]
+        top = np.argsort(-scores, kind='stable')[:k]
+        return rows[top], scores[top]
+
+    def select(self, countries, query=DEFAULT_QUERY, per_country=2, token_budget=1200, diversity=0.3, min_relevance=0.05):
+        # Round-robin over countries (most important first) so the token budget is shared,
+        # scoring candidates by maximal marginal relevance against everything already picked.
+        countries = [country for country in countries if len(self.partitions.get(country, ()))]
+        if not countries:
+            return np.empty(0, dtype=np.int64)
+        query_vector = self.embedder.encode([query])[0]
+        vectors = {country: self.vectors[self.partitions[country]] for country in countries}
+        relevance = {country: vectors[country] @ query_vector for country in countries}
+        redundancy = {country: np.zeros(len(self.partitions[country]), dtype=np.float32) for country in countries}
+        available = {country: relevance[country] >= min_relevance for country in countries}
+        picked = {country: [] for country in countries}
+        spent = 0
+
+        for _ in range(per_country):
+            for country in countries:
+                rows = self.partitions[country]
+                fits = available[country] & (self.tokens[rows] <= token_budget - spent)
+                if not fits.any():
+                    continue
+                scores = (1 - diversity) * relevance[country] - diversity * redundancy[country]
+                best = int(np.argmax(np.where(fits, scores, -np.inf)))
+                row = rows[best]
+                available[country][best] = False
+                picked[country].append(row)
+                spent += int(self.tokens[row])
+                picked_vector = self.vectors[int(row)]
+                for other in countries:
+                    redundancy[other] = np.maximum(redundancy[other], vectors[other] @ picked_vector)
+
+        return np.asarray([row for country in countries for row in picked[country]], dtype=np.int64)
+
+    def rows(self, positions):
+        return self.frame.iloc[positions]
@@ -0,0 +1,218 @@
+import argparse
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from storage import DATA_DIR, INDICES_CSV
+
+OHLCV_DIR = os.path.join(DATA_DIR, 'ohlcv')
+DEFAULT_START = '2015-01-01'
+
+# Google Finance style tickers from global_indices.csv -> Yahoo Finance symbols.
+# Indices Yahoo does not carry are left out and skipped on download.
+YAHOO_SYMBOLS = {
+    'INDEXNASDAQ:.IXIC': '^IXIC',
+    'INDEXDB:DAX': '^GDAXI',
+    'INDEXFTSE:UKX': '^FTSE',
+    'INDEXEURO:PX1': '^FCHI',
+    'INDEXNIKKEI:NI225': '^N225',
+    'INDEXTSI:OSPTX': '^GSPTSE',
+    'INDEXASX:XJO': '^AXJO',
+    'INDEXBVMF:BVSP': '^BVSP',
+    'NSE:NIFTY': '^NSEI',
+    'INDEXKRX:KOSPI': '^KS11',
+    'INDEXSHA:000001': '000001.SS',
+    'INDEXHANGSENG:HSI': '^HSI',
+    'INDEXTPEX:TWII': '^TWII',
+    'INDEXEURO:AEX': '^AEX',
+    'INDEXSWI:SSMI': '^SSMI',
+    'INDEXFTSE:FTSEMIB': 'FTSEMIB.MI',
+    'INDEXBME:IBEX': '^IBEX',
+    'INDEXOMX:OMX': '^OMX',
+    'INDEXEURO:BEL20': '^BFX',
+    'INDEXOSL:OSEAX': 'OSEBX.OL',
+    'INDEXOMX:OMXC20': '^OMXC25',
+    'INDEXOMX:OMXH25': '^OMXH25',
+    'INDEXEURO:PSI20': 'PSI20.LS',
+    'INDEXFTSE:ATX': 'GD.AT',
+    'INDEXWIG:WIG': 'WIG20.WA',
+    'INDEXIST:XU100': 'XU100.IS',
+    'JTOPI': '^J200.JO',
+    'EGX30': '^CASE30',
+    'RTSI': 'RTSI.ME',
+}
+
+FIELDS = {
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Adj Close': 'adj_close',
+    'Volume': 'volume',
+}
+
+OHLCV_SCHEMA = pa.schema([
+    ('date', pa.date32()),
+    ('ticker', pa.string()),
+    ('symbol', pa.string()),
+    ('open', pa.float64()),
+    ('high', pa.float64()),
+    ('low', pa.float64()),
+    ('close', pa.float64()),
+    ('adj_close', pa.float64()),
+    ('volume', pa.float64()),
+])
+
+PARTITIONING = ds.partitioning(pa.schema([('ticker', pa.string())]), flavor='hive')
+
+
+def provider_symbol(ticker):
+    return YAHOO_SYMBOLS.get(ticker)
+
+
+def yahoo_download(symbols, start, end):
+    import yfinance as yf
+    return yf.download(
+        symbols,
+        start=start,
+        end=end,
+        group_by='ticker',
+        auto_adjust=False,
+        threads=True,
+        progress=False,
+    )
+
+
+def replay_download(path):
+    recorded = pd.read_parquet(path)
+
+    def download(symbols, start, end):
+        dates = pd.to_datetime(recorded.index.get_level_values(0))
+        mask = (dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end))
+        frame = recorded[mask]
+        return frame[[column for column in frame.columns if column[0] in symbols]]
+
+    return download
+
+
+def to_long(wide, symbols):
+    if wide is None or wide.empty:
+        return pd.DataFrame(columns=[field.name for field in OHLCV_SCHEMA])
+    if not isinstance(wide.columns, pd.MultiIndex):
+        wide = pd.concat({symbols[0]: wide}, axis=1)
+    long = wide.stack(level=0, future_stack=True).rename(columns=FIELDS)
+    long.index.names = ['date', 'symbol']
+    long = long.reset_index().dropna(subset=['close'])
+    long['date'] = pd.to_datetime(long['date']).dt.date
+    for column in FIELDS.values():
+        if column not in long:
+            long[column] = float('nan')
+    return long
+
+
+def load_dataset(root=OHLCV_DIR):
+    if not os.path.isdir(root):
+        return None
+    return ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+
+
+def last_dates(root=OHLCV_DIR):
+    dataset = load_dataset(root)
+    if dataset is None:
+        return {}
+    table = dataset.to_table(columns=['ticker', 'date'])
+    if table.num_rows == 0:
+        return {}
+    latest = table.group_by('ticker').aggregate([('date', 'max')]).to_pydict()
+    return dict(zip(latest['ticker'], latest['date_max']))
+
+
+def write_partitions(long, root=OHLCV_DIR):
+    if long.empty:
+        return 0
+    table = pa.Table.from_pandas(long[[field.name for field in OHLCV_SCHEMA]], schema=OHLCV_SCHEMA, preserve_index=False)
+    stamp = f"{long['date'].min():%Y%m%d}-{long['date'].max():%Y%m%d}"
+    ds.write_dataset(
+        table,
+        root,
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template=f"part-{stamp}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+    )
+    return table.num_rows
+
+
+def refresh(tickers, end=None, start=DEFAULT_START, root=OHLCV_DIR, download=yahoo_download):
+    end = pd.Timestamp(end or date.today() + timedelta(days=1)).date()
+    known = last_dates(root)
+
+    wanted = {}
+    for ticker in tickers:
+        symbol = provider_symbol(ticker)
+        if symbol is None:
+            print(f"No provider symbol for {ticker}, skipping")
+            continue
+        first_missing = known[ticker] + timedelta(days=1) if ticker in known else pd.Timestamp(start).date()
+        if first_missing < end:
+            wanted[symbol] = (ticker, first_missing)
+
+    if not wanted:
+        return 0
+
+    symbols = sorted(wanted)
+    batch_start = min(first_missing for _, first_missing in wanted.values())
+    long = to_long(download(symbols, batch_start.isoformat(), end.isoformat()), symbols)
+
+    long['ticker'] = long['symbol'].map(lambda symbol: wanted[symbol][0])
+    first_missing = long['symbol'].map(lambda symbol: wanted[symbol][1])
+    long = long[(long['date'] >= first_missing) & (long['date'] < end)]
+    return write_partitions(long, root)
+
+
+def load_ohlcv(tickers=None, start=None, end=None, columns=None, root=OHLCV_DIR):
+    dataset = load_dataset(root)
+    if dataset is None:
+        return pd.DataFrame(columns=[field.name for field in OHLCV_SCHEMA])
+    condition = None
+    if tickers is not None:
+        condition = ds.field('ticker').isin(list(tickers))
+    if start is not None:
+        bound = ds.field('date') >= pd.Timestamp(start).date()
+        condition = bound if condition is None else condition & bound
+    if end is not None:
+        bound = ds.field('date') <= pd.Timestamp(end).date()
+        condition = bound if condition is None else condition & bound
+    table = dataset.to_table(columns=columns, filter=condition)
+    return table.to_pandas().sort_values(['ticker', 'date'], ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download daily OHLCV for every index ticker into a partitioned store.")
+    parser.add_argument('--indices', default=INDICES_CSV)
+    parser.add_argument('--start', default=DEFAULT_START)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--root', default=OHLCV_DIR)
+    parser.add_argument('--record', help="also save the raw provider response to this parquet file")
+    parser.add_argument('--replay', help="read a recorded provider response instead of downloading")
+    args = parser.parse_args(argv)
+
+    tickers = pd.read_csv(args.indices)['Ticker'].tolist()
+    download = replay_download(args.replay) if args.replay else yahoo_download
+    if args.record:
+        inner = download
+
+        def download(symbols, start, end):
+            wide = inner(symbols, start, end)
+            wide.to_parquet(args.record)
+            return wide
+
+    written = refresh(tickers, end=args.end, start=args.start, root=args.root, download=download)
+    print(f"Stored {written} new daily rows under {args.root}")
+
+
+if __name__ == "__main__":
+    main()
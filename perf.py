@@ -0,0 +1,85 @@
+import contextvars
+import functools
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_recorder = contextvars.ContextVar('perf_recorder', default=None)
+
+
+# Collects the stages timed during one page run (or one batch task) in the order they started,
+# with their nesting depth, so a run can be shown as an indented table.
+class StageRecorder:
+    def __init__(self, run=None):
+        self.run = run or uuid.uuid4().hex[:8]
+        self.stages = []
+        self.depth = 0
+
+    def total(self):
+        return sum(entry['seconds'] or 0.0 for entry in self.stages if entry['depth'] == 0)
+
+    def rows(self):
+        return [
+            {'stage': '· ' * entry['depth'] + entry['stage'], 'ms': round((entry['seconds'] or 0.0) * 1000, 1),
+             **{key: value for key, value in entry.items() if key not in ('stage', 'seconds', 'depth')}}
+            for entry in self.stages
+        ]
+
+
+def current():
+    return _recorder.get()
+
+
+@contextmanager
+def recording(recorder=None):
+    recorder = recorder or StageRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def _log(entry, recorder):
+    logger.info(json.dumps({**entry, 'seconds': round(entry['seconds'], 6), 'run': recorder.run if recorder else None}, default=str))
+
+
+@contextmanager
+def stage(name, **fields):
+    # Every stage is logged as one JSON object on the "perf" logger, recorder or not.
+    recorder = _recorder.get()
+    entry = {'stage': name, 'seconds': None, 'depth': recorder.depth if recorder else 0, **fields}
+    if recorder is not None:
+        recorder.stages.append(entry)
+        recorder.depth += 1
+    started = time.perf_counter()
+    try:
+        yield entry
+    finally:
+        entry['seconds'] = time.perf_counter() - started
+        if recorder is not None:
+            recorder.depth -= 1
+        _log(entry, recorder)
+
+
+def record(name, seconds, **fields):
+    # For work timed elsewhere, e.g. report sections that ran on a backend's executor threads.
+    recorder = _recorder.get()
+    entry = {'stage': name, 'seconds': seconds, 'depth': recorder.depth if recorder else 0, **fields}
+    if recorder is not None:
+        recorder.stages.append(entry)
+    _log(entry, recorder)
+
+
+def timed(name=None):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,81 @@
+import logging
+import math
+import re
+from string import Template
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PIECE_RE = re.compile(r"\w+|[^\w\s]")
+CHARS_PER_TOKEN = 4
+FIELD_SEPARATOR = '|'
+
+
+def count_tokens(text):
+    # Word-piece style estimate: punctuation is one token, words one token per four characters.
+    if not isinstance(text, str):
+        return 0
+    return sum(math.ceil(len(piece) / CHARS_PER_TOKEN) for piece in PIECE_RE.findall(text))
+
+
+def _clean(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    if isinstance(value, float):
+        return f"{value:.2f}".rstrip('0').rstrip('.')
+    return ' '.join(str(value).replace(FIELD_SEPARATOR, '/').split())
+
+
+def encode_rows(df, columns):
+    columns = [column for column in columns if column in df]
+    header = FIELD_SEPARATOR.join(columns)
+    rows = [FIELD_SEPARATOR.join(map(_clean, values)) for values in df[columns].itertuples(index=False, name=None)]
+    return header, rows
+
+
+class PromptTable:
+    def __init__(self, name, df, columns):
+        self.name = name
+        self.header, self.rows = encode_rows(df, columns)
+        self.header_tokens = count_tokens(self.header) + 1
+        self.row_tokens = [count_tokens(row) + 1 for row in self.rows]
+
+    def render(self, kept):
+        return '\n'.join([self.header, *self.rows[:kept]])
+
+
+class EncodedPrompt:
+    def __init__(self, text, tokens, rows, total_rows):
+        self.text = text
+        self.tokens = tokens
+        self.rows = rows
+        self.total_rows = total_rows
+
+    @property
+    def truncated(self):
+        return any(self.rows[name] < self.total_rows[name] for name in self.rows)
+
+    def log(self, label, **extra):
+        counts = ', '.join(f"{name} {self.rows[name]}/{self.total_rows[name]} rows" for name in self.rows)
+        details = ''.join(f", {key} {value}" for key, value in extra.items())
+        logger.info("%s prompt: %d tokens, %d chars, %s%s", label, self.tokens, len(self.text), counts, details)
+
+
+def build_prompt(template, tables, max_tokens=None, **values):
+    # Rows are assumed to be in priority order and tables are listed most important
+    # first, so truncation always drops the tail rows of the last table that still has any.
+    template = template if isinstance(template, Template) else Template(template)
+    fixed = template.safe_substitute({table.name: '' for table in tables}, **values)
+    budget = None if max_tokens is None else max_tokens - count_tokens(fixed) - sum(table.header_tokens for table in tables)
+
+    kept = {table.name: len(table.rows) for table in tables}
+    if budget is not None:
+        used = sum(sum(table.row_tokens) for table in tables)
+        for table in reversed(tables):
+            while used > budget and kept[table.name]:
+                kept[table.name] -= 1
+                used -= table.row_tokens[kept[table.name]]
+
+    text = template.substitute({table.name: table.render(kept[table.name]) for table in tables}, **values)
+    return EncodedPrompt(text, count_tokens(text), kept, {table.name: len(table.rows) for table in tables})
@@ -0,0 +1,305 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_BASE = 'https://generativelanguage.googleapis.com'
+GEMINI_TIMEOUT_SECONDS = 60
+MAX_CONCURRENT_REQUESTS = 4
+LOCAL_MODEL = os.environ.get('ECHOES_LOCAL_MODEL', 'Qwen/Qwen2.5-0.5B-Instruct')
+LOCAL_MAX_NEW_TOKENS = 384
+LOCAL_MAX_SECONDS = 60
+# Sections queue on one local model, so a report's sections share this budget instead of taking 60s each.
+LOCAL_MAX_TOTAL_SECONDS = 120
+TRIP_STATUS_CODES = {401, 403, 429}
+
+
+class BackendUnavailable(RuntimeError):
+    pass
+
+
+class Completion(str):
+    # Text that remembers which backend produced it; fallback output is not worth caching.
+    def __new__(cls, text, backend, cacheable=True):
+        completion = super().__new__(cls, text)
+        completion.backend = backend
+        completion.cacheable = cacheable
+        return completion
+
+
+class ReportBackend:
+    name = 'backend'
+    max_workers = 1
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+
+    def available(self):
+        return True
+
+    def generate(self, prompt):
+        raise NotImplementedError
+
+    def stream(self, prompt):
+        yield self.generate(prompt)
+
+    async def agenerate(self, prompt):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.generate, prompt)
+
+
+class GeminiBackend(ReportBackend):
+    def __init__(self, api_key, model, base_url=None, timeout=GEMINI_TIMEOUT_SECONDS, pool_size=MAX_CONCURRENT_REQUESTS):
+        base_url = (base_url or os.environ.get('GEMINI_API_BASE', GEMINI_API_BASE)).rstrip('/')
+        self.name = model
+        self.max_workers = pool_size
+        super().__init__()
+        self.api_key = api_key
+        self.url = f"{base_url}/v1beta/models/{model}"
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount(base_url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    def available(self):
+        return bool(self.api_key)
+
+    def _post(self, method, prompt, **kwargs):
+        if not self.api_key:
+            raise BackendUnavailable("No Gemini API key configured")
+        response = self.session.post(
+            f"{self.url}:{method}",
+            json={'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]},
+            headers={'x-goog-api-key': self.api_key},
+            timeout=self.timeout,
+            **kwargs,
+        )
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _text(payload):
+        candidates = payload.get('candidates') or []
+        if not candidates:
+            return ''
+        return ''.join(part.get('text', '') for part in candidates[0].get('content', {}).get('parts', []))
+
+    def generate(self, prompt):
+        text = self._text(self._post('generateContent', prompt).json())
+        if not text:
+            raise ValueError("Model returned no candidates")
+        return text
+
+    def stream(self, prompt):
+        with self._post('streamGenerateContent', prompt, params={'alt': 'sse'}, stream=True) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith('data:'):
+                    text = self._text(json.loads(line[len('data:'):]))
+                    if text:
+                        yield text
+
+
+class LocalBackend(ReportBackend):
+    # Requests wait on ``busy`` rather than in the executor queue, so they can split the time budget.
+    max_workers = MAX_CONCURRENT_REQUESTS
+
+    def __init__(self, model_name=LOCAL_MODEL, max_new_tokens=LOCAL_MAX_NEW_TOKENS, max_seconds=LOCAL_MAX_SECONDS,
+                 max_total_seconds=LOCAL_MAX_TOTAL_SECONDS, threads=None):
+        self.name = f"local:{model_name}"
+        super().__init__()
+        self.model_name = model_name
+        self.max_new_tokens = max_new_tokens
+        self.max_seconds = max_seconds
+        self.max_total_seconds = max_total_seconds
+        self.threads = threads
+        self.lock = threading.Lock()
+        self.busy = threading.Lock()
+        self.budget_lock = threading.Lock()
+        self.waiting = 0
+        self.deadline = None
+        self.model = None
+        self.load_error = None
+
+    def load(self):
+        with self.lock:
+            if self.model is not None or self.load_error is not None:
+                return self.model is not None
+            try:
+                import torch
+                from transformers import AutoModelForCausalLM, AutoTokenizer
+
+                if self.threads:
+                    torch.set_num_threads(self.threads)
+                self.torch = torch
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                self.model = AutoModelForCausalLM.from_pretrained(self.model_name).eval()
+            except Exception as e:
+                logger.warning("local model %s unavailable: %s", self.model_name, e)
+                self.load_error = e
+            return self.model is not None
+
+    def available(self):
+        return self.load()
+
+    def warm(self):
+        if self.load():
+            started = time.perf_counter()
+            self._complete("Reply with OK.", max_new_tokens=2)
+            logger.info("warmed %s in %.2fs", self.name, time.perf_counter() - started)
+
+    def _inputs(self, prompt):
+        if getattr(self.tokenizer, 'chat_template', None):
+            prompt = self.tokenizer.apply_chat_template([{'role': 'user', 'content': prompt}], tokenize=False, add_generation_prompt=True)
+        return self.tokenizer(prompt, return_tensors='pt')
+
+    def _time_share(self):
+        # Whatever is left of the budget is split evenly between this call and the ones queued behind it.
+        with self.budget_lock:
+            seconds = min(self.max_seconds, (self.deadline - time.monotonic()) / self.waiting)
+        if seconds <= 0:
+            raise BackendUnavailable(f"{self.name} used up its {self.max_total_seconds}s budget for queued requests")
+        return seconds
+
+    def _complete(self, prompt, max_new_tokens):
+        inputs = self._inputs(prompt)
+        with self.budget_lock:
+            # A new budget starts once the queue has drained or the previous one has run out.
+            if self.waiting == 0 or time.monotonic() >= self.deadline:
+                self.deadline = time.monotonic() + self.max_total_seconds
+            self.waiting += 1
+        try:
+            with self.busy, self.torch.inference_mode():
+                output = self.model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    max_time=self._time_share(),
+                    do_sample=False,
+                    pad_token_id=self.tokenizer.pad_token_id or self.tokenizer.eos_token_id,
+                )
+        finally:
+            with self.budget_lock:
+                self.waiting -= 1
+        return self.tokenizer.decode(output[0, inputs['input_ids'].shape[1]:], skip_special_tokens=True).strip()
+
+    def generate(self, prompt):
+        if not self.load():
+            raise BackendUnavailable(f"Local model {self.model_name} could not be loaded: {self.load_error}")
+        return self._complete(prompt, self.max_new_tokens)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, reset_seconds=60):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    @property
+    def state(self):
+        with self.lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_seconds else 'open'
+
+    def allow(self):
+        with self.lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return 'trial'
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release(self):
+        # A trial that ends before success or failure is known (a closed stream) must give the slot back.
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self, trip=False):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if trip or self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+def should_trip(error):
+    response = getattr(error, 'response', None)
+    return isinstance(error, BackendUnavailable) or (response is not None and response.status_code in TRIP_STATUS_CODES)
+
+
+class FailoverBackend(ReportBackend):
+    def __init__(self, primary, fallback, breaker=None):
+        self.name = primary.name
+        self.max_workers = primary.max_workers
+        super().__init__()
+        self.primary = primary
+        self.fallback = fallback
+        self.breaker = breaker or CircuitBreaker()
+
+    def use_primary(self):
+        return self.primary.available() and self.breaker.allow()
+
+    def _failed(self, error):
+        self.breaker.record_failure(trip=should_trip(error))
+        logger.warning("%s failed (%s), circuit %s; falling back to %s", self.primary.name, error, self.breaker.state, self.fallback.name)
+
+    def generate(self, prompt):
+        if self.use_primary():
+            try:
+                text = self.primary.generate(prompt)
+                self.breaker.record_success()
+                return Completion(text, self.primary.name)
+            except Exception as e:
+                self._failed(e)
+        return Completion(self.fallback.generate(prompt), self.fallback.name, cacheable=False)
+
+    def stream(self, prompt):
+        allowed = self.use_primary()
+        if allowed:
+            streamed = False
+            try:
+                for chunk in self.primary.stream(prompt):
+                    streamed = True
+                    yield Completion(chunk, self.primary.name)
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                self._failed(e)
+                if streamed:
+                    raise
+            finally:
+                if allowed == 'trial':
+                    self.breaker.release()
+        for chunk in self.fallback.stream(prompt):
+            yield Completion(chunk, self.fallback.name, cacheable=False)
+
+
+_local_backends = {}
+_local_backends_lock = threading.Lock()
+
+
+def get_local_backend(model_name=LOCAL_MODEL):
+    with _local_backends_lock:
+        backend = _local_backends.get(model_name)
+        if backend is None:
+            backend = _local_backends[model_name] = LocalBackend(model_name)
+    return backend
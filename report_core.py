@@ -0,0 +1,296 @@
+import html
+import textwrap
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import ohlcv
+import storage
+from analytics import WindowReturns, price_matrix
+from news_dedup import canonical_news
+from news_retrieval import NewsVectors
+from perf import record, stage, timed
+from prompt_encoder import PromptTable, build_prompt
+from report_backends import FailoverBackend, GeminiBackend, get_local_backend
+from report_cache import file_version, make_cache_key
+from report_sections import REPORT_SECTIONS, assemble_report, report_instructions, run_sections, section_instructions
+from sentiment import attach_sentiment
+
+GEMINI_MODEL = 'gemini-2.0-flash'
+INDICES_PATH = 'global_indices.csv'
+NEWS_PATH = 'global_finance_news.csv'
+DEFAULT_WINDOW = (datetime(2025, 4, 1).date(), datetime(2025, 4, 8).date())
+DEFAULT_PERIOD = "April 1st - 8th, 2025"
+REPORT_NEWS_PER_COUNTRY = 2
+REPORT_NEWS_TOKENS = 1200
+REPORT_NEWS_COLUMNS = ['country', 'date', 'title', 'description']
+REPORT_PROMPT_TOKENS = 4000
+REPORT_PROMPT = textwrap.dedent("""
+    Analyze this financial market data and current trade news to generate a comprehensive, data-driven titled "Echoes of Liberation Day" report on tariff impacts:
+
+    MARKET DATA ($period), one row per index, fields separated by "|":
+    $market_data
+
+    RECENT TRADE NEWS, one row per article, fields separated by "|":
+    $news
+
+    $instructions""")
+
+COUNTRY_ISO_CODES = {
+    'United States': 'us', 'Germany': 'de', 'United Kingdom': 'gb', 'France': 'fr',
+    'Japan': 'jp', 'Canada': 'ca', 'Australia': 'au', 'Brazil': 'br',
+    'India': 'in', 'South Korea': 'kr', 'China': 'cn', 'Hong Kong': 'hk',
+    'Taiwan': 'tw', 'Netherlands': 'nl', 'Switzerland': 'ch', 'Italy': 'it',
+    'Spain': 'es', 'Sweden': 'se', 'Belgium': 'be', 'Norway': 'no',
+    'Denmark': 'dk', 'Finland': 'fi', 'Portugal': 'pt', 'Greece': 'gr',
+    'Poland': 'pl', 'Turkey': 'tr',
+    'South Africa': 'za', 'Nigeria': 'ng', 'Egypt': 'eg', 'Kenya': 'ke',
+    'Russia': 'ru', 'Myanmar': 'mm'
+}
+
+COUNTRY_ISO3_CODES = {
+    'United States': 'USA', 'Germany': 'DEU', 'United Kingdom': 'GBR', 'France': 'FRA',
+    'Japan': 'JPN', 'Canada': 'CAN', 'Australia': 'AUS', 'Brazil': 'BRA',
+    'India': 'IND', 'South Korea': 'KOR', 'China': 'CHN', 'Hong Kong': 'HKG',
+    'Taiwan': 'TWN', 'Netherlands': 'NLD', 'Switzerland': 'CHE', 'Italy': 'ITA',
+    'Spain': 'ESP', 'Sweden': 'SWE', 'Belgium': 'BEL', 'Norway': 'NOR',
+    'Denmark': 'DNK', 'Finland': 'FIN', 'Portugal': 'PRT', 'Greece': 'GRC',
+    'Poland': 'POL', 'Turkey': 'TUR',
+    'South Africa': 'ZAF', 'Nigeria': 'NGA', 'Egypt': 'EGY', 'Kenya': 'KEN',
+    'Russia': 'RUS', 'Myanmar': 'MMR'
+}
+
+# Nothing here imports Streamlit: app.py wraps these in cache_resource, while batch_reports.py
+# and the benchmarks call them directly.
+
+
+@timed()
+def load_indices(csv_path=INDICES_PATH, arrow_path=storage.INDICES_ARROW, columns=None):
+    return storage.load_indices(csv_path, arrow_path, columns)
+
+
+@timed()
+def load_news(csv_path=NEWS_PATH, arrow_path=storage.NEWS_ARROW, columns=None):
+    return attach_sentiment(storage.load_news(csv_path, arrow_path, columns))
+
+
+def load_stories(news_df):
+    with stage('cluster_news', articles=len(news_df)):
+        return canonical_news(news_df)
+
+
+def load_window_returns():
+    prices = ohlcv.load_ohlcv(columns=['date', 'ticker', 'adj_close'])
+    if prices.empty:
+        return None
+    return WindowReturns(price_matrix(prices))
+
+
+def period_label(start, end):
+    return f"{start.day} {start:%b} - {end.day} {end:%b %Y}"
+
+
+def apply_window(df, window_returns, start, end):
+    if window_returns is None:
+        return df, DEFAULT_PERIOD
+    windowed = window_returns.apply(df, start, end)
+    if windowed.empty:
+        return df, DEFAULT_PERIOD
+    start_day, end_day = [pd.Timestamp(column[len('Price on '):]) for column in windowed.columns if column.startswith('Price on ')]
+    with stage('window_metrics'):
+        windowed = windowed.join(window_returns.metrics(start_day, end_day), on='Ticker')
+    return windowed, period_label(start_day, end_day)
+
+
+def with_iso3(df):
+    return df.assign(ISO3=df['Country'].map(COUNTRY_ISO3_CODES))
+
+
+OVERVIEW_TEMPLATE = """
+<style>
+    body {{ margin: 0; font-family: 'Source Sans Pro', sans-serif; color: #8b8f98; }}
+    .controls {{ display: flex; gap: 8px; margin-bottom: 10px; }}
+    .controls input, .controls select {{ flex: 1; padding: 4px 6px; border: 1px solid #d0d3d9; border-radius: 4px; font-size: 0.8em; }}
+    .row {{ display: flex; width: 100%; margin-bottom: 10px; }}
+    .label {{ width: 20%; }}
+    .name {{ display: flex; align-items: center; font-size: 0.8em; font-weight: bold; }}
+    .name img {{ margin-right: 5px; }}
+    .index {{ font-size: 0.7em; color: gray; }}
+    .bar-cell {{ width: 80%; padding-left: 10px; }}
+    .bar {{ width: 100%; height: 12px; border-radius: 2px; display: flex; align-items: center; justify-content: center; color: white; font-weight: bold; font-size: 0.7em; }}
+</style>
+<div class="controls">
+    <input id="overview-filter" placeholder="Filter by country or index">
+    <select id="overview-sort">
+        <option value="asc">Most affected first</option>
+        <option value="desc">Least affected first</option>
+        <option value="name">Country A-Z</option>
+    </select>
+</div>
+<div id="overview-rows">{rows}</div>
+<script>
+    const container = document.getElementById('overview-rows');
+    const rows = Array.from(container.children);
+    const filter = document.getElementById('overview-filter');
+    const sort = document.getElementById('overview-sort');
+    const comparators = {{
+        asc: (a, b) => a.dataset.change - b.dataset.change,
+        desc: (a, b) => b.dataset.change - a.dataset.change,
+        name: (a, b) => a.dataset.country.localeCompare(b.dataset.country),
+    }};
+    function update() {{
+        const needle = filter.value.trim().toLowerCase();
+        rows.sort(comparators[sort.value]);
+        for (const row of rows) {{
+            row.style.display = row.dataset.search.includes(needle) ? 'flex' : 'none';
+            container.appendChild(row);
+        }}
+    }}
+    filter.addEventListener('input', update);
+    sort.addEventListener('change', update);
+</script>
+"""
+
+
+OVERVIEW_METRICS = [('Annualized Volatility (%)', 'vol'), ('Window Max Drawdown (%)', 'max DD')]
+
+
+def market_overview_html(df_sorted, min_change, max_change):
+    change = df_sorted['Percent Change (%)'].to_numpy(dtype=float)
+    span = max_change - min_change
+    normalized = (change - min_change) / span if span else np.ones_like(change)
+    channel = pd.Series((np.nan_to_num(normalized, nan=1.0) * 255).astype(int).astype(str), index=df_sorted.index)
+
+    country = df_sorted['Country'].astype(str).map(html.escape)
+    index_name = df_sorted['Index'].astype(str).map(html.escape)
+    iso_code = df_sorted['Country'].astype(str).map(COUNTRY_ISO_CODES).fillna('xx').str.lower()
+    change_text = df_sorted['Percent Change (%)'].map('{:.1f}%'.format, na_action='ignore').fillna('n/a')
+    search = (country + ' ' + index_name).str.lower()
+    details = pd.Series('', index=df_sorted.index)
+    for column, label in OVERVIEW_METRICS:
+        if column in df_sorted:
+            details = details + df_sorted[column].map(f" · {label} {{:.1f}}%".format, na_action='ignore').fillna('')
+
+    rows = (
+        "<div class='row' data-country='" + country + "' data-change='" + df_sorted['Percent Change (%)'].astype(str)
+        + "' data-search='" + search + "'><div class='label'><div class='name'>"
+        + "<img src='https://flagcdn.com/16x12/" + iso_code + ".png' width='16'>" + country + "</div>"
+        + "<div class='index'>" + index_name + details + "</div></div>"
+        + "<div class='bar-cell'><div class='bar' style='background-color: rgba(255, " + channel + ", " + channel + ", 0.8);'>"
+        + change_text + "</div></div></div>"
+    )
+    return OVERVIEW_TEMPLATE.format(rows=''.join(rows))
+
+
+def report_news_rows(news_df):
+    news_df = news_df.reindex(columns=REPORT_NEWS_COLUMNS + ['published'])
+    published = pd.to_datetime(news_df['published'], utc=True, errors='coerce')
+    dates = published.dt.strftime('%Y-%m-%d').where(published.notna(), news_df['date'].astype(object))
+    descriptions = news_df['description'].astype(object).replace('Content not available', None)
+    return news_df.assign(date=dates, description=descriptions)
+
+
+def select_report_news(news_vectors, indices_df):
+    movers = indices_df.reindex(indices_df['Percent Change (%)'].abs().sort_values(ascending=False).index)
+    positions = news_vectors.select(movers['Country'].unique(), per_country=REPORT_NEWS_PER_COUNTRY, token_budget=REPORT_NEWS_TOKENS)
+    return news_vectors.rows(positions)
+
+
+def build_news_vectors(stories):
+    with stage('news_vectors', articles=len(stories)):
+        return NewsVectors(stories)
+
+
+def build_report_prompt(news_df, indices_df, period=DEFAULT_PERIOD, max_tokens=REPORT_PROMPT_TOKENS, instructions=None):
+    movers = indices_df.reindex(indices_df['Percent Change (%)'].abs().sort_values(ascending=False).index)
+    tables = [
+        PromptTable('market_data', movers, [c for c in movers.columns if c != 'Ticker' and movers[c].notna().any()]),
+        PromptTable('news', report_news_rows(news_df), REPORT_NEWS_COLUMNS),
+    ]
+
+    instructions = report_instructions() if instructions is None else instructions
+    return build_prompt(REPORT_PROMPT, tables, max_tokens, period=period, instructions=instructions)
+
+
+def build_section_prompts(news_df, indices_df, period=DEFAULT_PERIOD):
+    return [
+        (title, build_report_prompt(news_df, indices_df, period, instructions=section_instructions(title, bullets)))
+        for title, bullets in REPORT_SECTIONS
+    ]
+
+
+def report_cache_key(prompt_text):
+    data_versions = {
+        'indices': file_version(INDICES_PATH),
+        'news': file_version(NEWS_PATH),
+    }
+    return make_cache_key(prompt_text, GEMINI_MODEL, data_versions)
+
+
+def make_report_backend(api_key, fallback=True):
+    primary = GeminiBackend(api_key, GEMINI_MODEL)
+    return FailoverBackend(primary, get_local_backend()) if fallback else primary
+
+
+def fallback_note(backend_name):
+    if backend_name and backend_name != GEMINI_MODEL:
+        return f"Gemini is unavailable, so this report was written by the local fallback model ({backend_name})."
+    return None
+
+
+def stream_report(prompt, backend, cache):
+    cache_key = report_cache_key(prompt.text)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        prompt.log('report', cache='hit')
+        yield cached
+        return
+
+    started = time.perf_counter()
+    chunks = []
+    cacheable = True
+    first_chunk = None
+    for chunk in backend.stream(prompt.text):
+        if chunk:
+            first_chunk = first_chunk or time.perf_counter() - started
+            cacheable = cacheable and getattr(chunk, 'cacheable', True)
+            chunks.append(chunk)
+            yield chunk
+
+    backend_name = getattr(chunks[0], 'backend', backend.name) if chunks else backend.name
+    prompt.log('report', cache='miss', backend=backend_name, first_chunk=f"{first_chunk or 0:.2f}s", total=f"{time.perf_counter() - started:.2f}s")
+    if chunks and cacheable:
+        cache.set(cache_key, ''.join(chunks))
+
+
+def run_section_prompts(prompts, backend, cache, on_section=None):
+    # ``prompts`` are (title, EncodedPrompt) pairs from build_section_prompts.
+    def finished(position, result):
+        record(f"section: {result.title}", result.seconds, cached=result.cached, ok=result.ok, backend=result.backend)
+        if result.cached:
+            prompts[position][1].log(f"section {result.title!r}", cache='hit')
+        else:
+            prompts[position][1].log(f"section {result.title!r}", cache='miss', backend=result.backend, total=f"{result.seconds:.2f}s")
+        if on_section is not None:
+            on_section(position, result)
+
+    texts = [(title, prompt.text) for title, prompt in prompts]
+    with stage('generate_sections', sections=len(prompts)):
+        return run_sections(texts, backend, cache=cache, cache_key=report_cache_key, on_section=finished)
+
+
+def generate_report_sections(news_df, indices_df, backend, cache, period=DEFAULT_PERIOD, on_section=None):
+    with stage('build_prompts'):
+        prompts = build_section_prompts(news_df, indices_df, period)
+    return run_section_prompts(prompts, backend, cache, on_section)
+
+
+def generate_report(news_df, indices_df, backend, cache, period=DEFAULT_PERIOD, parallel=True):
+    if parallel:
+        return assemble_report(generate_report_sections(news_df, indices_df, backend, cache, period))
+    with stage('build_prompts'):
+        prompt = build_report_prompt(news_df, indices_df, period)
+    with stage('generate_report'):
+        return ''.join(stream_report(prompt, backend, cache))
@@ -0,0 +1,285 @@
+import hashlib
+import html
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from string import Template
+
+import markdown
+import pandas as pd
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+
+MAX_CACHED_EXPORTS = 32
+
+REPORT_TEMPLATE = Template("""<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Echoes of Liberation Day</title>
+    <style>
+        body { 
+            font-family: 'Segoe UI', Arial, sans-serif; 
+            margin: 0; 
+            padding: 0; 
+            color: #333; 
+            line-height: 1.6;
+            background-color: #f9f9f9;
+        }
+        .container { 
+            max-width: 1200px; 
+            margin: 0 auto; 
+            padding: 40px 20px; 
+            background-color: white;
+            box-shadow: 0 0 20px rgba(0,0,0,0.05);
+        }
+        header { 
+            text-align: center; 
+            margin-bottom: 40px; 
+            padding-bottom: 20px;
+            border-bottom: 1px solid #eaeaea;
+        }
+        h1 { 
+            color: #1e3a8a; 
+            font-size: 32px; 
+            margin-bottom: 10px;
+        }
+        h2 { 
+            color: #1e3a8a; 
+            font-size: 24px;
+            border-bottom: 2px solid #1e3a8a; 
+            padding-bottom: 8px; 
+            margin-top: 40px;
+        }
+        h3 { 
+            color: #2563eb; 
+            font-size: 20px; 
+            margin-top: 30px;
+        }
+        p { 
+            margin-bottom: 16px; 
+            text-align: justify;
+        }
+        ul, ol { 
+            margin-bottom: 20px; 
+            padding-left: 25px;
+        }
+        li { 
+            margin-bottom: 8px; 
+        }
+        .highlight { 
+            background-color: #f0f9ff; 
+            padding: 20px; 
+            border-radius: 10px; 
+            margin: 25px 0; 
+            border-left: 4px solid #3b82f6;
+        }
+        .negative { 
+            color: #ef4444; 
+            font-weight: bold; 
+        }
+        .positive { 
+            color: #10b981; 
+            font-weight: bold; 
+        }
+        .map-container { 
+            margin: 40px 0; 
+            padding: 20px; 
+            background-color: white; 
+            border-radius: 10px; 
+            box-shadow: 0 4px 6px rgba(0,0,0,0.05);
+        }
+        .map-title { 
+            text-align: center; 
+            margin-bottom: 20px; 
+            color: #1e3a8a;
+            font-size: 24px;
+        }
+        table { 
+            width: 100%; 
+            border-collapse: collapse; 
+            margin: 25px 0; 
+            font-size: 14px; 
+        }
+        th { 
+            background-color: #1e3a8a; 
+            color: white; 
+            font-weight: bold; 
+            padding: 12px; 
+            text-align: left; 
+        }
+        td { 
+            padding: 10px 12px; 
+            border-bottom: 1px solid #eaeaea; 
+        }
+        tr:nth-child(even) {
+            background-color: #f8fafc; 
+        }
+        .data-table-container {
+            margin: 40px 0;
+            overflow-x: auto;
+            box-shadow: 0 4px 6px rgba(0,0,0,0.05);
+            border-radius: 10px;
+            background-color: white;
+            padding: 20px;
+        }
+        .data-table {
+            width: 100%;
+            min-width: 800px;
+        }
+        .data-table th {
+            position: sticky;
+            top: 0;
+            z-index: 10;
+        }
+        .footer {
+            text-align: center; 
+            margin-top: 60px; 
+            padding-top: 20px; 
+            border-top: 1px solid #eaeaea; 
+            color: #6b7280; 
+            font-size: 14px; 
+        }
+        strong, b { 
+            font-weight: 600; 
+            color: #1f2937; 
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <header>
+            <h1>Echoes of Liberation Day</h1>
+            <h4>Analysis Period: $period</h4>
+        </header>
+        
+        <div class="content">
+            <div class="report-content">$report_html</div>
+            <div class="data-table-container">
+                <h2 class='section-header'>Global Market Indices Data</h2>
+                <p>The table below provides detailed market data for global indices during the analysis period ($period).</p>
+                <table class='data-table'>
+                    <thead><tr><th>Country</th><th>Index</th><th>Ticker</th>$price_headers<th>Change (%)</th></tr></thead>
+                    <tbody>$table_rows</tbody>
+                </table>
+            </div>
+            
+            <div class="map-container">
+                <h2 class="map-title">Global Market Impact Map</h2>
+                <p>The map below illustrates the percentage change in major market indices across different countries during the analysis period.</p>
+                $map_html
+            </div>
+        </div>
+        
+        <div class="footer">
+            <p>Generated on $generated_on | Echoes of Liberation Day Analysis</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+
+NEGATIVE_WORDS = ('decline', 'drop', 'fall', 'decrease', '-', 'negative')
+POSITIVE_WORDS = ('increase', 'rise', 'grow', 'positive', '+')
+
+
+def add_class(element, name):
+    existing = element.get('class')
+    element.set('class', f"{existing} {name}" if existing else name)
+
+
+class ReportClassProcessor(Treeprocessor):
+    def run(self, root):
+        for element in root.iter():
+            if element.tag == 'h2':
+                add_class(element, 'section-header')
+            elif element.tag == 'strong':
+                text = ''.join(element.itertext()).lower()
+                if any(word in text for word in NEGATIVE_WORDS):
+                    add_class(element, 'negative')
+                elif any(word in text for word in POSITIVE_WORDS):
+                    add_class(element, 'positive')
+
+
+class ReportExtension(Extension):
+    def extendMarkdown(self, md):
+        # Runs after the inline processor (20) so <strong> elements exist.
+        md.treeprocessors.register(ReportClassProcessor(md), 'report_classes', 5)
+
+
+_converters = threading.local()
+
+
+def report_body_html(report):
+    converter = getattr(_converters, 'markdown', None)
+    if converter is None:
+        converter = _converters.markdown = markdown.Markdown(extensions=[ReportExtension()])
+    return converter.reset().convert(report)
+
+
+def price_columns(indices_df):
+    return [column for column in indices_df.columns if column.startswith('Price on ')]
+
+
+def price_headers(indices_df):
+    headers = []
+    for column in price_columns(indices_df):
+        day = pd.Timestamp(column[len('Price on '):])
+        headers.append(f"<th>Price on {day:%b} {day.day}</th>")
+    return ''.join(headers)
+
+
+def indices_table_rows(indices_df):
+    df = indices_df.sort_values(by='Percent Change (%)')
+    change = df['Percent Change (%)']
+    change_class = change.lt(0).map({True: 'negative', False: 'positive'})
+
+    def cell(column):
+        return '<td>' + df[column].astype(object).where(df[column].notna(), 'n/a').astype(str).map(html.escape) + '</td>'
+
+    prices = ''
+    for column in price_columns(df):
+        prices = prices + cell(column)
+    rows = (
+        '<tr>' + cell('Country') + cell('Index') + cell('Ticker') + prices
+        + "<td class='" + change_class + "'>" + change.map('{:.2f}%'.format, na_action='ignore').fillna('n/a') + '</td></tr>'
+    )
+    return ''.join(rows)
+
+
+def render_report_html(report, indices_df, map_html, period, generated_on=None):
+    generated_on = generated_on or datetime.now().strftime("%B %d, %Y")
+    return REPORT_TEMPLATE.substitute(
+        report_html=report_body_html(report),
+        period=html.escape(period),
+        price_headers=price_headers(indices_df),
+        table_rows=indices_table_rows(indices_df),
+        map_html=map_html,
+        generated_on=generated_on,
+    )
+
+
+def report_key(report, data_key):
+    return hashlib.sha256(f"{data_key}\0{report}".encode('utf-8')).hexdigest()
+
+
+_exports = OrderedDict()
+_exports_lock = threading.Lock()
+
+
+def export_report(report, indices_df, market_map, period):
+    generated_on = datetime.now().strftime("%B %d, %Y")
+    key = (report_key(report, market_map.key), period, generated_on)
+    with _exports_lock:
+        cached = _exports.get(key)
+        if cached is not None:
+            _exports.move_to_end(key)
+            return cached
+
+    content = render_report_html(report, indices_df, market_map.report_html(), period, generated_on).encode('utf-8')
+    with _exports_lock:
+        _exports[key] = content
+        while len(_exports) > MAX_CACHED_EXPORTS:
+            _exports.popitem(last=False)
+    return content
@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from perf import StageRecorder, recording, stage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+KEEP_FINISHED_SECONDS = 300
+
+
+class ReportJob:
+    def __init__(self, key, parts=1):
+        self.key = key
+        self.lock = threading.Lock()
+        self.finished_event = threading.Event()
+        self.parts = [None] * parts
+        self.notes = []
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self.subscribers = set()
+        self.recorder = StageRecorder(run=f"job-{key.rpartition(':')[2][:8]}")
+
+    @property
+    def done(self):
+        return self.finished_event.is_set()
+
+    def update(self, position, text):
+        with self.lock:
+            self.parts[position] = text
+
+    def note(self, message):
+        with self.lock:
+            if message not in self.notes:
+                self.notes.append(message)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.parts), list(self.notes)
+
+    def wait(self, timeout=None):
+        return self.finished_event.wait(timeout)
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished = time.time()
+        self.finished_event.set()
+
+
+# Process-wide registry of report jobs keyed by prompt hash. Every Streamlit session shares it,
+# so identical requests that arrive while a job is in flight attach to that job instead of
+# calling the model again, and poll it until it finishes.
+class ReportJobs:
+    def __init__(self, max_workers=DEFAULT_WORKERS, keep_seconds=KEEP_FINISHED_SECONDS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='report-job')
+        self.keep_seconds = keep_seconds
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.submitted = 0
+        self.coalesced = 0
+
+    def _prune(self, now):
+        expired = [key for key, job in self.jobs.items() if job.done and now - job.finished > self.keep_seconds]
+        for key in expired:
+            del self.jobs[key]
+
+    def get(self, key):
+        with self.lock:
+            return self.jobs.get(key)
+
+    def submit(self, key, fn, parts=1, retry=False, subscriber=None):
+        # ``fn(job)`` runs on a worker thread; it may publish partial output with job.update().
+        # Finished jobs are kept (and returned) until they expire or a caller explicitly retries.
+        with self.lock:
+            self._prune(time.time())
+            job = self.jobs.get(key)
+            if job is not None and not (retry and job.done):
+                if subscriber not in job.subscribers:
+                    job.subscribers.add(subscriber)
+                    self.coalesced += 1
+                return job
+            job = self.jobs[key] = ReportJob(key, parts)
+            job.subscribers.add(subscriber)
+            self.submitted += 1
+        self.executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        # Worker threads do not see the submitting page's recorder, so each job keeps its own.
+        job.status = 'running'
+        started = time.perf_counter()
+        try:
+            with recording(job.recorder), stage('report_job'):
+                result = fn(job)
+        except Exception as e:
+            logger.warning("report job %s failed after %.2fs: %s", job.key[:12], time.perf_counter() - started, e)
+            job._finish('failed', error=e)
+            return
+        logger.info("report job %s finished in %.2fs for %d subscriber(s)", job.key[:12], time.perf_counter() - started, len(job.subscribers))
+        job._finish('done', result=result)
+
+    def stats(self):
+        with self.lock:
+            running = sum(not job.done for job in self.jobs.values())
+            return {'submitted': self.submitted, 'coalesced': self.coalesced, 'in_flight': running}
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+
+from report_backends import MAX_CONCURRENT_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_SECTIONS = MAX_CONCURRENT_REQUESTS
+
+REPORT_SECTIONS = [
+    ('Executive Summary', [
+        "Provide a concise overview of key findings and tariff impact (150 words)",
+        "Include 3 most significant market movements with precise percentages",
+        "Highlight critical correlation between tariff news and market reaction",
+    ]),
+    ('Market Performance Analysis', [
+        "Analyze major indices performance with specific percentage changes",
+        "Compare sector performance (identify top 3 performers and bottom 3 underperformers)",
+        "Include volatility metrics and trading volume analysis where relevant",
+        "Identify specific price movements correlated with tariff announcements",
+    ]),
+    ('Tariff Policy Evaluation', [
+        "Analyze specific tariff measures mentioned in the news",
+        "Evaluate potential economic impact using concrete metrics (GDP effect, inflation implications)",
+        "Compare with historical tariff impacts using relevant precedents",
+    ]),
+    ('Supply Chain Disruption Assessment', [
+        "Identify key industries facing supply chain challenges",
+        "Quantify impact on input costs and pricing power (use percentages)",
+        "Highlight companies/sectors with geographic exposure concerns",
+    ]),
+    ('Consumer Impact Analysis', [
+        "Project effects on consumer prices with specific percentage estimates",
+        "Analyze potential shifts in consumer spending patterns",
+        "Identify categories of goods most affected",
+    ]),
+    ('Investor Strategy Recommendations', [
+        "Provide tactical asset allocation suggestions with specific weighting changes",
+        "Identify 3-5 defensive positioning strategies with clear rationales",
+        "Suggest specific sectors for overweight/underweight positions",
+    ]),
+    ('International Trade Implications', [
+        "Analyze impact on major trading partners (focus on largest 3-4 relationships)",
+        "Evaluate currency implications with specific exchange rate projections",
+        "Assess potential retaliatory measures and their market impact",
+    ]),
+    ('Future Outlook & Timeline', [
+        "Project key milestones for tariff implementation",
+        "Identify critical indicators to monitor over next 30/60/90 days",
+        "Provide probability assessment of various scenarios with proper justification, "
+        "strictly use realistic figures and numbers",
+    ]),
+    ('Interesting Take', [
+        'Give your take on some "winners" are actually losing long-term market share, while certain "losers" are '
+        "developing resilient trade alternatives that could position them better for the future.",
+    ]),
+]
+
+FORMAT_REQUIREMENTS = [
+    "Use professional, concise language suitable for sophisticated investors",
+    "Include specific data points, percentages, and numbers (e.g., -10.5%, not -10.5 percent)",
+    "Bold key insights and important figures",
+    "Create one brief bullet-point conclusion at the end of each section",
+    "Ensure analytical depth while maintaining readability",
+]
+
+
+def _bullets(lines):
+    return '\n'.join(f"• {line}" for line in lines)
+
+
+def report_instructions(sections=REPORT_SECTIONS):
+    outline = '\n\n'.join(f"{title}\n{_bullets(bullets)}" for title, bullets in sections)
+    return (
+        "Create a polished, professional report with the following EXACT sections:\n\n"
+        f"{outline}\n\nFORMAT REQUIREMENTS:\n{_bullets(FORMAT_REQUIREMENTS)}\n"
+    )
+
+
+def section_instructions(title, bullets):
+    return (
+        f'This report is written one section at a time. Write ONLY the "{title}" section, '
+        f'starting with the heading "## {title}" and without any other sections or a report title:\n\n'
+        f"{title}\n{_bullets(bullets)}\n\nFORMAT REQUIREMENTS:\n{_bullets(FORMAT_REQUIREMENTS)}\n"
+    )
+
+
+class SectionResult:
+    def __init__(self, title, text=None, error=None, cached=False, seconds=0.0, backend=None):
+        self.title = title
+        self.backend = backend
+        self.text = text
+        self.error = error
+        self.cached = cached
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return self.text is not None
+
+
+def with_heading(title, text):
+    text = text.strip()
+    return text if text.startswith('#') else f"## {title}\n\n{text}"
+
+
+async def generate_sections(prompts, client, cache=None, cache_key=None, max_concurrency=MAX_CONCURRENT_SECTIONS,
+                            regenerate=(), on_section=None):
+    # ``prompts`` is an ordered list of (title, prompt) pairs that share a data preamble.
+    # Sections are cached one by one, so a failed or changed section is the only one redone.
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = [None] * len(prompts)
+
+    async def run(position, title, prompt):
+        key = cache_key(prompt) if cache is not None else None
+        if key is not None and title not in regenerate:
+            cached = cache.get(key)
+            if cached is not None:
+                return position, SectionResult(title, cached, cached=True)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                completion = await client.agenerate(prompt)
+            except Exception as e:
+                logger.warning("section %r failed after %.2fs: %s", title, time.perf_counter() - started, e)
+                return position, SectionResult(title, error=e, seconds=time.perf_counter() - started)
+        text = with_heading(title, completion)
+        if key is not None and getattr(completion, 'cacheable', True):
+            cache.set(key, text)
+        backend = getattr(completion, 'backend', None)
+        return position, SectionResult(title, text, seconds=time.perf_counter() - started, backend=backend)
+
+    started = time.perf_counter()
+    tasks = [asyncio.ensure_future(run(position, title, prompt)) for position, (title, prompt) in enumerate(prompts)]
+    for finished in asyncio.as_completed(tasks):
+        position, result = await finished
+        results[position] = result
+        if on_section is not None:
+            on_section(position, result)
+
+    generated = [result for result in results if not result.cached]
+    logger.info(
+        "report sections: %d generated, %d cached, %d failed in %.2fs (slowest section %.2fs)",
+        len(generated), len(results) - len(generated), sum(not result.ok for result in results),
+        time.perf_counter() - started, max((result.seconds for result in generated), default=0.0),
+    )
+    return results
+
+
+def run_sections(prompts, client, **options):
+    return asyncio.run(generate_sections(prompts, client, **options))
+
+
+def assemble_report(results):
+    return '\n\n'.join(result.text for result in results if result.ok)
@@ -0,0 +1,144 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage import DATA_DIR, NEWS_CSV
+
+DEFAULT_MODEL = 'ProsusAI/finbert'
+SENTIMENT_PATH = os.path.join(DATA_DIR, 'news_sentiment.parquet')
+SENTIMENT_COLUMNS = ['url', 'sentiment_label', 'sentiment_score', 'sentiment_positive', 'sentiment_negative', 'sentiment_neutral', 'sentiment_model']
+MISSING_DESCRIPTIONS = {'', 'Content not available'}
+
+
+def article_text(title, description):
+    title = title if isinstance(title, str) else ''
+    description = description if isinstance(description, str) else ''
+    if description.strip() in MISSING_DESCRIPTIONS:
+        return title
+    return f"{title}. {description}"
+
+
+class SentimentScorer:
+    def __init__(self, model_name=DEFAULT_MODEL, quantize=False, max_length=256, threads=None):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.model_name = model_name
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        self.labels = [model.config.id2label[i].lower() for i in range(model.config.num_labels)]
+
+    def batches(self, lengths, max_batch_size, max_batch_tokens):
+        order = np.argsort(lengths, kind='stable')
+        batch = []
+        longest = 0
+        for position in order:
+            length = min(int(lengths[position]), self.max_length)
+            if batch and (len(batch) >= max_batch_size or max(longest, length) * (len(batch) + 1) > max_batch_tokens):
+                yield batch
+                batch, longest = [], 0
+            batch.append(position)
+            longest = max(longest, length)
+        if batch:
+            yield batch
+
+    def score(self, texts, max_batch_size=64, max_batch_tokens=8192):
+        encoded = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)['input_ids']
+        lengths = np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(encoded))
+        probabilities = np.zeros((len(encoded), len(self.labels)), dtype=np.float32)
+
+        with self.torch.inference_mode():
+            for batch in self.batches(lengths, max_batch_size, max_batch_tokens):
+                inputs = self.tokenizer.pad({'input_ids': [encoded[i] for i in batch]}, padding='longest', return_tensors='pt')
+                logits = self.model(**inputs).logits
+                probabilities[batch] = self.torch.softmax(logits, dim=-1).numpy()
+
+        frame = pd.DataFrame(probabilities, columns=[f"sentiment_{label}" for label in self.labels])
+        for label in ('positive', 'negative', 'neutral'):
+            if f"sentiment_{label}" not in frame:
+                frame[f"sentiment_{label}"] = 0.0
+        frame['sentiment_label'] = np.array(self.labels)[probabilities.argmax(axis=1)] if len(frame) else []
+        frame['sentiment_score'] = frame['sentiment_positive'] - frame['sentiment_negative']
+        frame['sentiment_model'] = self.model_name
+        return frame
+
+
+def load_sentiment(path=SENTIMENT_PATH):
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=SENTIMENT_COLUMNS)
+    return pd.read_parquet(path)
+
+
+def save_sentiment(scores, path=SENTIMENT_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    scores.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def score_new_articles(news_df, scorer, path=SENTIMENT_PATH, **batching):
+    cached = load_sentiment(path)
+    cached = cached[cached['sentiment_model'] == scorer.model_name]
+    pending = news_df.drop_duplicates('url')
+    pending = pending[~pending['url'].isin(cached['url'])]
+    if pending.empty:
+        return cached, 0
+
+    texts = [article_text(title, description) for title, description in zip(pending['title'], pending['description'])]
+    scores = scorer.score(texts, **batching)
+    scores.insert(0, 'url', pending['url'].to_numpy())
+    combined = pd.concat([cached, scores[SENTIMENT_COLUMNS]], ignore_index=True)
+    save_sentiment(combined, path)
+    return combined, len(scores)
+
+
+def attach_sentiment(news_df, path=SENTIMENT_PATH):
+    scores = load_sentiment(path)
+    if scores.empty:
+        return news_df
+    return news_df.merge(scores.drop(columns=['sentiment_model']).drop_duplicates('url'), on='url', how='left')
+
+
+def country_sentiment(news_df):
+    if 'sentiment_score' not in news_df:
+        return pd.DataFrame(columns=['articles', 'mean_score'])
+    scored = news_df.dropna(subset=['sentiment_score'])
+    summary = scored.groupby('country', observed=True)['sentiment_score'].agg(['count', 'mean'])
+    return summary.rename(columns={'count': 'articles', 'mean': 'mean_score'}).sort_values('mean_score')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score news sentiment offline and cache the results by article URL.")
+    parser.add_argument('--news', default=NEWS_CSV)
+    parser.add_argument('--output', default=SENTIMENT_PATH)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--quantize', action='store_true', help="apply int8 dynamic quantization to the linear layers")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--batch-tokens', type=int, default=8192)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    news_df = pd.read_csv(args.news, dtype=str, keep_default_na=False)
+    scorer = SentimentScorer(args.model, quantize=args.quantize, threads=args.threads)
+    started = time.perf_counter()
+    _, scored = score_new_articles(news_df, scorer, args.output, max_batch_size=args.batch_size, max_batch_tokens=args.batch_tokens)
+    elapsed = time.perf_counter() - started
+    rate = f" ({scored / elapsed:.1f} articles/s)" if scored else ''
+    print(f"Scored {scored} new articles in {elapsed:.1f}s{rate}; results in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
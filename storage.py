@@ -0,0 +1,161 @@
+import argparse
+import logging
+import os
+from email.utils import parsedate_to_datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = 'data'
+INDICES_CSV = 'global_indices.csv'
+NEWS_CSV = 'global_finance_news.csv'
+INDICES_ARROW = os.path.join(DATA_DIR, 'global_indices.feather')
+NEWS_ARROW = os.path.join(DATA_DIR, 'global_finance_news.feather')
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+INDICES_SCHEMA = pa.schema([
+    ('Country', CATEGORY),
+    ('Index', pa.string()),
+    ('Ticker', pa.string()),
+    ('Price on 2025-04-01', pa.float64()),
+    ('Price on 2025-04-08', pa.float64()),
+    ('Percent Change (%)', pa.float64()),
+])
+
+NEWS_SCHEMA = pa.schema([
+    ('country', CATEGORY),
+    ('date', pa.string()),
+    ('published', pa.timestamp('s', tz='UTC')),
+    ('source', CATEGORY),
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('url', pa.string()),
+])
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+DEFAULT_NEWS_YEAR = 2025
+
+
+def parse_published(value, default_year=DEFAULT_NEWS_YEAR):
+    if not isinstance(value, str) or not value.strip():
+        return pd.NaT
+    try:
+        return pd.Timestamp(parsedate_to_datetime(value)).tz_convert('UTC')
+    except (TypeError, ValueError, IndexError):
+        pass
+    # Older ingests kept only the first ten characters of pubDate ("Thu, 03 Ap").
+    parts = value.replace(',', ' ').split()
+    if len(parts) < 3 or not parts[1].isdigit():
+        return pd.NaT
+    months = [i for i, name in enumerate(MONTHS, 1) if name.lower().startswith(parts[2].lower())]
+    if len(months) != 1:
+        return pd.NaT
+    try:
+        return pd.Timestamp(year=default_year, month=months[0], day=int(parts[1]), tz='UTC')
+    except ValueError:
+        return pd.NaT
+
+
+def _to_table(df, schema):
+    arrays = []
+    for field in schema:
+        column = df[field.name] if field.name in df else pd.Series([None] * len(df))
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(column.astype('string'), type=pa.string()).dictionary_encode())
+        elif pa.types.is_timestamp(field.type):
+            arrays.append(pa.array(pd.to_datetime(column, utc=True), type=field.type))
+        elif pa.types.is_floating(field.type):
+            arrays.append(pa.array(pd.to_numeric(column, errors='coerce'), type=field.type))
+        else:
+            arrays.append(pa.array(column.astype('string'), type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def indices_table_from_csv(path=INDICES_CSV):
+    return _to_table(pd.read_csv(path), INDICES_SCHEMA)
+
+
+def news_table_from_csv(path=NEWS_CSV):
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df['published'] = df['date'].map(parse_published)
+    return _to_table(df, NEWS_SCHEMA)
+
+
+def write_table(table, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+
+def read_table(path, columns=None):
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def is_current(arrow_path, csv_path):
+    if not os.path.exists(arrow_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(arrow_path) >= os.path.getmtime(csv_path)
+
+
+def _arrow_strings(arrow_type):
+    # Strings stay in the memory-mapped Arrow buffers instead of becoming one Python object per cell.
+    if arrow_type == pa.string():
+        return pd.StringDtype('pyarrow')
+    return None
+
+
+def to_frame(table):
+    return table.to_pandas(types_mapper=_arrow_strings)
+
+
+def current_table(csv_path, arrow_path, from_csv, columns=None):
+    # A missing or stale Arrow file is rebuilt from its CSV so the parse happens once, not on every start.
+    if not is_current(arrow_path, csv_path):
+        table = from_csv(csv_path)
+        try:
+            write_table(table, arrow_path)
+        except OSError as e:
+            logger.warning("could not rewrite %s from %s, parsing the CSV instead: %s", arrow_path, csv_path, e)
+            return table if columns is None else table.select(columns)
+        logger.info("rebuilt %s from %s", arrow_path, csv_path)
+    return read_table(arrow_path, columns)
+
+
+def load_indices(csv_path=INDICES_CSV, arrow_path=INDICES_ARROW, columns=None):
+    return to_frame(current_table(csv_path, arrow_path, indices_table_from_csv, columns))
+
+
+def load_news(csv_path=NEWS_CSV, arrow_path=NEWS_ARROW, columns=None):
+    return to_frame(current_table(csv_path, arrow_path, news_table_from_csv, columns))
+
+
+def convert(indices_csv=INDICES_CSV, news_csv=NEWS_CSV, indices_arrow=INDICES_ARROW, news_arrow=NEWS_ARROW):
+    indices = indices_table_from_csv(indices_csv)
+    write_table(indices, indices_arrow)
+    news = news_table_from_csv(news_csv)
+    write_table(news, news_arrow)
+    return indices.num_rows, news.num_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the indices and news CSVs into typed Arrow files.")
+    parser.add_argument('--indices', default=INDICES_CSV)
+    parser.add_argument('--news', default=NEWS_CSV)
+    parser.add_argument('--indices-out', default=INDICES_ARROW)
+    parser.add_argument('--news-out', default=NEWS_ARROW)
+    args = parser.parse_args(argv)
+    num_indices, num_news = convert(args.indices, args.news, args.indices_out, args.news_out)
+    print(f"Wrote {num_indices} indices to {args.indices_out} and {num_news} articles to {args.news_out}")
+
+
+if __name__ == "__main__":
+    main()
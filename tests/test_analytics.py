@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from analytics import WindowReturns, compute_analytics
+
+INDICES = pd.DataFrame({
+    'Country': ['Germany', 'Nigeria'],
+    'Index': ['DAX', 'NGX All-Share'],
+    'Ticker': ['INDEXDB:DAX', 'NGX:NGXASI'],
+    'Price on 2025-04-01': [22539.98, 105000.0],
+    'Price on 2025-04-08': [19789.62, 104000.0],
+    'Percent Change (%)': [-12.2, -0.95],
+})
+
+
+def window_returns():
+    dates = pd.bdate_range('2025-03-03', '2025-04-10')
+    prices = pd.DataFrame({'INDEXDB:DAX': np.linspace(22000, 20000, len(dates))}, index=dates)
+    prices.loc['2025-04-01', 'INDEXDB:DAX'] = 22539.98
+    prices.loc['2025-04-08', 'INDEXDB:DAX'] = 19789.62
+    return WindowReturns(prices)
+
+
+def test_snapshot_window_keeps_tickers_missing_from_store():
+    windowed = window_returns().apply(INDICES, '2025-04-01', '2025-04-08')
+    assert windowed['Country'].tolist() == ['Germany', 'Nigeria']
+    assert windowed['Percent Change (%)'].tolist() == [-12.2, -0.95]
+
+
+def test_other_window_marks_missing_tickers_unavailable():
+    windowed = window_returns().apply(INDICES, '2025-03-03', '2025-03-31')
+    assert windowed['Country'].tolist() == ['Germany', 'Nigeria']
+    assert windowed['Percent Change (%)'].notna().tolist() == [True, False]
+
+
+def test_metrics_cover_every_stored_ticker():
+    metrics = window_returns().metrics('2025-04-01', '2025-04-08')
+    assert metrics.index.tolist() == ['INDEXDB:DAX']
+    assert metrics.loc['INDEXDB:DAX', 'Window Max Drawdown (%)'] < 0
+    assert metrics.loc['INDEXDB:DAX', 'Annualized Volatility (%)'] > 0
+
+
+def test_metrics_match_the_full_engine():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2024-01-01', '2025-04-30')
+    prices = pd.DataFrame(1000 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 4)), axis=0)),
+                          index=dates, columns=['A', 'B', 'C', 'D'])
+    prices.iloc[::7, 1] = np.nan
+    metrics = WindowReturns(prices).metrics('2025-03-03', '2025-04-08')
+    engine = compute_analytics(prices)
+    assert np.allclose(metrics['Annualized Volatility (%)'], (engine['volatility'].loc['2025-04-08'] * 100).round(2), equal_nan=True)
+    assert np.allclose(metrics['Beta'], engine['beta'].round(2), equal_nan=True)
+    assert np.allclose(metrics['Abnormal Return Around Apr 2 (%)'],
+                       (np.expm1(engine['cumulative_abnormal_returns'].iloc[-1]) * 100).round(2), equal_nan=True)
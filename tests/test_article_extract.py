@@ -0,0 +1,27 @@
+from article_extract import CONTENT_NOT_AVAILABLE, extract_text
+
+
+def test_first_article_is_returned():
+    page = b"<html><body><nav>Menu</nav><article><h1>Title</h1><p>Body.</p></article><article><p>Other</p></article></body></html>"
+    assert extract_text(page) == "Title\nBody."
+
+
+def test_nested_teaser_does_not_replace_outer_article():
+    page = (
+        b"<html><body><article><h1>Main</h1><p>Full story.</p>"
+        b"<article class='teaser'><p>Related: teaser</p></article><p>More story.</p></article></body></html>"
+    )
+    assert extract_text(page) == "Main\nFull story.\nRelated: teaser\nMore story."
+
+
+def test_nested_article_split_across_feed_chunks():
+    filler = b"<p>" + b"word " * 20000 + b"</p>"
+    page = b"<html><body><article><p>Lead.</p><article><p>Teaser</p></article>" + filler + b"<p>End.</p></article></body></html>"
+    text = extract_text(page)
+    assert text.startswith("Lead.\nTeaser\nword") and text.endswith("End.")
+
+
+def test_content_block_fallback_and_empty_page():
+    page = b"<html><body><div class='story-Content'><p>Body text</p><script>x()</script></div></body></html>"
+    assert extract_text(page) == "Body text"
+    assert extract_text(b"") == CONTENT_NOT_AVAILABLE
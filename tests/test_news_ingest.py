@@ -0,0 +1,78 @@
+import pandas as pd
+
+from news_ingest import RefreshCheckpoint, ingest, refresh
+
+FEEDS = {
+    ('Germany', '2025-04-01'): [('https://example.com/a', 'Thu, 03 Apr 2025 08:00:00 GMT')],
+    ('Germany', '2025-04-08'): [('https://example.com/b', 'Wed, 09 Apr 2025 08:00:00 GMT')],
+    ('Japan', '2025-04-01'): [('https://example.com/a', 'Thu, 03 Apr 2025 08:00:00 GMT')],
+}
+
+
+class FakeFetcher:
+    def __init__(self, body='Body of'):
+        self.calls = []
+        self.body = body
+
+    def fetch_google_news(self, country, start_date, end_date):
+        self.calls.append((country, start_date, end_date))
+        items = ''.join(
+            f"<item><title>Story {url[-1]} - Wire</title><link>{url}</link><pubDate>{published}</pubDate><source>Wire</source></item>"
+            for key, articles in FEEDS.items() if key[0] == country and start_date <= key[1] <= end_date
+            for url, published in articles
+        )
+        return f"<?xml version='1.0'?><rss><channel>{items}</channel></rss>"
+
+    def fetch_article(self, url):
+        return f"<html><body><article><p>{self.body} {url}</p></article></body></html>".encode('utf-8')
+
+
+def run(tmp_path, fetcher, start, end, countries=('Germany',)):
+    checkpoint = RefreshCheckpoint(str(tmp_path / 'checkpoint.sqlite3'))
+    try:
+        return refresh(list(countries), start, end, store_path=str(tmp_path / 'news.csv'), checkpoint=checkpoint,
+                       fetcher=fetcher, max_workers=2, parse_workers=0)
+    finally:
+        checkpoint.close()
+
+
+def test_later_window_is_fetched_after_earlier_one(tmp_path):
+    fetcher = FakeFetcher()
+    assert run(tmp_path, fetcher, '2025-04-01', '2025-04-07') == 1
+    assert run(tmp_path, fetcher, '2025-04-08', '2025-04-14') == 1
+    assert fetcher.calls == [('Germany', '2025-04-01', '2025-04-07'), ('Germany', '2025-04-08', '2025-04-14')]
+    assert pd.read_csv(tmp_path / 'news.csv')['url'].tolist() == ['https://example.com/a', 'https://example.com/b']
+
+
+def test_repeat_window_starts_at_newest_stored_article(tmp_path):
+    fetcher = FakeFetcher()
+    run(tmp_path, fetcher, '2025-04-01', '2025-04-07')
+    assert run(tmp_path, fetcher, '2025-04-01', '2025-04-07') == 0
+    assert fetcher.calls[-1] == ('Germany', '2025-04-03', '2025-04-07')
+
+
+def test_earlier_window_is_still_fetched_after_later_one(tmp_path):
+    fetcher = FakeFetcher()
+    run(tmp_path, fetcher, '2025-04-08', '2025-04-14')
+    assert run(tmp_path, fetcher, '2025-04-01', '2025-04-07') == 1
+    assert fetcher.calls[-1] == ('Germany', '2025-04-01', '2025-04-07')
+
+
+def test_incremental_run_after_a_full_ingest_reseeds_the_store(tmp_path):
+    run(tmp_path, FakeFetcher(), '2025-04-01', '2025-04-07')
+    # A full ingest rewrites the store behind the checkpoint's back.
+    full = ingest(['Germany'], '2025-04-01', '2025-04-14', fetcher=FakeFetcher('A much longer body of'), max_workers=2, parse_workers=0)
+    full.to_csv(tmp_path / 'news.csv', index=False)
+    assert run(tmp_path, FakeFetcher(), '2025-04-01', '2025-04-14') == 0
+    news = pd.read_csv(tmp_path / 'news.csv')
+    assert news['url'].tolist() == ['https://example.com/a', 'https://example.com/b']
+    assert news['description'].str.startswith('A much longer body of').all()
+
+
+def test_story_shared_by_two_countries_is_stored_for_both(tmp_path):
+    countries = ['Germany', 'Japan']
+    assert run(tmp_path, FakeFetcher(), '2025-04-01', '2025-04-07', countries) == 2
+    full = ingest(countries, '2025-04-01', '2025-04-07', fetcher=FakeFetcher(), max_workers=2, parse_workers=0)
+    news = pd.read_csv(tmp_path / 'news.csv')
+    assert sorted(zip(news['country'], news['url'])) == sorted(zip(full['country'], full['url']))
+    assert run(tmp_path, FakeFetcher(), '2025-04-01', '2025-04-07', countries) == 0
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from news_retrieval import HashingEmbedder, NewsVectors
+
+TEXTS = ['Tariffs hit exporters', 'Markets fall on tariff fears tariff', '', 'Central bank holds rates']
+
+
+def dense(vectors):
+    return np.stack([vectors[row] for row in range(len(vectors))])
+
+
+def test_sparse_rows_match_dense_tfidf():
+    embedder = HashingEmbedder(dim=64).fit(TEXTS)
+    vectors = embedder.encode(TEXTS)
+    matrix = dense(vectors)
+    assert np.allclose(np.linalg.norm(matrix, axis=1), [1, 1, 0, 1], atol=1e-6)
+    query = embedder.encode(['tariff markets'])[0]
+    assert np.allclose(vectors @ query, matrix @ query, atol=1e-6)
+    assert np.allclose(vectors[[3, 1]] @ query, matrix[[3, 1]] @ query, atol=1e-6)
+    assert vectors.nbytes < matrix.nbytes
+
+
+def test_select_prefers_relevant_articles():
+    news = pd.DataFrame({
+        'country': ['Japan', 'Japan', 'Germany'],
+        'title': ['Weather is mild', 'Tariff shock hits Japanese exports', 'Tariffs rattle German markets'],
+        'description': ['', '', ''],
+        'url': ['https://example.com/a', 'https://example.com/b', 'https://example.com/c'],
+    })
+    vectors = NewsVectors(news)
+    assert vectors.rows(vectors.select(['Japan', 'Germany'], per_country=1))['url'].tolist() == [
+        'https://example.com/b', 'https://example.com/c',
+    ]
@@ -0,0 +1,35 @@
+import os
+from datetime import date
+
+import pandas as pd
+
+import ohlcv
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'yahoo_2025-03-24_2025-04-11.parquet')
+TICKERS = ['INDEXFTSE:UKX', 'INDEXDB:DAX', 'INDEXNIKKEI:NI225', 'NGXASI']
+
+
+def test_replayed_refresh_is_incremental(tmp_path):
+    root = str(tmp_path / 'ohlcv')
+    download = ohlcv.replay_download(FIXTURE)
+    first = ohlcv.refresh(TICKERS, end='2025-04-02', start='2025-03-24', root=root, download=download)
+    assert ohlcv.last_dates(root) == {ticker: date(2025, 4, 1) for ticker in TICKERS[:3]}
+
+    second = ohlcv.refresh(TICKERS, end='2025-04-12', start='2025-03-24', root=root, download=download)
+    prices = ohlcv.load_ohlcv(root=root)
+    # 15 weekdays each, less one holiday row for London and one for Tokyo.
+    assert first + second == len(prices) == 43
+    assert not prices.duplicated(['ticker', 'date']).any()
+    assert prices.groupby('ticker')['date'].max().eq(date(2025, 4, 11)).all()
+    assert ohlcv.refresh(TICKERS, end='2025-04-12', start='2025-03-24', root=root, download=download) == 0
+
+
+def test_record_writes_what_replay_reads(tmp_path):
+    indices = tmp_path / 'indices.csv'
+    pd.DataFrame({'Ticker': TICKERS[:2]}).to_csv(indices, index=False)
+    recorded = str(tmp_path / 'recorded.parquet')
+    ohlcv.main(['--indices', str(indices), '--start', '2025-04-07', '--end', '2025-04-09',
+                '--root', str(tmp_path / 'ohlcv'), '--replay', FIXTURE, '--record', recorded])
+    expected = ohlcv.replay_download(FIXTURE)(['^FTSE', '^GDAXI'], '2025-04-07', '2025-04-09')
+    pd.testing.assert_frame_equal(pd.read_parquet(recorded), expected)
+    assert len(ohlcv.load_ohlcv(root=str(tmp_path / 'ohlcv'))) == 4
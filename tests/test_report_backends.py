@@ -0,0 +1,72 @@
+import time
+from contextlib import nullcontext
+
+from report_backends import BackendUnavailable, CircuitBreaker, FailoverBackend, LocalBackend, ReportBackend
+
+
+class StreamingBackend(ReportBackend):
+    name = 'primary'
+
+    def stream(self, prompt):
+        yield 'first'
+        yield 'second'
+
+
+class FakeTokenizer:
+    pad_token_id = 1
+
+    def __call__(self, prompt, return_tensors=None):
+        return {'input_ids': FakeIds()}
+
+    def decode(self, tokens, skip_special_tokens=True):
+        return 'text'
+
+
+class FakeIds:
+    shape = (1, 0)
+
+
+class FakeOutput:
+    def __getitem__(self, index):
+        return []
+
+
+class FakeModel:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.max_times = []
+
+    def generate(self, max_time, **kwargs):
+        self.max_times.append(max_time)
+        time.sleep(self.seconds)
+        return FakeOutput()
+
+
+def test_closed_stream_gives_back_the_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    backend = FailoverBackend(StreamingBackend(), StreamingBackend(), breaker)
+    stream = backend.stream('prompt')
+    assert next(stream) == 'first'
+    assert breaker.trial_running
+    stream.close()
+    assert not breaker.trial_running
+    assert breaker.allow() == 'trial'
+
+
+def test_local_sections_share_one_budget():
+    backend = LocalBackend('fake', max_seconds=60, max_total_seconds=0.3)
+    backend.tokenizer, backend.model = FakeTokenizer(), FakeModel(0.2)
+    backend.torch = type('torch', (), {'inference_mode': staticmethod(nullcontext)})
+    backend.load = lambda: True
+    futures = [backend.executor.submit(backend.generate, 'prompt') for _ in range(3)]
+    backend.executor.shutdown()
+    # The model runs one request at a time, so the last one to get it finds the budget spent.
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except BackendUnavailable:
+            results.append(None)
+    assert results.count('text') == 2 and results.count(None) == 1
+    assert all(max_time <= 0.3 for max_time in backend.model.max_times)
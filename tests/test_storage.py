@@ -0,0 +1,38 @@
+import os
+
+import storage
+
+ROWS = [
+    ('Germany', 'Thu, 03 Apr 2025 08:00:00 GMT', 'Wire', 'Story a', 'First', 'https://example.com/a'),
+    ('Japan', 'Fri, 04 Apr 2025 08:00:00 GMT', 'Wire', 'Story b', '', 'https://example.com/b'),
+]
+
+
+def write_news(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('country,date,source,title,description,url\n')
+        f.writelines(','.join(row) + '\n' for row in rows)
+
+
+def test_stale_arrow_file_is_rebuilt(tmp_path):
+    csv_path, arrow_path = str(tmp_path / 'news.csv'), str(tmp_path / 'news.feather')
+    write_news(csv_path, ROWS[:1])
+    assert len(storage.load_news(csv_path, arrow_path)) == 1
+    assert storage.is_current(arrow_path, csv_path)
+
+    write_news(csv_path, ROWS)
+    os.utime(arrow_path, (os.path.getmtime(csv_path) - 10,) * 2)
+    news = storage.load_news(csv_path, arrow_path, columns=['country', 'url'])
+    assert list(news.columns) == ['country', 'url']
+    assert news['url'].tolist() == ['https://example.com/a', 'https://example.com/b']
+    assert str(news['url'].dtype) == 'string'
+    assert storage.is_current(arrow_path, csv_path)
+
+
+def test_unwritable_arrow_file_falls_back_to_csv(tmp_path, caplog):
+    csv_path = str(tmp_path / 'news.csv')
+    write_news(csv_path, ROWS)
+    (tmp_path / 'blocked').write_text('')
+    news = storage.load_news(csv_path, str(tmp_path / 'blocked' / 'news.feather'), columns=['title'])
+    assert news['title'].tolist() == ['Story a', 'Story b']
+    assert 'could not rewrite' in caplog.text